@@ -1,11 +1,72 @@
-from os import system
+from os import environ, fsync, getpid, remove, replace, stat
 from os.path import exists
 import fileinput
+import gc
+import itertools
+import marshal
 import random
+from array import array
 import math
+import metrics
+import time
+from bisect import bisect_right
+from copy import copy
+from functools import cached_property, partial
+from itertools import accumulate
+from sys import getsizeof, intern
+from contextvars import ContextVar
+from threading import Event, Lock, RLock, Thread
 from typing import ClassVar, Type
 
-clear = lambda: system('cls')
+from leaderboard import Leaderboard
+from names import NameIndex
+from migrations import SCHEMA_MARKER, RowUpgrader, parseSchemaLine, readLayout, schemaLine
+from sqlitestore import SqlitePlayerStore, SqliteStorage
+from travel import RoutePlanner, SpatialIndex
+from render import TerminalConsole
+from world import World, WorldClock
+
+# Each session (the local driver, or a connection to server.py) sets its own console.
+# Text is buffered into a frame until the session prompts or pauses, see render.py.
+CONSOLE = ContextVar("console", default=TerminalConsole())
+
+def say(*args, sep: str = " ", end: str = "\n") -> None:
+    '''say() to the current session's console.'''
+    CONSOLE.get().write(sep.join(str(arg) for arg in args) + end)
+
+def clear() -> None:
+    CONSOLE.get().clear()
+
+class Pause:
+    '''Yielded by a menu to wait without blocking other sessions.'''
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+# Menus are generators. They yield a prompt string and are sent back the line the user typed,
+# or None if they cancelled (Ctrl-C). They may also yield a Pause. A runner feeds them input:
+# runInteractive reads the keyboard, server.py reads a socket.
+def runInteractive(flow):
+    '''Drive a menu generator from the keyboard and return its result.'''
+    console = CONSOLE.get()
+    try:
+        request = next(flow)
+        while True:
+            if isinstance(request, Pause):
+                console.flush()
+                time.sleep(request.seconds)
+                reply = None
+            else:
+                console.write(request)
+                console.flush()
+                try:
+                    reply = input()
+                except KeyboardInterrupt:
+                    reply = None
+            request = flow.send(reply)
+    except StopIteration as stop:
+        return stop.value
+    finally:
+        console.flush()
 
 ADJECTIVES_BAD = ("evil", "disgusting", "dirty", "horrible", "awful", "terrible", "menacing", "dastardly", "wicked", "vile", "foul", "vulgar", "rotten", "sick", "vicious", "wretched", "horrid", "nasty", "appalling", "hellish")
 ADJECTIVES_GOOD = ("wonderful", "wondrous", "amazing", "awesome", "great", "fantastic", "regal", "marvelous", "lovely", "magnificent", "glorious", "delightful")
@@ -15,10 +76,23 @@ PLACES_FIGHT = ("forests", "outlying trade routes", "caves", "labyrinth", "aband
 
 DAMAGE_TYPE = {"none": -1, "physical": 0, "magic": 1, "true": 2}
 DAMAGE_TYPE_INV = {value: key for key, value in DAMAGE_TYPE.items()}
+SCOREBOARD_SIZE = 10 # Players per scoreboard page
+TRAVEL_MENU_SIZE = 8 # Nearest cities offered by travelMenu
 PLAYER_STATUS = {"sleeping": 0, "resting": 1, "travelling": 2, "fighting": 3, "idle": 4}
 PLAYER_STATUS_INV = {value: key for key, value in PLAYER_STATUS.items()}
 INTERPRET_BOOL = {"no": False, "yes": True}
 
+STARTER_HEALTH = 15
+STARTER_SPEED = 45
+STARTER_GOLD = 20
+
+# Game time runs TIME_SCALE times faster than real time
+TIME_SCALE = 1800
+TRAVEL_SPEED = 20 # Miles per game hour
+SLEEP_HOURS = 8
+SLEEP_HEAL_PER_HOUR = 2
+REST_HEAL_PER_HOUR = 1
+
 CSV_DELIM = ","
 CSV_TUP_DELIM = "|"
 
@@ -26,99 +100,98 @@ FILE_LOCATIONS = "bin/locations.csv"
 FILE_ARMORS = "bin/armors.csv"
 FILE_WEAPONS = "bin/weapons.csv"
 FILE_CREATURES = "bin/creatures.csv"
+FILE_ENCOUNTERS = "bin/encounters.csv" # Optional spawn weights
+FILE_CATALOG_SNAPSHOT = "bin/catalog.snapshot" # Built from the files above, see readSnapshot
 FILE_PLAYERS = "bin/players.csv"
+FILE_WORLD = "bin/world.csv" # Timers still running, see World.save
 FILE_DEFAULT_PLAYERS = "bin/players_default.csv"
-
-def getDefaultGenerator() -> dict:
-    with open(FILE_DEFAULT_PLAYERS, 'r') as f:
-        aspects = f.readline().strip(",\n").split(CSV_DELIM)
-    return {key: None for key in aspects}
+FILE_DATABASE = "bin/players.db" # Players and catalog snapshot with ADVENTURE_STORAGE=sqlite, see sqlitestore.py
+FILE_METRICS = "bin/metrics.prom" # Written on close when ADVENTURE_METRICS is set, see metrics.py
+FILE_PROFILE = "bin/profile.pstats"
 
 # getMenu is reused from my previous submissions
 def getMenu(*args: str):
     '''Given a list of strings, generates a menu and returns a valid user input as an int.'''
-    counter = 1
-    for option in args:
-        print(f"{counter}. {option}")
-        counter += 1
-    try:
-        in1 = input("Choose an option: ")
-    except KeyboardInterrupt:
-        clear()
-        print("Cancelled menu!")
-        return None
-    upper = len(args) + 1
-    try:
-        if(in1.isdigit()):
-            in1 = int(in1)
-            if(in1 in range(1, upper)):
-                return in1
-            else:
-                print("Invalid option selection. Please try again.")
-                return getMenu(*args)
-        else:
-            print("Invalid characters detected. Please use only the number representing the option you wish to choose.")
-            return getMenu(*args)
-    except(ValueError, TypeError):
-        print("Invalid input. Please use only the number representing the option you wish to choose.")
-        return getMenu(*args)
-
-def getUnusedPlayerName(players: list) -> str:
-        '''Check name and return if valid.'''
-        name = getValidUserString("What is your name? : ")
-        if name:
-            for player in players:
-                if name == player.name:
-                    print(f"{name} is already in use! Specify a unique name.")
-                    return getUnusedPlayerName(players)
-            return name
-        else:
+    while True:
+        counter = 1
+        for option in args:
+            say(f"{counter}. {option}")
+            counter += 1
+        in1 = yield "Choose an option: "
+        if in1 is None:
+            clear()
+            say("Cancelled menu!")
             return None
+        upper = len(args) + 1
+        try:
+            if(in1.isdigit()):
+                in1 = int(in1)
+                if(in1 in range(1, upper)):
+                    return in1
+                else:
+                    say("Invalid option selection. Please try again.")
+            else:
+                say("Invalid characters detected. Please use only the number representing the option you wish to choose.")
+        except(ValueError, TypeError):
+            say("Invalid input. Please use only the number representing the option you wish to choose.")
 
-def getUsedPlayerName(players: list):
-        '''Check name and return if valid.'''
-        name = getValidUserString("What is your name? : ")
-        if name:
-            for player in players:
-                if name == player.name:
-                    print(f"{name} found!")
-                    return name
-            print("Name not found. Specify a name that has been used.")
-            return getUsedPlayerName(players)
-        else:
-            return None
+def getUnusedPlayerName(names) -> str:
+        '''Check name and return if valid. names is a NameIndex; names taken in any case are refused.'''
+        while True:
+            name = yield from getValidUserString("What is your name? : ")
+            if not name:
+                return None
+            taken = names.find(name)
+            if not taken:
+                return name
+            say(f"{name} is already in use{'' if name in taken else f' as {taken[0]}'}! Specify a unique name.")
+
+def getUsedPlayerName(names):
+        '''Check name and return the saved name it matches, in any case. names is a NameIndex.'''
+        while True:
+            name = yield from getValidUserString("What is your name? : ")
+            if not name:
+                return None
+            found = names.find(name)
+            if name in found or len(found) == 1:
+                name = name if name in found else found[0]
+                say(f"{name} found!")
+                return name
+            suggestions = found or names.suggest(name)
+            if suggestions:
+                say(f"Name not found. Did you mean {', '.join(suggestions)}?")
+            else:
+                say("Name not found. Specify a name that has been used.")
 
 def getValidUserString(prompt: str) -> str:
     '''Return user string without invalid characters.'''
-    try: 
-        name = input(prompt)
-    except KeyboardInterrupt:
-        clear()
-        print("Menu cancelled!")
-        return None
-    if CSV_DELIM in name:
-        print(f"Input cannot have \'{CSV_DELIM}\' in it.")
-        return getValidUserString(prompt)
-    return name
+    while True:
+        name = yield prompt
+        if name is None:
+            clear()
+            say("Menu cancelled!")
+            return None
+        if CSV_DELIM not in name:
+            return name
+        say(f"Input cannot have \'{CSV_DELIM}\' in it.")
 
 def getValidUserInt(prompt: str, lowerBound: int, upperBound: int) -> int:
     '''Return user int in [lowerBound, upperBound].'''
-    try:
-        out = input(prompt)
-    except KeyboardInterrupt:
-        clear()
-        print("Menu cancelled!")
-        return None
-    try:
-        out = int(out)
-        return out
-    except (ValueError, TypeError):
-        print(f"Value must be an int in [{lowerBound}, {upperBound}]!")
-        return getValidUserInt(prompt, lowerBound, upperBound)
+    while True:
+        out = yield prompt
+        if out is None:
+            clear()
+            say("Menu cancelled!")
+            return None
+        try:
+            out = int(out)
+            return out
+        except (ValueError, TypeError):
+            say(f"Value must be an int in [{lowerBound}, {upperBound}]!")
 
 def userYesNo(prompt: str) -> bool:
-    inn = input(prompt)
-    return inn.upper() == 'Y'
+    inn = yield prompt
+    return inn is not None and inn.upper() == 'Y'
 
 def plurify(string: str, num: int) -> str:
     if string[-1] == 's':
@@ -127,275 +200,1306 @@ def plurify(string: str, num: int) -> str:
         return f"{string}s"
     return string
 
-def rng(chance: int) -> bool:
+class SessionRandom(random.Random):
+    '''The random stream of one session. Seeded with the same value it makes the same rolls, so a session
+    can be replayed exactly (see replay.py). fight() splits off a stream for one fight, so the fight's
+    rolls don't depend on how much flavor text was rolled before it.'''
+    def fight(self):
+        return type(self)(self.getrandbits(64))
+
+class RecordingRandom(SessionRandom):
+    '''SessionRandom that appends every value it draws, and every value its fights draw, to rolls.'''
+    def __init__(self, seed=None, rolls: list = None) -> None:
+        self.rolls = [] if rolls is None else rolls
+        super().__init__(seed)
+
+    def random(self) -> float:
+        value = super().random()
+        self.rolls.append(value)
+        return value
+
+    def getrandbits(self, k: int) -> int:
+        value = super().getrandbits(k)
+        self.rolls.append(value)
+        return value
+
+    def fight(self):
+        return RecordingRandom(self.getrandbits(64), self.rolls)
+
+def rng(chance: int, rand=random) -> bool:
     '''Has chance/100 chance of returning True'''
     if(chance >= 100):
         return True
     if(chance <= 0):
         return False
-    return random.randint(0, 100) <= chance
+    return rand.randint(0, 100) <= chance
+
+# Combat rules, shared by fightMenu and the headless simulator.
+# rand is anything with the random module's interface, such as a seeded random.Random.
+FIGHT_START_DISTANCE = (1, 60)
+ESCAPE_CHANCE = 60
+HEAL_PER_TURN = 2
+
+def startDistance(rand=random) -> int:
+    return rand.randint(*FIGHT_START_DISTANCE)
+
+def attackDamage(weapon, armor, rand=random) -> int:
+    '''Roll damage from a player's weapon against a creature's armor.'''
+    damage = rand.choice(weapon.damage)
+    if(weapon.damageType == armor.protectionType):
+        damage = damage - math.ceil(armor.protection * damage)
+    return damage
+
+def mitigateDamage(damage: int, damageType: int, armor) -> int:
+    '''Damage left after a player's armor takes its share.'''
+    if(damageType == armor.protectionType):
+        damage = math.ceil(damage - (armor.protection * damage))
+    return damage
+
+def retreatDistance(distance: int, speed: int, hostile, rand=random) -> int:
+    hostileApproach = rand.randint(int(hostile.baseSpeed/2), hostile.baseSpeed)
+    return max(1, distance + speed - hostileApproach)
+
+def approachDistance(distance: int, speed: int) -> int:
+    return max(1, distance - speed)
+
+def escapeSucceeds(distance: int, speed: int, hostile, rand=random) -> bool:
+    return rng(ESCAPE_CHANCE, rand) or speed > (hostile.baseSpeed + 20) or distance > speed-(hostile.baseSpeed+20)
+
+def failedEscapeDistance(distance: int, hostile, rand=random) -> int:
+    return distance + rand.randint(0-int(hostile.baseSpeed/2), hostile.baseSpeed)
+
+def hostileApproachDistance(distance: int, hostile, unhurried: bool, rand=random) -> int:
+    '''Distance after an out of range hostile closes in. It closes faster if the player healed or waited.'''
+    if unhurried:
+        distance -= rand.randint(hostile.baseSpeed, hostile.baseSpeed*2)
+    else:
+        distance -= rand.randint(int(hostile.baseSpeed*0.75), hostile.baseSpeed)
+    return max(1, int(distance))
+
+def fightRewards(hostile, rand=random) -> tuple:
+    '''Roll the (gold, exp) dropped by a slain hostile.'''
+    goldDrop = rand.randint(int(hostile.baseHealth/4), hostile.baseHealth)
+    expDrop = rand.randint(int(hostile.baseHealth/2), hostile.baseHealth)
+    return goldDrop, expDrop
+
+def lootDrops(hostile, weapon, armor, rand=random) -> list:
+    '''Roll the items a slain hostile drops that differ from the player's weapon and armor.'''
+    itemDrops = []
+    if(hostile.weapon.drop and hostile.weapon.player and hostile.weapon != weapon and rng(hostile.weapon.dropChance, rand)):
+        itemDrops.append(hostile.weapon)
+    if(hostile.armor.drop and hostile.armor.player and hostile.armor != armor and rng(hostile.armor.dropChance, rand)):
+        itemDrops.append(hostile.armor)
+    return itemDrops
+
+class CatalogError(Exception):
+    '''Raised when a catalog item is missing, duplicated or malformed.'''
+
+class Registry:
+    '''Ordered catalog of named items (locations, armors, weapons, creatures) with O(1) lookup by name.'''
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.items = []
+        self.byName = {}
+        self.positions = {} # name -> index in items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index: int):
+        return self.items[index]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.byName
+
+    def add(self, item) -> None:
+        if item.name in self.byName:
+            raise CatalogError(f"Duplicate {self.kind} '{item.name}'!")
+        self.byName[item.name] = item
+        self.positions[item.name] = len(self.items)
+        self.items.append(item)
+
+    def get(self, name: str):
+        try:
+            return self.byName[name]
+        except KeyError:
+            raise CatalogError(f"Unknown {self.kind} '{name}'!") from None
+
+    def indexOf(self, name: str) -> int:
+        try:
+            return self.positions[name]
+        except KeyError:
+            raise CatalogError(f"Unknown {self.kind} '{name}'!") from None
+
+    def view(self, predicate) -> tuple:
+        '''Return the items matching predicate, in catalog order.'''
+        return tuple(item for item in self.items if predicate(item))
+
+class Field:
+    '''One column of a catalog schema: the CSV column, how to convert its text, and the attribute it sets.
+    convert is a callable, or a dict such as DAMAGE_TYPE or INTERPRET_BOOL whose keys are the allowed values.'''
+    __slots__ = ("column", "convert", "attribute")
+
+    def __init__(self, column: str, convert=str, attribute: str = None) -> None:
+        self.column = column
+        self.convert = convert
+        self.attribute = attribute or column
+
+def intTuple(text: str) -> tuple:
+    return tuple(int(x) for x in text.split(CSV_TUP_DELIM))
+
+def intRange(text: str) -> range:
+    '''"low|high" to the inclusive range of ints between them.'''
+    low, high = (int(x) for x in text.split(CSV_TUP_DELIM))
+    return range(low, high + 1)
+
+def nonNegativeFloat(text: str) -> float:
+    value = float(text)
+    if not value >= 0:
+        raise ValueError(text)
+    return value
+
+def readRows(lines, schema, source: str = "catalog", converters: dict = None):
+    '''Validate and convert catalog CSV lines one at a time, yielding (line number, values in schema order).
+
+    The first line is the header; columns may come in any order and extra ones are ignored. converters
+    overrides the schema's converter for some columns (for example to look names up in a Registry).
+    Raises CatalogError naming the source and line of the first bad row.'''
+    lines = iter(lines)
+    header = next(lines, "").strip(",\r\n").split(CSV_DELIM)
+    missing = [field.column for field in schema if field.column not in header]
+    if missing:
+        raise CatalogError(f"{source}, line 1: missing {plurify('columns', len(missing))} {', '.join(missing)}!")
+    converters = converters or {}
+    plan = []
+    for field in schema:
+        convert = converters.get(field.column, field.convert)
+        plan.append((header.index(field.column), field.column, convert.__getitem__ if isinstance(convert, dict) else convert,
+                     f" (expected one of {', '.join(convert)})" if isinstance(convert, dict) else ""))
+    for lineNumber, line in enumerate(lines, 2):
+        line = line.rstrip("\r\n")
+        if not line.strip(CSV_DELIM):
+            continue
+        cells = line.split(CSV_DELIM)
+        if len(cells) < len(header):
+            raise CatalogError(f"{source}, line {lineNumber}: expected {len(header)} columns, found {len(cells)}!")
+        values = []
+        for position, column, convert, expected in plan:
+            text = cells[position]
+            try:
+                values.append(convert(text))
+            except (KeyError, ValueError, CatalogError):
+                raise CatalogError(f"{source}, line {lineNumber}: bad {column} '{text}'{expected}!") from None
+        yield lineNumber, values
+
+def readCatalog(path: str, cls, converters: dict = None):
+    '''Stream cls items (Location, Armor, Weapon, Creature) from a bin/ catalog, checked against cls.SCHEMA.'''
+    with open(path, 'r') as f:
+        for _, values in readRows(f, cls.SCHEMA, path, converters):
+            yield cls.fromValues(values)
+
+def readCatalogs(*names: str) -> dict:
+    '''{name: Registry} of the catalogs named ("locations", "armors", "weapons", "creatures"; all of them by default),
+    parsed from their bin/ files. Creatures are linked to their armors and weapons, so those are read for them too.
+    Unlike AdventureGame(), this opens no player, world or journal files.'''
+    wanted = set(names or ("locations", "armors", "weapons", "creatures"))
+    if "creatures" in wanted:
+        wanted |= {"armors", "weapons"}
+    catalogs = {}
+    for name, kind, path, cls in (("locations", "location", FILE_LOCATIONS, Location), ("armors", "armor", FILE_ARMORS, Armor),
+                                  ("weapons", "weapon", FILE_WEAPONS, Weapon), ("creatures", "creature", FILE_CREATURES, Creature)):
+        if name not in wanted:
+            continue
+        catalogs[name] = Registry(kind)
+        converters = {"armor": catalogs["armors"].get, "weapon": catalogs["weapons"].get} if cls is Creature else None
+        for item in readCatalog(path, cls, converters):
+            catalogs[name].add(item)
+    return catalogs
+
+class EncounterTable:
+    '''Weighted hostile spawns for one area.
+
+    creatures are sorted by baseHealth and totals holds the running total of their weights, so the
+    creatures a player can face (baseHealth at most the player's) are always a prefix of the list.
+    choose() finds that prefix with one bisect and draws from it with another, O(log n) per spawn.
+    creatures and healths are shared by every area's table; only the totals are the area's own.'''
+    __slots__ = ("creatures", "healths", "totals")
+
+    def __init__(self, creatures: tuple, healths: list, weights) -> None:
+        self.creatures = creatures
+        self.healths = healths # baseHealth of each creature
+        self.totals = list(accumulate(weights))
+
+    def choose(self, maxHealth: int, rand=random):
+        count = bisect_right(self.healths, maxHealth)
+        total = self.totals[count - 1] if count else 0
+        if total <= 0:
+            raise CatalogError(f"No hostile creature with {maxHealth} or less health can spawn here!")
+        return self.creatures[bisect_right(self.totals, rand.random() * total, 0, count - 1)]
+
+class Encounters:
+    '''The default EncounterTable plus one per area weighted in FILE_ENCOUNTERS.
+
+    Each FILE_ENCOUNTERS row sets the weight of a creature, or of every creature of a species,
+    in an area: a location name, a PLACES_FIGHT place, "location:place", or "*" for everywhere.
+    Creatures without a row keep weight 1, and later rows override earlier ones.
+
+    Rows are matched to creatures through one index of names and species. An area's table is built
+    the first time a fight happens there and kept, so starting costs the rows, not areas x hostiles.'''
+    DEFAULT_AREA = "*"
+
+    def __init__(self, hostiles, rows=()) -> None:
+        self.creatures = tuple(sorted(hostiles, key=lambda creature: creature.baseHealth))
+        self.healths = [creature.baseHealth for creature in self.creatures]
+        self.rows = tuple(rows) # Kept for catalog snapshots
+        positions = {} # Creature name or species -> positions in self.creatures
+        for position, creature in enumerate(self.creatures):
+            positions.setdefault(creature.name, []).append(position)
+            if creature.species != creature.name:
+                positions.setdefault(creature.species, []).append(position)
+        self.weights = {} # area -> [(positions, weight)] from its rows, in file order
+        for area, creature, weight in self.rows:
+            matched = positions.get(creature)
+            if not matched:
+                raise CatalogError(f"Unknown hostile creature or species '{creature}' in encounters!")
+            self.weights.setdefault(area, []).append((matched, weight))
+        self.defaultWeights = self.areaWeights([1] * len(self.creatures), self.weights.pop(self.DEFAULT_AREA, ()))
+        self.default = EncounterTable(self.creatures, self.healths, self.defaultWeights)
+        self.tables = {} # area -> EncounterTable, for the areas fought in so far
+
+    @staticmethod
+    def areaWeights(weights: list, rows) -> list:
+        '''weights with an area's (positions, weight) rows laid over them.'''
+        for positions, weight in rows:
+            for position in positions:
+                weights[position] = weight
+        return weights
+
+    def table(self, location: str = None, place: str = None) -> EncounterTable:
+        '''The most specific table for a fight at place near location.'''
+        for area in (f"{location}:{place}", location, place):
+            if area in self.weights:
+                table = self.tables.get(area)
+                if table is None:
+                    weights = self.areaWeights(list(self.defaultWeights), self.weights[area])
+                    table = self.tables[area] = EncounterTable(self.creatures, self.healths, weights)
+                return table
+        return self.default
+
+    def choose(self, maxHealth: int, location: str = None, place: str = None, rand=random):
+        return self.table(location, place).choose(maxHealth, rand)
+
+ENCOUNTER_SCHEMA = (Field("area"), Field("creature"), Field("weight", nonNegativeFloat))
+
+def readEncounters(path: str, locations) -> list:
+    '''(area, creature, weight) rows from an encounters CSV, with areas checked against locations and PLACES_FIGHT.'''
+    rows = []
+    with open(path, 'r') as f:
+        for lineNumber, (area, creature, weight) in readRows(f, ENCOUNTER_SCHEMA, path):
+            location, _, place = area.partition(":")
+            known = area == Encounters.DEFAULT_AREA or (location in locations and (not place or place in PLACES_FIGHT)) or (not place and area in PLACES_FIGHT)
+            if not known:
+                raise CatalogError(f"{path}, line {lineNumber}: unknown area '{area}'!")
+            rows.append((area, creature, weight))
+    return rows
+
+class CatalogViews:
+    '''The menus' filtered catalogs, the encounter tables and the travel map, built from the catalogs on first use.
+    A start from the snapshot only restores the catalogs, and a session pays for a view when it first needs it.'''
+    def __init__(self, locations: Registry, armors: Registry, weapons: Registry, creatures: Registry, encounterRows) -> None:
+        self.locations, self.armors, self.weapons, self.creatures = locations, armors, weapons, creatures
+        self.encounterRows = tuple(encounterRows) # Kept for catalog snapshots
+
+    @cached_property
+    def starterLocations(self) -> tuple:
+        return self.locations.view(lambda loc: loc.starter)
+
+    @cached_property
+    def starterWeapons(self) -> tuple:
+        return self.weapons.view(lambda wep: wep.starter)
+
+    @cached_property
+    def starterArmors(self) -> tuple:
+        return self.armors.view(lambda armor: armor.starter and armor.player)
+
+    @cached_property
+    def marketWeapons(self) -> tuple:
+        return self.weapons.view(lambda wep: wep.player and wep.market)
+
+    @cached_property
+    def marketArmors(self) -> tuple:
+        return self.armors.view(lambda armor: armor.player and armor.market)
+
+    @cached_property
+    def hostiles(self) -> tuple:
+        return self.creatures.view(lambda creature: not creature.friendly)
+
+    @cached_property
+    def encounters(self) -> Encounters:
+        return Encounters(self.hostiles, self.encounterRows)
+
+    @cached_property
+    def map(self) -> SpatialIndex:
+        return SpatialIndex(self.locations)
+
+    @cached_property
+    def routes(self) -> RoutePlanner:
+        return RoutePlanner(self.map)
+
+SNAPSHOT_VERSION = 1
+
+def catalogSignature() -> tuple:
+    '''(path, mtime, size) of every catalog file. A snapshot is only used while this matches.'''
+    signature = [SNAPSHOT_VERSION, marshal.version]
+    for path in (FILE_LOCATIONS, FILE_ARMORS, FILE_WEAPONS, FILE_CREATURES, FILE_ENCOUNTERS):
+        try:
+            info = stat(path)
+            signature.append((path, info.st_mtime_ns, info.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+def readSnapshot(path: str, signature: tuple):
+    '''The flattened catalogs saved by writeSnapshot, or None if the snapshot is missing, stale or unreadable.'''
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(int.from_bytes(f.read(4), "little"))
+            if marshal.loads(header) != signature:
+                return None
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def writeSnapshot(path: str, signature: tuple, snapshot: dict) -> None:
+    '''Save snapshot for readSnapshot. The signature is written first so a stale snapshot is rejected without loading the rest.'''
+    tempPath = f"{path}.{getpid()}.tmp" # Several processes (sweep.py workers) may start at once
+    try:
+        with open(tempPath, 'wb') as f:
+            header = marshal.dumps(signature)
+            f.write(len(header).to_bytes(4, "little"))
+            f.write(header)
+            f.write(marshal.dumps(snapshot))
+        replace(tempPath, path)
+    except OSError:
+        pass # A read-only game folder just means every start parses the CSV files
+
+class PlayerStore:
+    '''Name-indexed access to FILE_PLAYERS.
+
+    The file is kept as an append-only log: a save overwrites the player's row in place when
+    the new row is the same length, otherwise it appends the new row and marks the old one
+    dead by turning it into a DEAD_MARKER comment. Dead rows are dropped by compact() once
+    they make up enough of the file, so a save costs the same no matter how many players exist.
+    Only rows ending in a newline count; a torn row left by a crash is cut off by the next append.
+
+    Rows are read and written in the layout of defaultPath (aspects, version). Rows saved in an older
+    layout are upgraded as they are read, and compact() rewrites them all, see migrations.py.'''
+    DEAD_MARKER = b"#~"
+    TRANSACTIONAL = False # The SaveQueue journals batches to make saveMany atomic
+    COMPACT_MIN_BYTES = 64 * 1024
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, path: str = FILE_PLAYERS, defaultPath: str = FILE_DEFAULT_PLAYERS) -> None:
+        self.path = path
+        self.index = {} # name -> (offset, length) of the live row
+        self.sectionOffsets = [] # Where each layout in the file starts
+        self.upgraders = [] # RowUpgrader for each layout
+        self.badRows = 0 # Rows with the wrong number of fields, which are left alone
+        self.duplicates = 0 # Replaced rows a crash mid-save left unmarked, which compact() drops
+        self.fileSize = 0 # End of the last complete line
+        self.deadBytes = 0
+        self.lock = RLock() # The SaveQueue writes from its own thread
+        if not exists(path):
+            with open(defaultPath, 'rb') as f:
+                defaultPlayerLines = f.read()
+            with open(path, 'xb') as f:
+                f.write(defaultPlayerLines)
+        self.version, self.aspects = readLayout(defaultPath if exists(defaultPath) else path)
+        self.buildIndex()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def names(self):
+        return self.index.keys()
+
+    def buildIndex(self) -> None:
+        '''Scan the file once, recording where each player's live row starts.'''
+        with self.lock:
+            self.index = {}
+            self.deadBytes = 0
+            self.badRows = 0
+            self.duplicates = 0
+            with open(self.path, 'rb') as f:
+                header = f.readline()
+                headerAspects = header.decode().strip(",\r\n").split(CSV_DELIM)
+                layouts = [(0, 1, headerAspects)] # Files from before versions were recorded are version 1
+                aspects = headerAspects
+                empty = True # No rows since the last layout started
+                offset = len(header)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    length = len(line)
+                    fields = line.decode().strip(",\r\n").split(CSV_DELIM)
+                    if line.startswith(self.DEAD_MARKER):
+                        self.deadBytes += length
+                        offset += length
+                        continue
+                    if line[:1] == b"#":
+                        layout = parseSchemaLine(line.decode(), headerAspects)
+                        if layout:
+                            if empty: # A layout with no rows, such as the header's own version
+                                layouts.pop()
+                            layouts.append((offset, *layout))
+                            aspects = layout[1]
+                            empty = True
+                        offset += length
+                        continue
+                    empty = False
+                    if len(fields) != len(aspects):
+                        self.badRows += 1
+                    else:
+                        old = self.index.get(fields[0])
+                        if old:
+                            # A later row wins; duplicates are left behind by a crash mid-save.
+                            self.deadBytes += old[1]
+                            self.duplicates += 1
+                        self.index[fields[0]] = (offset, length)
+                    offset += length
+            self.fileSize = offset
+            self.sectionOffsets = []
+            self.upgraders = []
+            for start, version, aspects in layouts:
+                self.addSection(start, version, aspects)
+
+    def addSection(self, offset: int, version: int, aspects: list) -> None:
+        self.sectionOffsets.append(offset)
+        self.upgraders.append(RowUpgrader(version, aspects, self.version, self.aspects))
+
+    def upgrader(self, offset: int) -> RowUpgrader:
+        '''The RowUpgrader for the row at offset.'''
+        return self.upgraders[bisect_right(self.sectionOffsets, offset) - 1]
+
+    def outdated(self) -> bool:
+        '''True if any rows are saved in an older layout.'''
+        return not all(upgrader.identity for upgrader in self.upgraders)
+
+    def read(self, name: str) -> str:
+        '''Return the saved row for name, in the current layout.'''
+        with self.lock:
+            offset, length = self.index[name]
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return self.upgrader(offset)(f.read(length).decode())
+
+    def rows(self):
+        '''Yield every live row in file order, in the current layout.'''
+        live = {offset for offset, _ in self.index.values()}
+        with open(self.path, 'rb') as f:
+            offset = len(f.readline())
+            for line in f:
+                if offset in live:
+                    yield self.upgrader(offset)(line.decode())
+                offset += len(line)
+
+    def save(self, name: str, line: str) -> None:
+        '''Write line as the row for name.'''
+        with self.lock:
+            data = line.encode()
+            old = self.index.get(name)
+            if old and old[1] == len(data) and self.upgrader(old[0]).identity:
+                with open(self.path, 'r+b') as f:
+                    f.seek(old[0])
+                    f.write(data)
+                return
+            self.saveMany({name: line})
+
+    def saveMany(self, rows: dict, sync: bool = False) -> None:
+        '''Append {name: line} rows in one write, then mark the rows they replace dead.
+        With sync, the new rows are on disk before any old row is touched.'''
+        with self.lock:
+            data = "".join(rows.values()).encode()
+            start = self.fileSize
+            if not self.upgraders[-1].identity:
+                # Rows from here on are in the current layout
+                layout = schemaLine(self.version, self.aspects).encode()
+                self.addSection(start, self.version, self.aspects)
+                self.fileSize += len(layout)
+                data = layout + data
+            with open(self.path, 'r+b') as f:
+                f.seek(start)
+                f.write(data)
+                f.truncate()
+                if sync:
+                    f.flush()
+                    fsync(f.fileno())
+                replaced = []
+                for name, line in rows.items():
+                    length = len(line.encode())
+                    if name in self.index:
+                        replaced.append(self.index[name])
+                    self.index[name] = (self.fileSize, length)
+                    self.fileSize += length
+                for offset, length in replaced:
+                    f.seek(offset)
+                    f.write(self.DEAD_MARKER)
+                    self.deadBytes += length
+            if self.deadBytes > self.COMPACT_MIN_BYTES and self.deadBytes > self.fileSize * self.COMPACT_RATIO:
+                self.compact()
+
+    def compact(self) -> None:
+        '''Rewrite the file without dead rows, or rows replaced by a later one. If any rows are in an
+        older layout, every row is rewritten in the current one, so later starts don't upgrade them again.'''
+        with self.lock:
+            upgrade = self.outdated()
+            live = {offset for offset, _ in self.index.values()}
+            tempPath = self.path + ".tmp"
+            with open(self.path, 'rb') as src, open(tempPath, 'wb') as dst:
+                offset = 0
+                for line in src:
+                    if offset >= self.fileSize:
+                        break
+                    start, offset = offset, offset + len(line)
+                    if line.startswith(self.DEAD_MARKER):
+                        continue
+                    if start and line[:1] != b"#" and start not in live:
+                        if len(line.decode().strip(",\r\n").split(CSV_DELIM)) == len(self.upgrader(start).aspects):
+                            continue # Replaced by a later row without being marked dead
+                    if upgrade:
+                        if start == 0:
+                            line = ("".join(f"{aspect}{CSV_DELIM}" for aspect in self.aspects) + "\n" + schemaLine(self.version)).encode()
+                        elif line.startswith(SCHEMA_MARKER.encode()):
+                            continue
+                        elif line[:1] != b"#":
+                            upgrader = self.upgrader(start)
+                            text = line.decode()
+                            if len(text.strip(",\r\n").split(CSV_DELIM)) == len(upgrader.aspects): # Rows with the wrong field count are kept as they are
+                                line = upgrader(text).encode()
+                    dst.write(line)
+                dst.flush()
+                fsync(dst.fileno())
+            replace(tempPath, self.path)
+            self.buildIndex()
+
+    def memoryUsage(self) -> int:
+        '''Approximate bytes held by the name index.'''
+        return getsizeof(self.index) + sum(getsizeof(name) + getsizeof(entry) for name, entry in self.index.items())
+
+    def close(self) -> None:
+        pass # Every call opens the file itself
+
+class SaveQueue:
+    '''Write-behind saving for a PlayerStore.
+
+    put() only records the row, so saving never waits on the disk. Repeated saves of the same
+    player before a flush are coalesced into one row. A background thread flushes every
+    interval seconds, or sooner once maxPending players are dirty.
+
+    Durability: a flush first writes the whole batch to a journal file ending in a commit line,
+    then applies it to the player file and removes the journal. If the process dies mid-flush,
+    the next SaveQueue on the same store replays a committed journal and ignores an uncommitted
+    one, so each batch is applied completely or not at all. With fsync "always" (the default)
+    this also holds across power loss, and a save is durable once flush() returns. With fsync
+    "never" the OS decides when data reaches the disk, which is only safe against process crashes.
+    Saves still pending when the process dies are lost, so call close() before exiting.'''
+    COMMIT = b"#~commit\n"
+    FSYNC_POLICIES = ("always", "never")
+
+    def __init__(self, store: PlayerStore, interval: float = 1.0, fsync: str = "always", maxPending: int = 1000) -> None:
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_POLICIES}, not '{fsync}'!")
+        self.store = store
+        self.journalPath = store.path + ".journal"
+        self.interval = interval
+        self.sync = fsync == "always"
+        self.maxPending = maxPending
+        self.pending = {}
+        self.lock = Lock()
+        self.flushLock = Lock()
+        self.wake = Event()
+        self.closed = False
+        self.replayJournal()
+        self.thread = Thread(target=self.run, name="SaveQueue", daemon=True)
+        self.thread.start()
+
+    def put(self, name: str, line: str) -> None:
+        with self.lock:
+            self.pending[name] = line
+            full = len(self.pending) >= self.maxPending
+        if full:
+            self.wake.set()
+
+    def run(self) -> None:
+        while not self.closed:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        '''Write every pending save to disk now.'''
+        with self.flushLock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            if self.store.TRANSACTIONAL:
+                self.store.saveMany(batch, self.sync)
+                return
+            with open(self.journalPath, 'wb') as f:
+                f.write("".join(batch.values()).encode() + self.COMMIT)
+                if self.sync:
+                    f.flush()
+                    fsync(f.fileno())
+            self.store.saveMany(batch, self.sync)
+            remove(self.journalPath)
+
+    def replayJournal(self) -> None:
+        '''Finish a flush that was interrupted by a crash.'''
+        if not exists(self.journalPath):
+            return
+        with open(self.journalPath, 'rb') as f:
+            journal = f.read()
+        if journal.endswith(self.COMMIT):
+            lines = journal[:-len(self.COMMIT)].decode().splitlines(keepends=True)
+            self.store.saveMany({line.split(CSV_DELIM)[0]: line for line in lines}, self.sync)
+            if self.store.duplicates:
+                # The crash came after some of the batch was appended, and replaying it appended those rows
+                # again. saveMany only marks the newest copy dead, so drop the older ones now.
+                self.store.compact()
+        remove(self.journalPath)
+
+    def close(self) -> None:
+        '''Stop the background thread and flush what is left.'''
+        self.closed = True
+        self.wake.set()
+        self.thread.join()
+        self.flush()
+
+class PlayerCatalogue:
+    '''Lazy collection of saved players. Only the PlayerStore index is kept in memory;
+    full Player objects are built by makePlayer when something asks for them.'''
+    def __init__(self, store: PlayerStore, makePlayer) -> None:
+        self.store = store
+        self.makePlayer = makePlayer
+        self.cache = {} # Players handed out by get(), so changes to them are seen everywhere
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.cache or name in self.store
+
+    def __iter__(self):
+        for name in list(self.store.names()):
+            yield self.cache[name] if name in self.cache else self.makePlayer(self.store.read(name))
+        # Players saved since the last flush of the SaveQueue
+        for name, player in list(self.cache.items()):
+            if name not in self.store:
+                yield player
+
+    def get(self, name: str):
+        '''Return the Player called name, or None if there is no such player.'''
+        if name not in self.cache:
+            if name not in self.store:
+                return None
+            self.cache[name] = self.makePlayer(self.store.read(name))
+        return self.cache[name]
+
+    def add(self, player) -> None:
+        self.cache[player.name] = player
+
+    def memoryUsage(self) -> int:
+        return self.store.memoryUsage()
+
+class PlayerPopulation:
+    '''Struct-of-arrays store for many players at once, which the scoreboard is built from.
+
+    Every int stat is one array('i') column and location/armor/weapon are array('I') indexes into
+    the game's registries, so a player costs a few dozen bytes of machine ints plus its name,
+    instead of a Player object.'''
+    INT_FIELDS = ("level", "exp", "gold", "baseHealth", "currentHealth", "baseSpeed", "currentSpeed", "status")
+    REFERENCE_FIELDS = ("location", "armor", "weapon")
+
+    def __init__(self, game) -> None:
+        self.registries = {"location": game.LOCATIONS, "armor": game.ARMORS, "weapon": game.WEAPONS}
+        self.names = []
+        self.species = [] # Interned, so each species string is stored once
+        self.columns = {field: array('i') for field in self.INT_FIELDS}
+        self.columns.update({field: array('I') for field in self.REFERENCE_FIELDS})
+        self.staleRows = 0 # Rows naming a location, armor or weapon the catalogs no longer have, left out
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, player) -> None:
+        self.names.append(player.name)
+        self.species.append(intern(player.species))
+        for field in self.INT_FIELDS:
+            self.columns[field].append(int(getattr(player, field)))
+        for field in self.REFERENCE_FIELDS:
+            self.columns[field].append(self.registries[field].indexOf(getattr(player, field).name))
+
+    def appendLines(self, lines, aspects: list) -> None:
+        '''Add FILE_PLAYERS rows without building Players. Where each field is in a row is worked out once.
+        Rows with a stale location, armor or weapon are counted in staleRows instead.'''
+        position = {aspect: index for index, aspect in enumerate(aspects)}
+        name, species = position["name"], position["species"]
+        ints = [(self.columns[field].append, position[field]) for field in self.INT_FIELDS]
+        references = [(self.registries[field].positions, position[field]) for field in self.REFERENCE_FIELDS]
+        referenceAppends = [self.columns[field].append for field in self.REFERENCE_FIELDS]
+        for line in lines:
+            values = line.strip(",\r\n").split(CSV_DELIM)
+            try:
+                indexes = [positions[values[index]] for positions, index in references]
+            except KeyError:
+                self.staleRows += 1
+                continue
+            self.names.append(values[name])
+            self.species.append(intern(values[species]))
+            for append, index in ints:
+                append(int(values[index]))
+            for append, index in zip(referenceAppends, indexes):
+                append(index)
+
+# Where the game keeps saved players and its compiled catalogs. A backend provides readSnapshot,
+# writeSnapshot and dropSnapshot for the catalogs, openPlayers for a store with PlayerStore's methods,
+# leaderboard for the LEADERBOARD over that store, and close.
+class CsvStorage:
+    '''Players in FILE_PLAYERS (a PlayerStore) and catalogs in FILE_CATALOG_SNAPSHOT.'''
+    def readSnapshot(self, signature: tuple):
+        return readSnapshot(FILE_CATALOG_SNAPSHOT, signature)
+
+    def writeSnapshot(self, signature: tuple, snapshot: dict) -> None:
+        writeSnapshot(FILE_CATALOG_SNAPSHOT, signature, snapshot)
+
+    def dropSnapshot(self) -> None:
+        if exists(FILE_CATALOG_SNAPSHOT):
+            remove(FILE_CATALOG_SNAPSHOT)
+
+    def openPlayers(self) -> PlayerStore:
+        return PlayerStore()
+
+    def leaderboard(self, store: PlayerStore, loadScores, flush) -> Leaderboard:
+        return Leaderboard(loadScores)
+
+    def close(self) -> None:
+        pass
+
+def csvPlayerRows():
+    '''Rows of FILE_PLAYERS, for a new database to start from.'''
+    return PlayerStore().rows() if exists(FILE_PLAYERS) else ()
+
+STORAGE = {"csv": CsvStorage, "sqlite": lambda: SqliteStorage(FILE_DATABASE, FILE_DEFAULT_PLAYERS, csvPlayerRows)}
+
+def openStorage(name: str = None):
+    '''The backend called name, or ADVENTURE_STORAGE, or CSV files.'''
+    name = name or environ.get("ADVENTURE_STORAGE") or "csv"
+    if name not in STORAGE:
+        raise ValueError(f"Unknown storage '{name}'! Choose from {', '.join(STORAGE)}.")
+    return STORAGE[name]()
 
 class AdventureGame:
-    def __init__(self) -> None:
-        self.LOCATIONS = []
-        self.ARMORS = []
-        self.WEAPONS = []
-        self.CREATURES = []
+    STARTER_LOCATIONS = property(lambda self: self.views.starterLocations)
+    STARTER_WEAPONS = property(lambda self: self.views.starterWeapons)
+    STARTER_ARMORS = property(lambda self: self.views.starterArmors)
+    MARKET_WEAPONS = property(lambda self: self.views.marketWeapons)
+    MARKET_ARMORS = property(lambda self: self.views.marketArmors)
+    HOSTILES = property(lambda self: self.views.hostiles)
+    ENCOUNTERS = property(lambda self: self.views.encounters)
+    MAP = property(lambda self: self.views.map)
+    ROUTES = property(lambda self: self.views.routes)
+
+    def __init__(self, seed=None, storage: str = None) -> None:
+        '''seed makes every session's rolls reproducible. Without one the game picks a random seed.
+        storage names the backend in STORAGE to keep players in, see openStorage.'''
+        startTime = time.perf_counter()
+        self.startupTime = None
+        self.seed = random.randrange(2**64) if seed is None else seed
+        self.sessionNumbers = itertools.count(1) # Shared by every session, see newSession
+        self.rand = SessionRandom(self.sessionSeed(0))
+        self.recorder = None # A replay.SessionRecorder, when this session is being recorded
+        self.LOCATIONS = Registry("location")
+        self.ARMORS = Registry("armor")
+        self.WEAPONS = Registry("weapon")
+        self.CREATURES = Registry("creature")
+        self.views = None # CatalogViews, see buildViews
         self.PLAYERS = []
+        self.storage = None
+        self.playerStore = None
+        self.saveQueue = None
+        self.WORLD = None
+        self.LEADERBOARD = None
+        self.NAMES = None
+        self.ACTIVE_PLAYERS = set() # Names being played by any session sharing this game
+        self.TIMED_PLAYERS = {} # Never-saved players with world timers, which PLAYERS doesn't know
         self.player = None
+        self.catalogSource = None # "snapshot" or "CSV"
+        self.catalogTime = None
         # Check files
         failed = False
         if(not exists(FILE_LOCATIONS)):
-            print("ERROR loading Locations File!")
+            say("ERROR loading Locations File!")
             failed = True
         if(not exists(FILE_ARMORS)):
-            print("ERROR loading Armors File!")
+            say("ERROR loading Armors File!")
             failed = True
         if(not exists(FILE_WEAPONS)):
-            print("ERROR loading Weapons File!")
+            say("ERROR loading Weapons File!")
             failed = True
         if(not exists(FILE_CREATURES)):
-            print("ERROR loading Creatures File!")
+            say("ERROR loading Creatures File!")
             failed = True
         if(failed):
-            print("Aborting game...")
+            say("Aborting game...")
             return None
 
-        # Start loading resources    
-        with open(FILE_LOCATIONS, 'r') as f:
-            aspects = f.readline().strip(",\n").split(CSV_DELIM)
-            for line in f:
-                newLocation = Location(line, aspects)
-                self.LOCATIONS.append(newLocation)
+        # Start loading resources from the snapshot of the catalogs, or from the CSV files if they changed since
+        catalogStart = time.perf_counter()
+        self.storage = openStorage(storage)
+        collecting = gc.isenabled()
+        gc.disable() # Catalogs have no reference cycles; collecting while building them is wasted work
+        try:
+            signature = catalogSignature()
+            snapshot = self.storage.readSnapshot(signature)
+            if snapshot is None:
+                self.loadCatalogs()
+                self.storage.writeSnapshot(signature, self.catalogSnapshot())
+                self.catalogSource = "CSV"
+            else:
+                self.restoreCatalogs(snapshot)
+                self.catalogSource = "snapshot"
+        finally:
+            if collecting:
+                gc.enable()
+        self.catalogTime = time.perf_counter() - catalogStart
 
-        with open(FILE_ARMORS, 'r') as f:
-            aspects = f.readline().strip(",\n").split(CSV_DELIM)
-            for line in f:
-                newArmor = Armor(line, aspects)
-                self.ARMORS.append(newArmor)
+        self.loadPlayers()
+        self.startupTime = time.perf_counter() - startTime
+    
+    def loadCatalogs(self):
+        '''Parse the catalog CSV files.'''
+        catalogs = readCatalogs()
+        self.LOCATIONS, self.ARMORS, self.WEAPONS, self.CREATURES = catalogs["locations"], catalogs["armors"], catalogs["weapons"], catalogs["creatures"]
+        self.buildViews(readEncounters(FILE_ENCOUNTERS, self.LOCATIONS) if exists(FILE_ENCOUNTERS) else ())
 
-        with open(FILE_WEAPONS, 'r') as f:
-            aspects = f.readline().strip(",\n").split(CSV_DELIM)
-            for line in f:
-                newWeapon = Weapon(line, aspects)
-                self.WEAPONS.append(newWeapon)
+    def catalogSnapshot(self) -> dict:
+        '''The parsed catalogs flattened for writeSnapshot. Creatures refer to their armor and weapon by name.'''
+        return {"locations": [item.snapshotValues() for item in self.LOCATIONS],
+                "armors": [item.snapshotValues() for item in self.ARMORS],
+                "weapons": [item.snapshotValues() for item in self.WEAPONS],
+                "creatures": [item.snapshotValues() for item in self.CREATURES],
+                "encounters": list(self.views.encounterRows)}
 
-        with open(FILE_CREATURES, 'r') as f:
-            aspects = f.readline().strip(",\n").split(CSV_DELIM)
-            for line in f:
-                newCreature = Creature(line, aspects)
-                armor = newCreature.armor
-                wep = newCreature.weapon
-                newCreature.armor = self.ARMORS[[armor.name for armor in self.ARMORS].index(armor)]
-                newCreature.weapon = self.WEAPONS[[weapon.name for weapon in self.WEAPONS].index(wep)]
-                self.CREATURES.append(newCreature)
+    def restoreCatalogs(self, snapshot: dict):
+        '''Rebuild the catalogs from catalogSnapshot() output without parsing or validating anything.'''
+        for values in snapshot["locations"]:
+            self.LOCATIONS.add(Location.fromSnapshot(values))
+        for values in snapshot["armors"]:
+            self.ARMORS.add(Armor.fromSnapshot(values))
+        for values in snapshot["weapons"]:
+            self.WEAPONS.add(Weapon.fromSnapshot(values))
+        armors, weapons = self.ARMORS.byName, self.WEAPONS.byName
+        for values in snapshot["creatures"]:
+            newCreature = Creature.fromSnapshot(values)
+            newCreature.armor = armors[newCreature.armor]
+            newCreature.weapon = weapons[newCreature.weapon]
+            self.CREATURES.add(newCreature)
+        self.buildViews(snapshot["encounters"])
+
+    def buildViews(self, encounterRows):
+        # Views used by the menus, built once on first use instead of on every visit. Sessions share them through newSession's copy
+        self.views = CatalogViews(self.LOCATIONS, self.ARMORS, self.WEAPONS, self.CREATURES, encounterRows)
 
-        self.loadPlayers()
-    
     def loadPlayers(self):
-        if not exists(FILE_PLAYERS):
-            with open(FILE_DEFAULT_PLAYERS, 'r') as f:
-                defaultPlayerLines = f.readlines()
-            with open(FILE_PLAYERS, 'x') as f:
-                f.writelines(defaultPlayerLines)
-        with open(FILE_PLAYERS, 'r') as f:
-            aspects = f.readline().strip(",\n").split(CSV_DELIM)
-            for line in f:
-                if line.strip(",\n").split(CSV_DELIM)[0][0] == '#': # Comments
-                    continue
-                if(len(line.strip(",\n").split(CSV_DELIM)) == len(aspects)):
-                    newPlayer = Player()
-                    newPlayer.loadFromLine(line, aspects)
-                    loc = newPlayer.location
-                    armor = newPlayer.armor
-                    wep = newPlayer.weapon
-                    newPlayer.location = self.LOCATIONS[[location.name for location in self.LOCATIONS].index(loc)]
-                    newPlayer.armor = self.ARMORS[[armor.name for armor in self.ARMORS].index(armor)]
-                    newPlayer.weapon = self.WEAPONS[[weapon.name for weapon in self.WEAPONS].index(wep)]
-                    newPlayer.update()
-                    self.PLAYERS.append(newPlayer)
+        self.playerStore = self.storage.openPlayers()
+        self.saveQueue = SaveQueue(self.playerStore)
+        self.PLAYERS = PlayerCatalogue(self.playerStore, self.makePlayer)
+        self.LEADERBOARD = self.storage.leaderboard(self.playerStore, self.playerScores, self.saveQueue.flush)
+        self.NAMES = NameIndex(self.playerStore.names) # Saved players, and new ones being created
+        self.WORLD = World(WorldClock(TIME_SCALE), {"arrive": self.onArrive, "wake": self.onWake, "heal": self.onHeal})
+        if exists(FILE_WORLD):
+            self.WORLD.load(FILE_WORLD)
+
+    def makePlayer(self, line: str):
+        '''Build a Player from its saved row, linking its location, armor and weapon.'''
+        newPlayer = Player()
+        newPlayer.leaderboard = self.LEADERBOARD
+        newPlayer.loadFromLine(line, self.playerStore.aspects)
+        newPlayer.location = self.LOCATIONS.get(newPlayer.location)
+        newPlayer.armor = self.ARMORS.get(newPlayer.armor)
+        newPlayer.weapon = self.WEAPONS.get(newPlayer.weapon)
+        newPlayer.update()
+        return newPlayer
+
+    def startupReport(self) -> str:
+        if self.startupTime is None:
+            return "Game files failed to load."
+        return (f"Loaded {len(self.PLAYERS)} {plurify('players', len(self.PLAYERS))} in {self.startupTime:.3f}s ({self.PLAYERS.memoryUsage()/1024:.1f} KB of player index), "
+                f"catalogs from {self.catalogSource} in {self.catalogTime * 1000:.1f} ms"
+                + (f", skipped {self.playerStore.badRows} unreadable player {plurify('rows', self.playerStore.badRows)}" if self.playerStore.badRows else "")
+                + (", some players are upgraded from an older save layout as they load" if self.playerStore.outdated() else ""))
 
     def getNewPlayer(self, ignorePlayerOverwrite: bool = False):
         clear()
-        print("--- New Player Creation ---")
-        newPlayer = Player()
+        say("--- New Player Creation ---")
+        newPlayer = Player() # Kept off the LEADERBOARD until savePlayer queues them
         if(ignorePlayerOverwrite):
-            newPlayer.name = getValidUserString("What is your name? : ").strip()
+            newPlayer.name = (yield from getValidUserString("What is your name? : ")).strip()
         else:
-            newPlayer.name = getUnusedPlayerName(self.PLAYERS).strip()
-        newPlayer.species = getValidUserString("What species are you? : ").strip()
+            newPlayer.name = (yield from getUnusedPlayerName(self.NAMES)).strip()
+        newPlayer.species = (yield from getValidUserString("What species are you? : ")).strip()
 
         # Starter choice.
-        print("Would you rather have... ")
-        choice = getMenu("More starting health", "More starting speed", "More starting gold")
+        say("Would you rather have... ")
+        choice = yield from getMenu("More starting health", "More starting speed", "More starting gold")
         if choice == 1:
-            newPlayer.baseHealth = 15
-            newPlayer.currentHealth = 15
+            newPlayer.baseHealth = STARTER_HEALTH
+            newPlayer.currentHealth = STARTER_HEALTH
         elif choice == 2:
-            newPlayer.baseSpeed = 45
-            newPlayer.currentSpeed = 45
+            newPlayer.baseSpeed = STARTER_SPEED
+            newPlayer.currentSpeed = STARTER_SPEED
         elif choice == 3:
-            newPlayer.gold = 20
+            newPlayer.gold = STARTER_GOLD
         else:
             clear()
-            print("Creation cancelled!")
+            say("Creation cancelled!")
             return None
-        print("An excellent choice.")
+        say("An excellent choice.")
 
         # Location choice.     
-        print("\nWhere would you like to start out?")
-        starterLocs = [loc for loc in self.LOCATIONS if loc.starter]
-        choice = getMenu(*[f"{loc.name} in the country of {loc.country}" for loc in starterLocs])
+        say("\nWhere would you like to start out?")
+        starterLocs = self.STARTER_LOCATIONS
+        choice = yield from getMenu(*[f"{loc.name} in the country of {loc.country}" for loc in starterLocs])
         if choice:
             newPlayer.location = starterLocs[choice-1]
         else:
             clear()
-            print("Creation cancelled!")
+            say("Creation cancelled!")
             return None
-        print(f"I knew someone from {newPlayer.location.name} once. What a {random.choice(ADJECTIVES_GOOD)} place!")
+        say(f"I knew someone from {newPlayer.location.name} once. What a {self.rand.choice(ADJECTIVES_GOOD)} place!")
 
         # Weapon choice.
-        print("\nNow, what weapon would you like to start with?")
-        starterWeps = [wep for wep in self.WEAPONS if wep.starter]
-        choice = getMenu(*[f"{wep.name}, a {wep.type} weapon dealing between {min(list(wep.damage))} and {max(list(wep.damage))} damage." for wep in starterWeps])
+        say("\nNow, what weapon would you like to start with?")
+        starterWeps = self.STARTER_WEAPONS
+        choice = yield from getMenu(*[f"{wep.name}, a {wep.type} weapon dealing between {min(list(wep.damage))} and {max(list(wep.damage))} damage." for wep in starterWeps])
         if choice:
             newPlayer.weapon = starterWeps[choice-1]
         else:
             clear()
-            print("Creation cancelled!")
+            say("Creation cancelled!")
             return None
-        print(f"The {newPlayer.weapon.name} is a powerful tool in the hands of a competent warrior.")
+        say(f"The {newPlayer.weapon.name} is a powerful tool in the hands of a competent warrior.")
 
         # Armor choice.
-        print("\nFinally, you must choose your armor.")
-        starterArmor = [armor for armor in self.ARMORS if armor.starter and armor.player]
-        choice = getMenu(*[f"{armor.name} which slows you down by {armor.speedPenalty:.0%}, but negates {armor.protection:.0%} of incoming damage." for armor in starterArmor])
+        say("\nFinally, you must choose your armor.")
+        starterArmor = self.STARTER_ARMORS
+        choice = yield from getMenu(*[f"{armor.name} which slows you down by {armor.speedPenalty:.0%}, but negates {armor.protection:.0%} of incoming damage." for armor in starterArmor])
         if choice:
             newPlayer.armor = starterArmor[choice-1]
         else:
             clear()
-            print("Creation cancelled!")
+            say("Creation cancelled!")
             return None
-        print(f"Your new {newPlayer.armor.name} will serve you well, provided you don't overdo it.")
-        newPlayer.generator = getDefaultGenerator()
+        say(f"Your new {newPlayer.armor.name} will serve you well, provided you don't overdo it.")
         newPlayer.update()
-        self.player = newPlayer
+        if self.claimPlayer(newPlayer):
+            self.NAMES.add(newPlayer.name) # Taken from now on, unless the player leaves without saving
 
     def loadPlayer(self):
         clear()
-        if(len(self.PLAYERS) == 0):
-            print("No players to load.\n")
+        if(len(self.NAMES) == 0): # NAMES also has saves still waiting in the SaveQueue
+            say("No players to load.\n")
             return None
         try:
-            playerName = getUsedPlayerName(self.PLAYERS)
-            for player in self.PLAYERS:
-                if playerName == player.name:
-                    self.player = player
-                    self.player.new = False
-                    break
+            playerName = yield from getUsedPlayerName(self.NAMES)
+            try:
+                player = self.PLAYERS.get(playerName)
+            except CatalogError as error: # Saved with a location, armor or weapon the catalogs no longer have
+                say(f"{playerName}'s save could not be loaded: {error}")
+                return None
+            if playerName and not player: # Another session is still creating them
+                say(f"{playerName} is already being played!")
+            if player and self.claimPlayer(player):
+                player.new = False
+                if self.recorder:
+                    self.recorder.loadedPlayer(self)
         except KeyboardInterrupt:
-            self.player = None
+            self.releasePlayer()
+
+    def close(self) -> None:
+        '''Flush saves that are still queued and keep the world's timers. Call before exiting.'''
+        if self.WORLD:
+            self.tick()
+            self.WORLD.save(FILE_WORLD)
+        if self.saveQueue:
+            self.saveQueue.close()
+            self.playerStore.close()
+        if self.storage:
+            self.storage.close()
+        if metrics.enabled():
+            metrics.writeMetrics(FILE_METRICS)
+            metrics.writeProfile(FILE_PROFILE)
+
+    # Travel, sleep and rest take game time. They are timers in the shared WORLD, which runs them for
+    # every player, online or not, whenever any session calls tick().
+    def tick(self) -> int:
+        return self.WORLD.advance()
+
+    def worldPlayer(self, name: str):
+        player = self.TIMED_PLAYERS.get(name) or self.PLAYERS.get(name)
+        if player is None:
+            self.WORLD.cancel(name) # Deleted since the timer was set
+        return player
+
+    def timePlayer(self, player) -> None:
+        '''Let the world find player when their timers fire. Saved players are found through PLAYERS.'''
+        self.WORLD.cancel(player.name)
+        if player.new:
+            self.TIMED_PLAYERS[player.name] = player
+
+    def keepWorldChange(self, player) -> None:
+        '''Save a change a timer made, unless a session is playing player and will save it itself.'''
+        if player.name not in self.ACTIVE_PLAYERS:
+            self.saveQueue.put(player.name, player.toLine(self.playerStore.aspects))
+
+    def onArrive(self, timer) -> None:
+        player = self.worldPlayer(timer.name)
+        if player and player.status == PLAYER_STATUS["travelling"]:
+            player.status = PLAYER_STATUS["idle"]
+            self.keepWorldChange(player)
+
+    def onWake(self, timer) -> None:
+        player = self.worldPlayer(timer.name)
+        if player and player.status == PLAYER_STATUS["sleeping"]:
+            self.WORLD.cancel(player.name)
+            player.status = PLAYER_STATUS["idle"]
+            self.keepWorldChange(player)
+
+    def onHeal(self, timer) -> None:
+        player = self.worldPlayer(timer.name)
+        if not player or player.status not in (PLAYER_STATUS["sleeping"], PLAYER_STATUS["resting"]) or player.currentHealth <= 0:
+            return
+        player.currentHealth = min(player.baseHealth, player.currentHealth + timer.amount)
+        if player.currentHealth < player.baseHealth:
+            self.WORLD.schedule("heal", player.name, 60, timer.amount, bulk=True, start=timer.due)
+        elif player.status == PLAYER_STATUS["resting"]:
+            player.status = PLAYER_STATUS["idle"]
+        self.keepWorldChange(player)
+
+    def depart(self, destination, distance: float) -> float:
+        '''Set this session's player travelling to destination. Returns the game minutes the journey takes.'''
+        player = self.player
+        minutes = distance / TRAVEL_SPEED * 60
+        self.timePlayer(player)
+        player.location = destination
+        player.status = PLAYER_STATUS["travelling"]
+        self.WORLD.schedule("arrive", player.name, minutes)
+        return minutes
+
+    def goToSleep(self) -> None:
+        player = self.player
+        self.timePlayer(player)
+        player.status = PLAYER_STATUS["sleeping"]
+        self.WORLD.schedule("wake", player.name, SLEEP_HOURS * 60)
+        if 0 < player.currentHealth < player.baseHealth:
+            self.WORLD.schedule("heal", player.name, 60, SLEEP_HEAL_PER_HOUR, bulk=True)
+
+    def startResting(self) -> None:
+        '''Let an idle, hurt player heal while they are away.'''
+        player = self.player
+        if player and player.status == PLAYER_STATUS["idle"] and 0 < player.currentHealth < player.baseHealth:
+            self.timePlayer(player)
+            player.status = PLAYER_STATUS["resting"]
+            self.WORLD.schedule("heal", player.name, 60, REST_HEAL_PER_HOUR, bulk=True)
+
+    def waitWhile(self, status: int):
+        '''Pause until the world moves this session's player out of status.'''
+        player = self.player
+        while player.status == status:
+            self.tick()
+            timer = self.WORLD.pending(player.name)
+            if timer is None:
+                if player.status == status: # Its timer was lost, e.g. the game stopped before saving the world
+                    player.status = PLAYER_STATUS["idle"]
+                break
+            yield Pause(min(1.0, max(0.05, self.WORLD.clock.realSeconds(timer.due - self.WORLD.clock.now()))))
+
+    def newSession(self):
+        '''Return a game for another session, sharing this game's catalogs and saved players.'''
+        session = copy(self)
+        session.player = None
+        session.rand = SessionRandom(self.sessionSeed(next(self.sessionNumbers)))
+        session.recorder = None
+        return session
+
+    def sessionSeed(self, number: int) -> str:
+        return f"{self.seed}:{number}"
+
+    def claimPlayer(self, player) -> bool:
+        '''Make player this session's player, unless another session is already playing them.'''
+        self.releasePlayer()
+        if player.name in self.ACTIVE_PLAYERS:
+            say(f"{player.name} is already being played!")
+            return False
+        self.ACTIVE_PLAYERS.add(player.name)
+        self.player = player
+        return True
+
+    def releasePlayer(self) -> None:
+        if self.player:
+            self.ACTIVE_PLAYERS.discard(self.player.name)
+            if self.player.new: # Nothing of theirs is kept, so their timers would change nothing
+                self.WORLD.cancel(self.player.name)
+                self.TIMED_PLAYERS.pop(self.player.name, None)
+            if self.player.name not in self.PLAYERS: # Never saved, so free again
+                self.NAMES.remove(self.player.name)
+        self.player = None
 
     def savePlayer(self):
         player = self.player
+        player.leaderboard = self.LEADERBOARD
         player.update()
-        found = False
-        with open(FILE_PLAYERS, 'r') as f:
-            lines = f.readlines()
-        for index, line in enumerate(lines):
-            if player.name in line:
-                found = True
-                break
-        if found:
-            lines[index] = "".join(f"{value}," for value in self.player.generator.values()) + "\n"
-        else:
-            lines.append("".join(f"{value}," for value in self.player.generator.values()) + "\n") 
-        with open(FILE_PLAYERS, 'w') as f:
-            f.writelines(lines)
+        self.saveQueue.put(player.name, player.toLine(self.playerStore.aspects))
+        self.PLAYERS.add(player)
+        self.NAMES.add(player.name)
+        self.TIMED_PLAYERS.pop(player.name, None)
         player.new = False
 
     def viewStats(self):
         player = self.player
-        print("--- Player Stats ---")
+        say("--- Player Stats ---")
         if player.currentHealth <= 0:
             player.currentHealth = 0
-            print(f"{player.name} the {player.species} is dead!")
+            say(f"{player.name} the {player.species} is dead!")
         else:
-            print(f"{player.name} the {player.species} is at {player.location.name}")
-            print(f"They are level {player.level} and have {player.gold} gold pieces")
-        print(f"Weapon: {player.weapon.name}, {min(player.weapon.damage)} to {max(player.weapon.damage)} damage")
-        print(f"Armor: {player.armor.name}, slows {player.armor.speedPenalty:.0%} and negates {player.armor.protection:.0%} of {DAMAGE_TYPE_INV[player.armor.protectionType]} damage")  
-        print(f"Health: {player.currentHealth}/{player.baseHealth} ({player.currentHealth/player.baseHealth:.0%})")
-        print(f"Speed: {player.currentSpeed}/{player.baseSpeed} ({player.currentSpeed/player.baseSpeed:.0%})")
-
-    def viewScoreboard(self):
-        if len(self.PLAYERS) == 0:
-            print("No players!")
+            say(f"{player.name} the {player.species} is at {player.location.name}")
+            say(f"They are level {player.level} and have {player.gold} gold pieces")
+            self.LEADERBOARD.refresh()
+            rank = self.LEADERBOARD.rank(player.name)
+            if rank:
+                say(f"They are ranked #{rank} of {len(self.LEADERBOARD)} on the scoreboard")
+        say(f"Weapon: {player.weapon.name}, {min(player.weapon.damage)} to {max(player.weapon.damage)} damage")
+        say(f"Armor: {player.armor.name}, slows {player.armor.speedPenalty:.0%} and negates {player.armor.protection:.0%} of {DAMAGE_TYPE_INV[player.armor.protectionType]} damage")  
+        say(f"Health: {player.currentHealth}/{player.baseHealth} ({player.currentHealth/player.baseHealth:.0%})")
+        say(f"Speed: {player.currentSpeed}/{player.baseSpeed} ({player.currentSpeed/player.baseSpeed:.0%})")
+
+    def playerPopulation(self) -> PlayerPopulation:
+        '''Every player, saved or waiting in the SaveQueue, in a compact PlayerPopulation. Saved rows are
+        read in one pass over the store; players already built are taken from the cache instead,
+        since only they can have changes that are not saved yet.'''
+        population = PlayerPopulation(self)
+        cache = dict(self.PLAYERS.cache)
+        with self.playerStore.lock: # The SaveQueue thread can't move rows while they are read
+            population.appendLines((line for line in self.playerStore.rows() if line.split(CSV_DELIM, 1)[0] not in cache), self.playerStore.aspects)
+        for player in cache.values():
+            population.append(player)
+        return population
+
+    def playerScores(self):
+        '''(name, level, exp, gold) of every player, for building the LEADERBOARD.'''
+        population = self.playerPopulation()
+        if population.staleRows:
+            say(f"WARNING: {population.staleRows} saved {plurify('players', population.staleRows)} left off the scoreboard, "
+                f"their location, armor or weapon is no longer in the catalogs!")
+        return zip(population.names, population.columns["level"], population.columns["exp"], population.columns["gold"])
+
+    def viewScoreboard(self, page: int = 1):
+        self.LEADERBOARD.refresh()
+        if len(self.LEADERBOARD) == 0:
+            say("No players!")
             return None
-        for player in self.PLAYERS:
-            print(f"{player.name} the {player.species} is at {player.location.name}. They are level {player.level}.")
+        for rank, name, level, exp, gold in self.LEADERBOARD.page(page, SCOREBOARD_SIZE):
+            try:
+                player = self.PLAYERS.get(name)
+            except CatalogError: # Saved with a location, armor or weapon the catalogs no longer have
+                player = None
+            if player is None: # No longer saved, so there is nothing to describe
+                continue
+            say(f"{rank}. {name} the {player.species} is at {player.location.name}. They are level {level} with {exp} exp and {gold} gold.")
+        remaining = len(self.LEADERBOARD) - page * SCOREBOARD_SIZE
+        if remaining > 0:
+            say(f"...and {remaining} more {plurify('players', remaining)}.")
 
+    # The game is a state machine. Each state is a menu method that returns the next state to run,
+    # or None to stop playing, and startGame loops over them so long sessions don't grow the stack.
     def startGame(self):
+        state = self.welcomeMenu
+        while state:
+            self.tick()
+            state = yield from state()
+
+    def welcomeMenu(self):
         player = self.player
         round = 1
         if(round == 1 and not player.new):
-            print(f"Welcome back to {player.location.name}, brave warrior.")
+            say(f"Welcome back to {player.location.name}, brave warrior.")
         elif(round == 1 and player.new):
-            print(f"Welcome to {player.location.name}, brave warrior.")
+            say(f"Welcome to {player.location.name}, brave warrior.")
         status = int(player.status)
         if(status == PLAYER_STATUS["sleeping"]):
-            print(f"You were sleeping {random.choice(PLACES_SLEEPING)}, but you just woke up.")
+            say(f"You were sleeping {self.rand.choice(PLACES_SLEEPING)}, but you just woke up.")
+            self.WORLD.cancel(player.name)
             player.status = PLAYER_STATUS["idle"]
             round += 1
-            self.idleMenu()
+            return self.idleMenu
         elif(status == PLAYER_STATUS["fighting"]):
-            print("You collapsed in the fight you were in!")
-            print("You wake up near where you left off.")
+            say("You collapsed in the fight you were in!")
+            say("You wake up near where you left off.")
             player.status = PLAYER_STATUS["idle"]
             round += 1
-            self.idleMenu()
+            return self.idleMenu
         elif(status == PLAYER_STATUS["resting"] or status == PLAYER_STATUS["idle"]):
+            self.WORLD.cancel(player.name)
+            player.status = PLAYER_STATUS["idle"]
             round += 1
-            self.idleMenu()
+            return self.idleMenu
         elif(status == PLAYER_STATUS["travelling"]):
-            print(f"You are on your way to {player.location.name}.")
+            say(f"You are on your way to {player.location.name}.")
             round += 1
-            self.travelMenu()
-            self.startGame()
+            yield from self.waitWhile(PLAYER_STATUS["travelling"])
+            say(f"You have arrived in {player.location.name}!")
+            return self.idleMenu
 
     def idleMenu(self):
         player = self.player
         alive = player.currentHealth > 0
         if not alive:
-            print(f"{player.name} has passed away! Cannot play with this character.")
+            say(f"{player.name} has passed away! Cannot play with this character.")
         else:
-            print(f"You have a couple of options on how to proceed: ")
-            fightPlace = random.choice(PLACES_FIGHT)
-            choice = getMenu(f"Go to the {fightPlace} of {player.location.name} to fight", f"Go to the markets of {player.location.name} to shop", f"Return to {player.location.name} to sleep {random.choice(PLACES_SLEEPING)}", f"Travel to a distant city")
+            say(f"You have a couple of options on how to proceed: ")
+            fightPlace = self.rand.choice(PLACES_FIGHT)
+            choice = yield from getMenu(f"Go to the {fightPlace} of {player.location.name} to fight", f"Go to the markets of {player.location.name} to shop", f"Return to {player.location.name} to sleep {self.rand.choice(PLACES_SLEEPING)}", f"Travel to a distant city")
             if choice == 1:
                 clear()
                 player.status = PLAYER_STATUS["fighting"]
-                self.fightMenu(fightPlace=fightPlace, round=1)
-                self.idleMenu()
+                return partial(self.fightMenu, fightPlace=fightPlace, round=1)
             elif choice == 2:
                 clear()
-                print(f"Welcome to the markets of {player.location.name}, {player.name}!")
-                print(f"There are many treasures here; just don't waste all your gold!")
-                self.marketMenu()
-                player.update()
-                self.idleMenu()
+                say(f"Welcome to the markets of {player.location.name}, {player.name}!")
+                say(f"There are many treasures here; just don't waste all your gold!")
+                return self.marketMenu
             elif choice == 3:
                 clear()
-                player.status = PLAYER_STATUS["sleeping"]
-                print(f"You decide to return to {player.location.name} for the night.")
-                if(userYesNo("Would you like to stop playing? (Y/N): ")):
+                self.goToSleep()
+                say(f"You decide to return to {player.location.name} for the night.")
+                if(yield from userYesNo("Would you like to stop playing? (Y/N): ")):
                     pass
                 else:
-                    self.startGame()
+                    say(f"You sleep through the night.")
+                    yield from self.waitWhile(PLAYER_STATUS["sleeping"])
+                    say(f"You wake up feeling refreshed! ({player.currentHealth}/{player.baseHealth} HP)")
+                    return self.idleMenu
             elif choice == 4:
                 clear()
-                self.travelMenu()
-                self.idleMenu()
+                yield from self.travelMenu()
+                return self.idleMenu
             else: #IE KeyboardInterrupt
                 pass
 
@@ -405,22 +1509,22 @@ class AdventureGame:
         wepItemsPrompt = []
         armorItems = []
         armorItemsPrompt = []
-        for wep in self.WEAPONS:
-            if wep.player and wep.market and wep != player.weapon:
+        for wep in self.MARKET_WEAPONS:
+            if wep != player.weapon:
                 wepItemsPrompt.append(f"{wep.cost} gold: {wep.name} ({wep.type}, {min(wep.damage)}-{max(wep.damage)} dmg)")
                 wepItems.append(wep)
-        for armor in self.ARMORS:
-            if armor.player and armor.market and armor != player.armor:
+        for armor in self.MARKET_ARMORS:
+            if armor != player.armor:
                 armorItemsPrompt.append(f"{armor.cost} gold: {armor.name} ({armor.protection:.0%} prot, -{armor.speedPenalty:.0%} speed)")
                 armorItems.append(armor)
-        print(f"Balance: {player.gold} gold")
-        choice = getMenu("Buy a new weapon", "Buy a new armor", "Buy a healing potion", "Leave the market")
+        say(f"Balance: {player.gold} gold")
+        choice = yield from getMenu("Buy a new weapon", "Buy a new armor", "Buy a healing potion", "Leave the market")
         if choice == 1:
             clear()
-            print(f"Balance: {player.gold} gold")
-            print(f"Current weapon: {player.weapon.name} ({min(player.weapon.damage)}-{max(player.weapon.damage)})")
-            print(f"What weapon would you like to buy?")
-            choiceWep = getMenu(*wepItemsPrompt)
+            say(f"Balance: {player.gold} gold")
+            say(f"Current weapon: {player.weapon.name} ({min(player.weapon.damage)}-{max(player.weapon.damage)})")
+            say(f"What weapon would you like to buy?")
+            choiceWep = yield from getMenu(*wepItemsPrompt)
             try:
                 choiceWep -= 1
             except TypeError:
@@ -429,16 +1533,16 @@ class AdventureGame:
                 if player.gold >= wepItems[choiceWep].cost:
                     player.weapon = wepItems[choiceWep]
                     player.gold -= wepItems[choiceWep].cost
-                    print(f"Good luck with your new {player.weapon.name}, brave warrior!")
+                    say(f"Good luck with your new {player.weapon.name}, brave warrior!")
                 elif choiceWep >= 0:
-                    print(f"You don't have enough gold for a new {wepItems[choiceWep].name}!")
-            self.marketMenu()
+                    say(f"You don't have enough gold for a new {wepItems[choiceWep].name}!")
+            return self.marketMenu
         elif choice == 2:
             clear()
-            print(f"Balance: {player.gold} gold")
-            print(f"Current armor: {player.armor.name} ({player.armor.protection:.0%} prot, -{player.armor.speedPenalty:.0%} speed)")
-            print(f"What armor would you like to buy?")
-            choiceArmor = getMenu(*armorItemsPrompt)
+            say(f"Balance: {player.gold} gold")
+            say(f"Current armor: {player.armor.name} ({player.armor.protection:.0%} prot, -{player.armor.speedPenalty:.0%} speed)")
+            say(f"What armor would you like to buy?")
+            choiceArmor = yield from getMenu(*armorItemsPrompt)
             try:
                 choiceArmor -= 1
             except TypeError:
@@ -447,48 +1551,53 @@ class AdventureGame:
                 if player.gold >= armorItems[choiceArmor].cost:
                     player.armor = armorItems[choiceArmor]
                     player.gold -= wepItems[choiceArmor].cost
-                    print(f"Good luck with your new {player.armor.name}, brave warrior!")
+                    say(f"Good luck with your new {player.armor.name}, brave warrior!")
                 elif choiceArmor >= 0:
-                    print(f"You don't have enough gold for a new {armorItems[choiceArmor].name}!")
-                self.marketMenu()
+                    say(f"You don't have enough gold for a new {armorItems[choiceArmor].name}!")
+                return self.marketMenu
+            player.update()
+            return self.idleMenu
         elif choice == 3:
             clear()
             if(player.currentHealth < player.baseHealth):
-                print(f"Balance: {player.gold} gold")
-                print(f"Health: {player.currentHealth}/{player.baseHealth} ({player.currentHealth/player.baseHealth:.0%})\n")
-                print(f"We will heal 1 health per 1 gold!")
-                healAmt = getValidUserInt(f"How much would you like to heal? (1-{player.baseHealth-player.currentHealth} HP): ", 1, player.baseHealth-player.currentHealth)
+                say(f"Balance: {player.gold} gold")
+                say(f"Health: {player.currentHealth}/{player.baseHealth} ({player.currentHealth/player.baseHealth:.0%})\n")
+                say(f"We will heal 1 health per 1 gold!")
+                healAmt = yield from getValidUserInt(f"How much would you like to heal? (1-{player.baseHealth-player.currentHealth} HP): ", 1, player.baseHealth-player.currentHealth)
                 if healAmt:
                     player.currentHealth += healAmt
                     player.gold -= healAmt
                     clear()
-                    print(f"You healed for {healAmt} HP!")
+                    say(f"You healed for {healAmt} HP!")
                 else:
                     clear()
-                    print(f"Healing cancelled!")
+                    say(f"Healing cancelled!")
             else:
                 clear()
-                print(f"You are already at full health! ({player.currentHealth}/{player.baseHealth})")
-            self.marketMenu()
+                say(f"You are already at full health! ({player.currentHealth}/{player.baseHealth})")
+            return self.marketMenu
         else: #ie leaves / KeyboardInterrupt
             clear()
-            print(f"You leave the markets of {player.location.name}.")
+            say(f"You leave the markets of {player.location.name}.")
+            player.update()
+            return self.idleMenu
 
     def fightMenu(self, fightPlace: str, round: int = 1):
         player = self.player
-        hostile = random.choice([creature for creature in self.CREATURES if not creature.friendly and creature.baseHealth <= player.baseHealth])
+        rand = self.rand.fight()
+        hostile = self.ENCOUNTERS.choose(player.baseHealth, player.location.name, fightPlace, rand)
         hostileHP = hostile.baseHealth
         hostileArmor = hostile.armor
         hostileWep = hostile.weapon
-        distance = random.randint(1, 60)
+        distance = startDistance(rand)
         clear()
         if(round == 1):
-            print(f"You decide to go to the {fightPlace} to fight off the hordes that surely exist there.")
-            print(f"In fact, before you could even get to the {fightPlace}, a crazy looking {hostile.species} appeared!")
-            print(f"Stay away from its {random.choice(ADJECTIVES_BAD)} {hostileWep.name}!")
+            say(f"You decide to go to the {fightPlace} to fight off the hordes that surely exist there.")
+            say(f"In fact, before you could even get to the {fightPlace}, a crazy looking {hostile.species} appeared!")
+            say(f"Stay away from its {self.rand.choice(ADJECTIVES_BAD)} {hostileWep.name}!")
         else:
-            print(f"Roaming the {fightPlace}, you come across a hostile {hostile.species}!")
-            print(f"With its {random.choice(ADJECTIVES_BAD)} {hostileWep.name} ready, it approaches you!")
+            say(f"Roaming the {fightPlace}, you come across a hostile {hostile.species}!")
+            say(f"With its {self.rand.choice(ADJECTIVES_BAD)} {hostileWep.name} ready, it approaches you!")
         alive = player.currentHealth > 0
         while(hostileHP > 0 and alive):
             distance = int(distance)
@@ -501,17 +1610,17 @@ class AdventureGame:
             sideWidth = max(len(player1Str), len(player2Str), len(player3Str))
             midWidth = 6
             midStr = '|'*midWidth
-            print(f"{'~'*sideWidth} Fight! {'~'*sideWidth}")
-            print(f"{player1Str:<{sideWidth}} {midStr:^{midWidth}} {hostile1Str:<{sideWidth}}")
-            print(f"{player2Str:<{sideWidth}} {midStr:^{midWidth}} {hostile2Str:<{sideWidth}}")
-            print(f"{player3Str:<{sideWidth}} {midStr:^{midWidth}} {hostile3Str:<{sideWidth}}")
+            say(f"{'~'*sideWidth} Fight! {'~'*sideWidth}",
+                f"{player1Str:<{sideWidth}} {midStr:^{midWidth}} {hostile1Str:<{sideWidth}}",
+                f"{player2Str:<{sideWidth}} {midStr:^{midWidth}} {hostile2Str:<{sideWidth}}",
+                f"{player3Str:<{sideWidth}} {midStr:^{midWidth}} {hostile3Str:<{sideWidth}}", sep="\n")
             withinRange = player.weapon.range >= distance
             if withinRange:
                 message = "within"
             else: 
                 message = "not within"
             meters = plurify("meter", distance)
-            print(f"It's {distance:d} {meters} away! You are {message} range!")
+            say(f"It's {distance:d} {meters} away! You are {message} range!")
             retreated = False
             approached = False
             waited = False
@@ -521,41 +1630,34 @@ class AdventureGame:
             failedEscape = False
             # PLAYER TURN
             if withinRange:
-                choice = getMenu(f"Attack the {hostile.species} with your {player.weapon.name}!", f"Retreat and consider your options")
+                choice = yield from getMenu(f"Attack the {hostile.species} with your {player.weapon.name}!", f"Retreat and consider your options")
                 if choice == 1:
                     clear()
                     attacked = True
-                    damageDealt = random.choice(player.weapon.damage)
-                    if(player.weapon.damageType == hostile.armor.protectionType):
-                        damageDealt = damageDealt - math.ceil(hostile.armor.protection * damageDealt)
+                    damageDealt = attackDamage(player.weapon, hostile.armor, rand)
                     hostileHP -= damageDealt
-                    print(f"You use all your might and unleash your {player.weapon.name} against {hostile.name}!")
-                    print(f"You dealt {damageDealt} damage!")
+                    say(f"You use all your might and unleash your {player.weapon.name} against {hostile.name}!")
+                    say(f"You dealt {damageDealt} damage!")
                     if hostileHP <= 0: ### WON FIGHT
                         hostileHP = 0
-                        goldDrop = random.randint(int(hostile.baseHealth/4), hostile.baseHealth)
-                        expDrop = random.randint(int(hostile.baseHealth/2), hostile.baseHealth)
+                        goldDrop, expDrop = fightRewards(hostile, rand)
                         player.gold += goldDrop
                         player.exp += expDrop
-                        print(f"You killed {hostile.name} the {hostile.species}!")
+                        say(f"You killed {hostile.name} the {hostile.species}!")
                         goldPlusMsg = ""
                         if goldDrop > 0:
                             goldPlusMsg = f" ({player.gold})"
-                        print(f"{goldDrop} gold flies out of their dead carcass!{goldPlusMsg}")
-                        print(f"You won the fight!")
-                        itemDrops = []
-                        if(hostile.weapon.drop and hostile.weapon.player and hostile.weapon != player.weapon and rng(hostile.weapon.dropChance)):
-                            itemDrops.append(hostile.weapon)
-                        if(hostile.armor.drop and hostile.armor.player and hostile.armor != player.armor and rng(hostile.armor.dropChance)):
-                            itemDrops.append(hostile.armor)
+                        say(f"{goldDrop} gold flies out of their dead carcass!{goldPlusMsg}")
+                        say(f"You won the fight!")
+                        itemDrops = lootDrops(hostile, player.weapon, player.armor, rand)
                         for item in itemDrops:
                             if type(item) is Weapon:
-                                print(f"It dropped its {hostile.weapon.name} ({min(hostile.weapon.damage)}-{max(hostile.weapon.damage)})!")
-                                if userYesNo(f"Would you like to replace your weapon with it? (Y/N): "):
+                                say(f"It dropped its {hostile.weapon.name} ({min(hostile.weapon.damage)}-{max(hostile.weapon.damage)})!")
+                                if (yield from userYesNo(f"Would you like to replace your weapon with it? (Y/N): ")):
                                     player.weapon = hostile.weapon
                             elif type(item) is Armor:
-                                print(f"It dropped its {hostile.armor.name} ({hostile.armor.protection}% prot, {hostile.armor.speedPenalty}% speed penalty)!")
-                                if userYesNo("Would you like to replace your armor with it? (Y/N): "):
+                                say(f"It dropped its {hostile.armor.name} ({hostile.armor.protection}% prot, {hostile.armor.speedPenalty}% speed penalty)!")
+                                if (yield from userYesNo("Would you like to replace your armor with it? (Y/N): ")):
                                     player.armor = hostile.armor
                         player.update()
                         break
@@ -563,114 +1665,111 @@ class AdventureGame:
                     clear()
                     retreated = True
                     oldDist = distance
-                    hostileApproach = random.randint(int(hostile.baseSpeed/2), hostile.baseSpeed)
-                    distance += player.currentSpeed - hostileApproach
-                    if distance < 1:
-                        distance = 1
+                    distance = retreatDistance(distance, player.currentSpeed, hostile, rand)
                     if(distance > oldDist):
-                        print(f"You retreat slightly!")
+                        say(f"You retreat slightly!")
                     else:
-                        print(f"You try to retreat, but the {hostile.species} is faster than you!")
+                        say(f"You try to retreat, but the {hostile.species} is faster than you!")
                 else:
                     hostileHP = -1
                     break
             else: # Not within range
                 if(player.currentHealth < player.baseHealth):
-                    choice = getMenu(f"Close the distance to try to attack the {hostile.species}", f"Wait for the {hostile.species} to approach", "Escape back to safety", f"Quickly patch your wounds (+{min(2, player.baseHealth-player.currentHealth)} HP)")
+                    choice = yield from getMenu(f"Close the distance to try to attack the {hostile.species}", f"Wait for the {hostile.species} to approach", "Escape back to safety", f"Quickly patch your wounds (+{min(HEAL_PER_TURN, player.baseHealth-player.currentHealth)} HP)")
                 else:
-                    choice = getMenu(f"Close the distance to try to attack the {hostile.species}", f"Wait for the {hostile.species} to approach", "Escape back to safety")
+                    choice = yield from getMenu(f"Close the distance to try to attack the {hostile.species}", f"Wait for the {hostile.species} to approach", "Escape back to safety")
                 if choice == 1:
-                    distance = distance - player.currentSpeed
-                    if distance < 1:
-                        distance = 1
+                    distance = approachDistance(distance, player.currentSpeed)
                     approached = True
                     meters = plurify("meter", distance)
                     clear()
-                    print(f"You closed the distance!")
+                    say(f"You closed the distance!")
                 elif choice == 2:
                     waited = True
                     clear()
-                    print(f"You waited for the {hostile.species} to close the distance!")
+                    say(f"You waited for the {hostile.species} to close the distance!")
                 elif choice == 3:
-                    if(rng(60) or player.currentSpeed > (hostile.baseSpeed + 20) or distance > player.currentSpeed-(hostile.baseSpeed+20)):
+                    if(escapeSucceeds(distance, player.currentSpeed, hostile, rand)):
                         escaped = True
                         clear()
-                        print(f"You run away as fast as you can, escaping {hostile.name} the {hostile.species}!")
+                        say(f"You run away as fast as you can, escaping {hostile.name} the {hostile.species}!")
                         hostileHP = -1
                         break
                     else:
                         failedEscape = True
-                        distance += random.randint(0-int(hostile.baseSpeed/2), hostile.baseSpeed)
+                        distance = failedEscapeDistance(distance, hostile, rand)
                         clear()
-                        print(f"You try to run away, but the {hostile.species} is too fast to escape that easily!")
+                        say(f"You try to run away, but the {hostile.species} is too fast to escape that easily!")
                 elif choice == 4:
                     clear()
                     healed = True
-                    print(f"You chose to patch your wounds for {min(2, player.baseHealth-player.currentHealth)} HP!")
-                    player.currentHealth += min(2, player.baseHealth-player.currentHealth)
+                    say(f"You chose to patch your wounds for {min(HEAL_PER_TURN, player.baseHealth-player.currentHealth)} HP!")
+                    player.currentHealth += min(HEAL_PER_TURN, player.baseHealth-player.currentHealth)
                 else:
                     hostileHP = -1
                     break
             # HOSTILE TURN
             withinRange = hostile.weapon.range >= distance
             if(not withinRange):
-                if(attacked or approached):
-                    distance -= random.randint(int(hostile.baseSpeed*0.75), hostile.baseSpeed)
-                elif(failedEscape or retreated):
-                    distance -= random.randint(int(hostile.baseSpeed*0.75), hostile.baseSpeed)
-                elif(healed or waited):
-                    distance -= random.randint(hostile.baseSpeed, hostile.baseSpeed*2)
-                if(distance < 1):
-                    distance = 1
-                distance = int(distance)
-                print(f"The {hostile.species} closes the distance to {distance} meters")
+                distance = hostileApproachDistance(distance, hostile, healed or waited, rand)
+                say(f"The {hostile.species} closes the distance to {distance} meters")
             withinRange = hostile.weapon.range >= distance
             if(withinRange and hostileHP > 0):
                 if(attacked or failedEscape or healed or retreated):
-                    damageDealt = player.doDamage(random.choice(hostile.weapon.damage), hostile.weapon.damageType)
-                    print(f"The {hostile.species} angrily attacks you with their {hostile.weapon.name}!")
-                    print(f"They dealt {damageDealt} damage!")
+                    damageDealt = player.doDamage(rand.choice(hostile.weapon.damage), hostile.weapon.damageType)
+                    say(f"The {hostile.species} angrily attacks you with their {hostile.weapon.name}!")
+                    say(f"They dealt {damageDealt} damage!")
                 elif(escaped):
-                    print(f"The {hostile.species} tries to attack you once more with their {hostile.weapon.name}, but you're already gone!")
+                    say(f"The {hostile.species} tries to attack you once more with their {hostile.weapon.name}, but you're already gone!")
                     hostileHP = -1
                 elif(approached):
-                    print(f"The {hostile.species} approaches you as well!")
+                    say(f"The {hostile.species} approaches you as well!")
                     pass
             else:
                 if(attacked or approached):
-                    print(f"The {hostile.species} can't reach you with their {hostile.weapon.name}, but they are closing range rapidly!")
+                    say(f"The {hostile.species} can't reach you with their {hostile.weapon.name}, but they are closing range rapidly!")
                 elif(failedEscape or retreated):
-                    print(f"Luckily, the {hostile.species} is still too far away to attack you! They are gaining still!")
+                    say(f"Luckily, the {hostile.species} is still too far away to attack you! They are gaining still!")
                 elif(healed or waited):
-                    print(f"Fortunately, the {hostile.species} is still too far away to attack you! However, they are rapidly gaining!")
+                    say(f"Fortunately, the {hostile.species} is still too far away to attack you! However, they are rapidly gaining!")
                 elif(escaped):
-                    print(f"You escape {hostile.name} easily!")
+                    say(f"You escape {hostile.name} easily!")
                     hostileHP = -1
             if player.currentHealth <= 0:
                 alive = False
-                print(f"You have died!")
-                print(f"Game Over.")
-        if(alive and userYesNo(f"Would you like to continue fighting at {fightPlace} of {player.location.name}? (Y/N): ") and alive):
-            self.fightMenu(fightPlace=fightPlace, round=round+1)
+                say(f"You have died!")
+                say(f"Game Over.")
+        if(alive and (yield from userYesNo(f"Would you like to continue fighting at {fightPlace} of {player.location.name}? (Y/N): ")) and alive):
+            return partial(self.fightMenu, fightPlace=fightPlace, round=round+1)
         else:
             clear()
-            print(f"You've returned to {player.location.name} after a long day of fighting.")
-            pass
+            say(f"You've returned to {player.location.name} after a long day of fighting.")
+            return self.idleMenu
 
     def travelMenu(self):
-        print(f"There are many cities available! Where would you like to go?")
-        plpos = self.player.location.position
-        locmenu = [f"{location.name} in {location.country}, {math.sqrt((plpos[0] - location.position[0])**2+(plpos[1] - location.position[1])**2):.1f} miles away" for location in self.LOCATIONS if location != self.player.location]
-        choice = getMenu(*locmenu)
+        player = self.player
+        say(f"There are many cities available! Where would you like to go?")
+        destinations = self.MAP.nearest(player.location.position, TRAVEL_MENU_SIZE, exclude=player.location)
+        locmenu = [f"{location.name} in {location.country}, {distance:.1f} miles away" for distance, location in destinations]
+        choice = yield from getMenu(*locmenu)
         if choice:
-            chosen_loc = self.LOCATIONS[choice]
+            chosen_loc = destinations[choice - 1][1]
             clear()
-            print(f"{chosen_loc.name} is a beautiful city! Good luck there, brave warrior!")
-            self.player.location = chosen_loc
+            route = self.ROUTES.route(player.location, chosen_loc)
+            if route and len(route[1]) > 2:
+                say(f"The road takes you through {', '.join(location.name for location in route[1][1:-1])}.")
+            minutes = self.depart(chosen_loc, route[0] if route else destinations[choice - 1][0])
+            say(f"The journey to {chosen_loc.name} takes {minutes / 60:.1f} hours.")
+            yield from self.waitWhile(PLAYER_STATUS["travelling"])
+            say(f"{chosen_loc.name} is a beautiful city! Good luck there, brave warrior!")
         else:
-            print(f"Cancelled travelling!")
+            say(f"Cancelled travelling!")
 
 class Player:
+    __slots__ = ("new", "name", "species", "level", "exp", "gold", "baseHealth", "currentHealth", "baseSpeed", "currentSpeed",
+                 "location", "armor", "weapon", "status", "leaderboard")
+    REFERENCE_FIELDS = ("location", "armor", "weapon") # Saved by name
+
     def __init__(self):
         self.new = True
         self.name = ""
@@ -686,16 +1785,16 @@ class Player:
         self.armor = None
         self.weapon = None
         self.status = PLAYER_STATUS["sleeping"]
+        self.leaderboard = None # Told about score changes by update()
 
     def loadFromLine(self, line: str, aspects: str) -> None:
         '''Load player from a line in FILE_PLAYERS'''
         lline = line.strip(",\n").split(CSV_DELIM)
         genDict = {aspects[i]: lline[i] for i in range(len(aspects))}
         try:
-            self.generator = genDict
             self.new = False
             self.name = genDict['name']
-            self.species = genDict['species']
+            self.species = intern(genDict['species'])
             self.level = int(genDict['level'])
             self.exp = int(genDict['exp'])
             self.gold = int(genDict['gold'])
@@ -706,13 +1805,16 @@ class Player:
             self.location = genDict['location']
             self.armor = genDict['armor']
             self.weapon = genDict['weapon']
-            self.status = genDict['status']
+            self.status = int(genDict['status'])
         except KeyError:
-            print("WARNING: Error loading players!")
+            say("WARNING: Error loading players!")
+
+    def toLine(self, aspects: list) -> str:
+        '''Row for FILE_PLAYERS with the fields in aspects order.'''
+        return "".join(f"{getattr(self, aspect).name if aspect in self.REFERENCE_FIELDS else getattr(self, aspect)}," for aspect in aspects) + "\n"
 
     def doDamage(self, damage: int, damageType: int):
-        if(damageType == self.armor.protectionType):
-            damage = math.ceil(damage - (self.armor.protection * damage))
+        damage = mitigateDamage(damage, damageType, self.armor)
         self.currentHealth -= damage
         if(self.currentHealth < 0):
             self.currentHealth = 0
@@ -720,24 +1822,9 @@ class Player:
 
     def update(self):
         self.updateSpeed()
-        self.updateGenerator()
         self.updateLevel()
-
-    def updateGenerator(self):
-        genDict = self.generator
-        genDict['name'] = str(self.name)
-        genDict['species'] = str(self.species)
-        genDict['level'] = int(self.level)
-        genDict['exp'] = int(self.exp)
-        genDict['gold'] = int(self.gold)
-        genDict['baseHealth'] = int(self.baseHealth)
-        genDict['currentHealth'] = int(self.currentHealth)
-        genDict['baseSpeed'] = int(self.baseSpeed)
-        genDict['currentSpeed'] = int(self.currentSpeed)
-        genDict['location'] = self.location.name
-        genDict['armor'] = self.armor.name
-        genDict['weapon'] = self.weapon.name
-        genDict['status'] = self.status
+        if self.leaderboard is not None:
+            self.leaderboard.update(self)
 
     def updateSpeed(self):
         '''Refresh speed'''
@@ -748,82 +1835,98 @@ class Player:
         oldLevel = self.level
         self.level = math.floor((self.exp+25) / 25)
         if(self.level > oldLevel):
-            print(f"You levelled up to level {self.level} and gained +1 max HP!")
+            say(f"You levelled up to level {self.level} and gained +1 max HP!")
             self.baseHealth += 1
         else:
             self.level = oldLevel
 
-class Creature:
-    def __init__(self, line: str, aspects: str):
-        lline = line.strip(",\n").split(CSV_DELIM)
-        genDict = {aspects[i]: lline[i] for i in range(len(aspects))}
-        try:
-            self.generator = genDict
-            self.name = genDict['name']
-            self.species = genDict['species']
-            self.baseHealth = int(genDict['baseHealth'])
-            self.baseSpeed = int(genDict['baseSpeed'])
-            self.armor = genDict['armor']
-            self.weapon = genDict['weapon']
-            self.friendly = INTERPRET_BOOL[genDict['friendly']]
-        except KeyError:
-            print("WARNING: Error loading creatures!")
-            return None
+class CatalogItem:
+    '''A row of a bin/ catalog. Subclasses declare their columns in SCHEMA and are built by readCatalog.'''
+    __slots__ = ()
+    SCHEMA: ClassVar[tuple] = ()
 
-class Location:
-    def __init__(self, line: str, aspects: str):
-        lline = line.strip(",\n").split(CSV_DELIM)
-        genDict = {aspects[i]: lline[i] for i in range(len(aspects))}
-        try:
-            self.generator = genDict
-            self.name = genDict['name']
-            self.country = genDict['country']
-            # Convert position into tuple of ints
-            posList = genDict['position'].split(CSV_TUP_DELIM)
-            self.position = tuple([int(x) for x in posList])
-            self.starter = INTERPRET_BOOL[genDict['starter']]
-        except KeyError:
-            print("WARNING: Error loading locations!")
-            return None
+    def __init__(self, **fields) -> None:
+        for attribute, value in fields.items():
+            setattr(self, attribute, value)
 
-class Armor:
-    def __init__(self, line: str, aspects: str):
-        lline = line.strip(",\n").split(CSV_DELIM)
-        genDict = {aspects[i]: lline[i] for i in range(len(aspects))}
-        try:
-            self.generator = genDict
-            self.name = genDict['name']
-            self.speedPenalty = float(genDict['speedPenalty'])
-            self.protection = float(genDict['protection'])
-            self.protectionType = DAMAGE_TYPE[genDict['protectionType']]
-            self.starter = INTERPRET_BOOL[genDict['starter']]
-            self.player = INTERPRET_BOOL[genDict['player']]
-            self.market = INTERPRET_BOOL[genDict['market']]
-            self.cost = int(genDict['cost'])
-            self.drop = INTERPRET_BOOL[genDict['drop']]
-            self.dropChance = int(genDict['dropChance'])
-        except KeyError:
-            print("WARNING: Error loading armors!")
-            return None
+    @classmethod
+    def fromValues(cls, values):
+        '''Build an item from converted values in SCHEMA order.'''
+        item = cls.__new__(cls)
+        for field, value in zip(cls.SCHEMA, values):
+            setattr(item, field.attribute, value)
+        return item
 
-class Weapon:
-    def __init__(self, line: str, aspects: str):
-        lline = line.strip("\n").split(CSV_DELIM)
-        genDict = {aspects[i]: lline[i] for i in range(len(aspects))}
-        try:
-            self.generator = genDict
-            self.name = genDict['name']
-            self.type = genDict['type']
-            self.range = int(genDict['range'])
-            bounds = [int(x) for x in genDict['damageRange'].split(CSV_TUP_DELIM)]
-            self.damage = range(bounds[0], bounds[1]+1)
-            self.damageType = DAMAGE_TYPE[genDict['damageType']]
-            self.starter = INTERPRET_BOOL[genDict['starter']]
-            self.player = INTERPRET_BOOL[genDict['player']]
-            self.market = INTERPRET_BOOL[genDict['market']]
-            self.cost = int(genDict['cost'])
-            self.drop = INTERPRET_BOOL[genDict['drop']]
-            self.dropChance = int(genDict['dropChance'])
-        except KeyError:
-            print("WARNING: Error loading weapons!")
-            return None
\ No newline at end of file
+    def snapshotValues(self) -> tuple:
+        '''Attribute values in __slots__ order, as plain values marshal can store.'''
+        return tuple(getattr(self, attribute) for attribute in self.__slots__)
+
+    @classmethod
+    def fromSnapshot(cls, values: tuple):
+        '''Inverse of snapshotValues. Subclasses unpack their slots directly, which is several times faster.'''
+        item = cls.__new__(cls)
+        for attribute, value in zip(cls.__slots__, values):
+            setattr(item, attribute, value)
+        return item
+
+class Creature(CatalogItem):
+    __slots__ = ("name", "species", "baseHealth", "baseSpeed", "armor", "weapon", "friendly")
+    # armor and weapon are names here; AdventureGame resolves them through its registries
+    SCHEMA = (Field("name"), Field("species", intern), Field("baseHealth", int), Field("baseSpeed", int),
+              Field("armor"), Field("weapon"), Field("friendly", INTERPRET_BOOL))
+
+    def snapshotValues(self) -> tuple:
+        return (self.name, self.species, self.baseHealth, self.baseSpeed, self.armor.name, self.weapon.name, self.friendly)
+
+    @classmethod
+    def fromSnapshot(cls, values: tuple):
+        item = cls.__new__(cls)
+        item.name, item.species, item.baseHealth, item.baseSpeed, item.armor, item.weapon, item.friendly = values
+        return item
+
+class Location(CatalogItem):
+    __slots__ = ("name", "country", "position", "starter")
+    SCHEMA = (Field("name"), Field("country"), Field("position", intTuple), Field("starter", INTERPRET_BOOL))
+
+    @classmethod
+    def fromSnapshot(cls, values: tuple):
+        item = cls.__new__(cls)
+        item.name, item.country, item.position, item.starter = values
+        return item
+
+class Armor(CatalogItem):
+    __slots__ = ("name", "speedPenalty", "protection", "protectionType", "starter", "player", "market", "cost", "drop", "dropChance")
+    SCHEMA = (Field("name"), Field("speedPenalty", float), Field("protection", float), Field("protectionType", DAMAGE_TYPE),
+              Field("starter", INTERPRET_BOOL), Field("player", INTERPRET_BOOL), Field("market", INTERPRET_BOOL),
+              Field("cost", int), Field("drop", INTERPRET_BOOL), Field("dropChance", int))
+
+    @classmethod
+    def fromSnapshot(cls, values: tuple):
+        item = cls.__new__(cls)
+        (item.name, item.speedPenalty, item.protection, item.protectionType, item.starter, item.player, item.market,
+         item.cost, item.drop, item.dropChance) = values
+        return item
+
+class Weapon(CatalogItem):
+    __slots__ = ("name", "type", "range", "damage", "damageType", "starter", "player", "market", "cost", "drop", "dropChance")
+    SCHEMA = (Field("name"), Field("type"), Field("range", int), Field("damageRange", intRange, "damage"), Field("damageType", DAMAGE_TYPE),
+              Field("starter", INTERPRET_BOOL), Field("player", INTERPRET_BOOL), Field("market", INTERPRET_BOOL),
+              Field("cost", int), Field("drop", INTERPRET_BOOL), Field("dropChance", int))
+
+    def snapshotValues(self) -> tuple:
+        return tuple((self.damage.start, self.damage.stop) if attribute == "damage" else getattr(self, attribute) for attribute in self.__slots__)
+
+    @classmethod
+    def fromSnapshot(cls, values: tuple):
+        item = cls.__new__(cls)
+        (item.name, item.type, item.range, damage, item.damageType, item.starter, item.player, item.market,
+         item.cost, item.drop, item.dropChance) = values
+        item.damage = range(*damage)
+        return item
+
+# Hot paths metrics.enable() times; nothing is wrapped unless ADVENTURE_METRICS is set
+metrics.register(AdventureGame, "loadCatalogs", "restoreCatalogs", "fightMenu", "marketMenu", "savePlayer", "tick")
+metrics.register(PlayerStore, "saveMany")
+metrics.register(SqlitePlayerStore, "saveMany")
+metrics.register(SaveQueue, "flush")
+metrics.configureFromEnvironment()
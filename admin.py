@@ -0,0 +1,223 @@
+'''Bulk edits of the saved players, in one streaming pass over bin/players.csv.
+
+Stages run in the order given on the command line. Filters (--where) choose the rows the following
+stages change; the rest pass through untouched. The file is read and written a line at a time, so
+memory use doesn't grow with the file, and the result replaces the old file atomically. Dead rows
+left by the game's saves are dropped on the way, as PlayerStore.compact() would, and rows saved in an
+older layout are upgraded to the current one (see migrations.py).
+
+Stop the game first: a running game keeps the byte offsets of every row and would write over the new file.
+
+python admin.py --where currentHealth<=0 --revive --dry-run
+python admin.py --scale gold=0.5 --relocate-missing Wolfshore --rename-item "Long Sword=Longsword"
+'''
+import argparse
+import os
+import re
+import sys
+import time
+
+import AdventureGame
+from AdventureGame import CSV_DELIM, PLAYER_STATUS, PlayerPopulation, PlayerStore
+from migrations import RowUpgrader, SchemaError, parseSchemaLine, readLayout, schemaLine
+
+CONDITION = re.compile(r"^(\w+)\s*(<=|>=|!=|=|<|>)\s*(.*)$")
+OPERATORS = {"=": lambda a, b: a == b, "!=": lambda a, b: a != b, "<": lambda a, b: a < b,
+             "<=": lambda a, b: a <= b, ">": lambda a, b: a > b, ">=": lambda a, b: a >= b}
+
+class StageList(argparse.Action):
+    '''Collects every stage option into one list, keeping the command line order.'''
+    def __call__(self, parser, namespace, values, option_string=None):
+        stages = getattr(namespace, "stages", None) or []
+        stages.append((self.dest, values))
+        namespace.stages = stages
+
+class Catalogs:
+    '''Names of the items players can refer to, for checking stage arguments.'''
+    def __init__(self) -> None:
+        catalogs = AdventureGame.readCatalogs("locations", "armors", "weapons")
+        self.location, self.armor, self.weapon = catalogs["locations"], catalogs["armors"], catalogs["weapons"]
+        self.starterLocation = next((item.name for item in self.location if item.starter), None)
+
+    def check(self, field: str, name: str) -> None:
+        if field in PlayerPopulation.REFERENCE_FIELDS and name not in getattr(self, field):
+            raise SystemExit(f"Unknown {field} '{name}'!")
+
+def fieldValue(field: str, text: str):
+    return int(text) if field in PlayerPopulation.INT_FIELDS else text
+
+def argumentValue(field: str, text: str):
+    try:
+        return fieldValue(field, text)
+    except ValueError:
+        raise SystemExit(f"{field} is a number field, not '{text}'!")
+
+def buildStages(stages: list, aspects: list, catalogs: Catalogs) -> list:
+    '''Turn (option, argument) pairs into functions taking a row dict and returning it (changed or not), or None to delete it.
+    Every --where applies to all the stages after it.'''
+    built = []
+    conditions = []
+    def checkField(field: str) -> str:
+        if field not in aspects:
+            raise SystemExit(f"Unknown player field '{field}'! Fields are: {', '.join(aspects)}")
+        return field
+    for option, argument in stages:
+        if option == "where":
+            match = CONDITION.match(argument)
+            if not match:
+                raise SystemExit(f"--where needs field, operator and value, such as gold>100, not '{argument}'!")
+            field, op, value = match.groups()
+            conditions = conditions + [(checkField(field), op, argumentValue(field, value))]
+            continue
+        when = list(conditions)
+        def applies(row: dict, when=when) -> bool:
+            return all(OPERATORS[op](fieldValue(field, row[field]), value) for field, op, value in when)
+        if option == "set":
+            field, _, value = argument.partition("=")
+            checkField(field)
+            catalogs.check(field, value)
+            argumentValue(field, value)
+            def stage(row, field=field, value=value, applies=applies):
+                if applies(row):
+                    row[field] = value
+                return row
+        elif option == "scale":
+            field, _, factor = argument.partition("=")
+            if checkField(field) not in PlayerPopulation.INT_FIELDS:
+                raise SystemExit(f"Can only --scale number fields, not '{field}'!")
+            try:
+                factor = float(factor)
+            except ValueError:
+                raise SystemExit(f"--scale needs FIELD=FACTOR, such as gold=0.5, not '{argument}'!")
+            def stage(row, field=field, factor=factor, applies=applies):
+                if applies(row):
+                    row[field] = str(round(int(row[field]) * factor))
+                return row
+        elif option == "revive":
+            def stage(row, applies=applies):
+                if applies(row) and int(row["currentHealth"]) <= 0:
+                    row["currentHealth"] = row["baseHealth"]
+                    row["status"] = str(PLAYER_STATUS["idle"])
+                return row
+        elif option == "relocate_missing":
+            destination = argument or catalogs.starterLocation
+            catalogs.check("location", destination)
+            def stage(row, destination=destination, applies=applies):
+                if applies(row) and row["location"] not in catalogs.location:
+                    row["location"] = destination
+                return row
+        elif option == "rename_item":
+            old, _, new = argument.partition("=")
+            fields = [field for field in ("armor", "weapon", "location") if old in getattr(catalogs, field) or new in getattr(catalogs, field)]
+            if not new or not fields:
+                raise SystemExit(f"--rename-item needs OLD=NEW naming an armor, weapon or location, not '{argument}'!")
+            def stage(row, old=old, new=new, fields=fields, applies=applies):
+                if applies(row):
+                    for field in fields:
+                        if row[field] == old:
+                            row[field] = new
+                return row
+        elif option == "delete":
+            def stage(row, applies=applies):
+                return None if applies(row) else row
+        built.append(stage)
+    return built
+
+def runPipeline(path: str, stages: list, dryRun: bool = False, diffLimit: int = 20, out=print,
+                defaultPath: str = AdventureGame.FILE_DEFAULT_PLAYERS) -> dict:
+    '''Stream path through the stages. Unless dryRun, the result atomically replaces path. Returns counts and timings.'''
+    if os.path.exists(path + ".journal"):
+        raise SystemExit(f"{path} has an unfinished save journal. Start and close the game once to apply it first.")
+    report = {"rows": 0, "changed": 0, "deleted": 0, "upgraded": 0, "dead": 0, "skipped": 0, "bytes": os.path.getsize(path)}
+    startTime = time.perf_counter()
+    tempPath = f"{path}.{os.getpid()}.tmp"
+    shown = 0
+    try:
+        with open(path, 'r', newline='') as src, open(os.devnull if dryRun else tempPath, 'w', newline='') as dst:
+            version, aspects = readLayout(defaultPath)
+            header = src.readline()
+            headerAspects = header.strip(",\r\n").split(CSV_DELIM)
+            dst.write(header if headerAspects == aspects else "".join(f"{aspect}," for aspect in aspects) + "\n")
+            dst.write(schemaLine(version)) # Everything written is in the current layout
+            layout, upgrader = (1, headerAspects), None
+            pipeline = buildStages(stages, aspects, Catalogs())
+            for line in src:
+                if not line.endswith("\n"):
+                    continue # A torn row, as PlayerStore.buildIndex sees them
+                if line.startswith(PlayerStore.DEAD_MARKER.decode()):
+                    report["dead"] += 1
+                    continue
+                if line.startswith("#"):
+                    if parseSchemaLine(line, headerAspects):
+                        layout, upgrader = parseSchemaLine(line, headerAspects), None
+                    else:
+                        dst.write(line)
+                    continue
+                if len(line.strip(",\r\n").split(CSV_DELIM)) != len(layout[1]):
+                    report["skipped"] += 1
+                    dst.write(line)
+                    continue
+                upgrader = upgrader or RowUpgrader(*layout, version, aspects)
+                report["rows"] += 1
+                ending = line[len(line.rstrip("\r\n")):]
+                upgraded = upgrader(line).rstrip("\r\n") + ending # Stages are diffed against this, not the old layout
+                if upgraded != line:
+                    report["upgraded"] += 1
+                row = dict(zip(aspects, upgraded.strip(",\r\n").split(CSV_DELIM)))
+                for stage in pipeline:
+                    row = stage(row)
+                    if row is None:
+                        break
+                newLine = None if row is None else "".join(f"{row[aspect]}," for aspect in aspects) + ending
+                if newLine != upgraded:
+                    report["deleted" if newLine is None else "changed"] += 1
+                    if dryRun and shown < diffLimit:
+                        shown += 1
+                        out(f"- {upgraded.rstrip()}")
+                        if newLine is not None:
+                            out(f"+ {newLine.rstrip()}")
+                if newLine is not None:
+                    dst.write(newLine)
+            if not dryRun:
+                dst.flush()
+                os.fsync(dst.fileno())
+        if not dryRun:
+            os.replace(tempPath, path)
+    except BaseException:
+        if not dryRun and os.path.exists(tempPath):
+            os.remove(tempPath) # The old file is untouched
+        raise
+    report["seconds"] = time.perf_counter() - startTime
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Filter and change many saved players at once, in one pass over the player file.")
+    parser.add_argument("--file", default=AdventureGame.FILE_PLAYERS)
+    parser.add_argument("--default", default=AdventureGame.FILE_DEFAULT_PLAYERS, help="the file naming the current fields and version")
+    parser.add_argument("--where", action=StageList, metavar="FIELD<OP>VALUE", help="only change rows where this holds (=, !=, <, <=, >, >=); applies to the stages after it")
+    parser.add_argument("--set", action=StageList, metavar="FIELD=VALUE")
+    parser.add_argument("--scale", action=StageList, metavar="FIELD=FACTOR", help="multiply a number field, e.g. gold=0.5")
+    parser.add_argument("--revive", action=StageList, nargs=0, help="give dead players their health back and make them idle")
+    parser.add_argument("--relocate-missing", action=StageList, nargs="?", const="", metavar="LOCATION",
+                        help="move players in locations no longer in the catalog (default: the first starter location)")
+    parser.add_argument("--rename-item", action=StageList, metavar="OLD=NEW", help="rename an armor, weapon or location in every row")
+    parser.add_argument("--delete", action=StageList, nargs=0, help="delete the rows chosen by --where")
+    parser.add_argument("--dry-run", action="store_true", help="show what would change without writing")
+    parser.add_argument("--diff-limit", type=int, default=20, help="changed rows to show in a dry run")
+    args = parser.parse_args()
+    stages = getattr(args, "stages", None) or []
+    if ("delete", []) in stages and not any(option == "where" for option, _ in stages):
+        parser.error("--delete without --where would delete every player")
+    try:
+        report = runPipeline(args.file, stages, args.dry_run, args.diff_limit, defaultPath=args.default)
+    except SchemaError as error:
+        raise SystemExit(str(error))
+    seconds = max(report["seconds"], 1e-9)
+    print(f"{'Would change' if args.dry_run else 'Changed'} {report['changed']} and {'would delete' if args.dry_run else 'deleted'} "
+          f"{report['deleted']} of {report['rows']} players ({report['skipped']} unreadable rows kept as they were)", file=sys.stderr)
+    print(f"{'Would upgrade' if args.dry_run else 'Upgraded'} {report['upgraded']} rows from an older layout and "
+          f"{'would drop' if args.dry_run else 'dropped'} {report['dead']} dead rows", file=sys.stderr)
+    print(f"{report['seconds']:.2f}s, {report['rows'] / seconds:,.0f} rows/s, {report['bytes'] / seconds / 2**20:.1f} MB/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
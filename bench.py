@@ -0,0 +1,289 @@
+'''Benchmark suite for the game's hot paths on synthetic data.
+
+Every run builds its own game folder (bin/ with generated catalogs and players) in a temporary
+directory, so results only depend on the sizes and the seed, never on the real bin/ files. Each case
+is timed several times and the median kept; results are seconds (per call where noted in CASES).
+
+python bench.py --sizes small medium --out bench.json
+python bench.py --save-baseline bench_baseline.json, then later python bench.py --baseline bench_baseline.json
+prints the change per case and exits with 1 if any case got slower than --tolerance allows.
+python bench.py --storage csv sqlite --sizes 10k medium large runs the player storage backends side by side.
+'''
+import argparse
+import contextlib
+import gc
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import AdventureGame
+import driver
+import render
+from AdventureGame import PLACES_FIGHT, TRAVEL_MENU_SIZE
+from replay import Replayer, VirtualClock
+from simulator import simulateFight
+from travel import RoutePlanner
+
+# name -> (catalog items per file, saved players)
+SIZES = {"small": (100, 1_000), "10k": (1_000, 10_000), "medium": (1_000, 100_000), "large": (10_000, 1_000_000)}
+CASES = {"startupCold": "AdventureGame() parsing the catalog CSVs",
+         "startupWarm": "AdventureGame() from the catalog snapshot",
+         "loadPlayers": "opening the player store (indexing bin/players.csv)",
+         "savePlayer": "per save, flushed to disk",
+         "nameLookup": "per case-insensitive name check, half of them taken",
+         "nameSuggest": "per \"did you mean\" suggestion for a mistyped name",
+         "scoreboardFirst": "first scoreboard page after a start",
+         "scoreboardPage": "per scoreboard page or rank query",
+         "chooseHostile": "per hostile drawn for a fight",
+         "fightTurn": "per simulated fight turn",
+         "travelMenu": "per nearest-cities query plus route",
+         "renderMenu": "per menu screen drawn through a TerminalConsole into the null device"}
+SPECIES = ("Bandit", "Wizard", "Ogre", "Bat", "Wolf", "Troll")
+SOURCE_BIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin")
+
+def header(fileName: str) -> str:
+    with open(os.path.join(SOURCE_BIN, fileName), 'r') as f:
+        return f.readline()
+
+def writeCatalogs(folder: str, size: int, seed=0) -> None:
+    '''size made-up locations, armors, weapons and creatures (plus encounter weights) in folder/bin.'''
+    rand = random.Random(seed)
+    binFolder = os.path.join(folder, "bin")
+    os.makedirs(binFolder, exist_ok=True)
+    shutil.copy(os.path.join(SOURCE_BIN, "players_default.csv"), binFolder)
+    side = int(math.sqrt(size) * 10)
+    with open(os.path.join(binFolder, "locations.csv"), 'w') as f:
+        f.write(header("locations.csv"))
+        for i in range(size):
+            f.write(f"City{i},Land{i % 7},{rand.randint(0, side)}|{rand.randint(0, side)},{'yes' if i % 10 == 0 else 'no'}\n")
+    with open(os.path.join(binFolder, "armors.csv"), 'w') as f:
+        f.write(header("armors.csv"))
+        for i in range(size):
+            f.write(f"Armor{i},{rand.randint(0, 30) / 100},{rand.randint(0, 50) / 100},{rand.choice(('physical', 'magic'))},"
+                    f"{'yes' if i % 10 == 0 else 'no'},yes,yes,{rand.randint(0, 90)},{'yes' if i % 3 == 0 else 'no'},{rand.randint(0, 100)}\n")
+    with open(os.path.join(binFolder, "weapons.csv"), 'w') as f:
+        f.write(header("weapons.csv"))
+        for i in range(size):
+            low = rand.randint(1, 10)
+            f.write(f"Weapon{i},{rand.choice(('melee', 'ranged', 'magic'))},{rand.randint(1, 20)},{low}|{low + rand.randint(0, 6)},"
+                    f"{rand.choice(('physical', 'magic', 'true'))},{'yes' if i % 10 == 0 else 'no'},yes,yes,{rand.randint(0, 90)},"
+                    f"{'yes' if i % 3 == 0 else 'no'},{rand.randint(0, 100)}\n")
+    with open(os.path.join(binFolder, "creatures.csv"), 'w') as f:
+        f.write(header("creatures.csv"))
+        for i in range(size):
+            f.write(f"Creature{i},{SPECIES[i % len(SPECIES)]},{rand.randint(4, 40)},{rand.randint(10, 40)},"
+                    f"Armor{rand.randrange(size)},Weapon{rand.randrange(size)},{'yes' if i % 20 == 19 else 'no'}\n")
+    with open(os.path.join(binFolder, "encounters.csv"), 'w') as f:
+        f.write(header("encounters.csv"))
+        for species in SPECIES:
+            for place in PLACES_FIGHT:
+                f.write(f"{species},{place},{rand.randint(0, 5)}\n")
+        for i in range(0, size, 10):
+            f.write(f"{rand.choice(SPECIES)},City{i}:{rand.choice(PLACES_FIGHT)},{rand.randint(1, 9)}\n")
+
+def writePlayers(folder: str, count: int, catalogSize: int, seed=0) -> None:
+    '''count made-up saved players in folder/bin/players.csv, using the names writeCatalogs makes.'''
+    rand = random.Random(seed)
+    with open(os.path.join(SOURCE_BIN, "players_default.csv"), 'r') as f:
+        default = f.read()
+    with open(os.path.join(folder, "bin", "players.csv"), 'w', newline='') as f:
+        f.write(default)
+        for i in range(count):
+            baseHealth, exp = rand.randint(10, 40), rand.randint(0, 999)
+            f.write(f"Player{i:07d},{rand.choice(SPECIES)},{(exp + 25) // 25},{exp},{rand.randint(0, 5000)}," # Level as Player.updateLevel has it
+                    f"{baseHealth},{rand.randint(0, baseHealth)},30,27,City{rand.randrange(catalogSize)},"
+                    f"Armor{rand.randrange(catalogSize)},Weapon{rand.randrange(catalogSize)},{rand.randint(0, 4)},\n")
+
+@contextlib.contextmanager
+def inFolder(folder: str):
+    '''The game opens bin/... relative to the working directory.'''
+    previous = os.getcwd()
+    os.chdir(folder)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def median(func, repeat: int) -> float:
+    '''Median seconds of repeat calls of func. func may return how many operations it timed, to get seconds per operation.'''
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        startTime = time.perf_counter()
+        operations = func() or 1
+        times.append((time.perf_counter() - startTime) / operations)
+    return statistics.median(times)
+
+def newGame(storage: str = None):
+    game = AdventureGame.AdventureGame(storage=storage)
+    if game.startupTime is None:
+        raise RuntimeError("Benchmark game files failed to load!")
+    return game
+
+def runSize(catalogSize: int, playerCount: int, repeat: int = 5, operations: int = 1000, seed=0, storage: str = "csv") -> dict:
+    '''Time every case in CASES at one catalog size and player count, keeping players in storage.'''
+    rand = random.Random(seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        writeCatalogs(folder, catalogSize, seed)
+        writePlayers(folder, playerCount, catalogSize, seed)
+        with inFolder(folder):
+            newGame(storage).close() # A database imports players.csv the first time
+            def coldStart():
+                backend = AdventureGame.openStorage(storage)
+                backend.dropSnapshot()
+                backend.close()
+                newGame(storage).close()
+            results["startupCold"] = median(coldStart, repeat)
+            results["startupWarm"] = median(lambda: newGame(storage).close(), repeat)
+
+            game = newGame(storage)
+            try:
+                def loadPlayers():
+                    game.saveQueue.close() # Nothing is pending, so this only stops its thread
+                    game.playerStore.close()
+                    game.loadPlayers()
+                results["loadPlayers"] = median(loadPlayers, repeat)
+
+                names = list(game.playerStore.names())
+                def savePlayers():
+                    for _ in range(max(1, operations // 10)): # Each save is flushed, so fsyncs dominate
+                        game.player = game.PLAYERS.get(rand.choice(names))
+                        game.player.gold += rand.randint(0, 1000)
+                        game.savePlayer()
+                        game.saveQueue.flush()
+                    return max(1, operations // 10)
+                results["savePlayer"] = median(savePlayers, repeat)
+
+                game.NAMES.load() # Built on the first name prompt after a start
+                lookups = [rand.choice(names).lower() if i % 2 else f"Nobody{i}" for i in range(operations)]
+                def nameLookups():
+                    for name in lookups:
+                        game.NAMES.find(name)
+                    return operations
+                results["nameLookup"] = median(nameLookups, repeat)
+                typos = [rand.choice(names)[:-2] + "x" for _ in range(operations)]
+                def nameSuggestions():
+                    for name in typos:
+                        game.NAMES.suggest(name)
+                    return operations
+                results["nameSuggest"] = median(nameSuggestions, repeat)
+
+                def firstScoreboard():
+                    game.LEADERBOARD = game.storage.leaderboard(game.playerStore, game.playerScores, game.saveQueue.flush)
+                    game.LEADERBOARD.refresh()
+                    game.LEADERBOARD.page(1)
+                results["scoreboardFirst"] = median(firstScoreboard, repeat)
+                pages = [rand.randint(1, max(1, playerCount // 10)) for _ in range(operations // 2)]
+                ranked = [rand.choice(names) for _ in range(operations // 2)]
+                def scoreboardQueries():
+                    for page, name in zip(pages, ranked):
+                        game.LEADERBOARD.page(page)
+                        game.LEADERBOARD.rank(name)
+                    return 2 * len(pages)
+                results["scoreboardPage"] = median(scoreboardQueries, repeat)
+
+                healths = [rand.randint(10, 40) for _ in range(operations)]
+                areas = [(f"City{rand.randrange(catalogSize)}", rand.choice(PLACES_FIGHT)) for _ in range(operations)]
+                def chooseHostiles():
+                    for health, (location, place) in zip(healths, areas):
+                        game.ENCOUNTERS.choose(health, location, place, rand)
+                    return operations
+                results["chooseHostile"] = median(chooseHostiles, repeat)
+
+                weapons, armors, hostiles = list(game.WEAPONS), list(game.ARMORS), list(game.HOSTILES)
+                fights = [(rand.choice(weapons), rand.choice(armors), rand.choice(hostiles)) for _ in range(max(1, operations // 10))]
+                def fightTurns():
+                    fightRand = random.Random(seed)
+                    return sum(simulateFight(weapon, armor, hostile, rand=fightRand, baseHealth=25).turns for weapon, armor, hostile in fights)
+                results["fightTurn"] = median(fightTurns, repeat)
+
+                locations = list(game.LOCATIONS)
+                origins = [rand.choice(locations) for _ in range(operations)]
+                def travelMenus():
+                    planner = RoutePlanner(game.MAP) # Cold route cache, like a server that just started
+                    for origin in origins:
+                        destinations = game.MAP.nearest(origin.position, TRAVEL_MENU_SIZE, exclude=origin)
+                        planner.route(origin, destinations[-1][1])
+                    return operations
+                results["travelMenu"] = median(travelMenus, repeat)
+
+                loops = max(1, operations // 4)
+                # Load a player, view their stats over and over, save & quit, then page the scoreboard over and over
+                script = ["2", rand.choice(names)] + ["2"] * loops + ["4"] + ["3"] * loops + ["4"]
+                replies = [{"in": reply, "t": 0} for reply in script]
+                def renderMenus():
+                    with open(os.devnull, 'w') as sink:
+                        console = render.TerminalConsole(sink)
+                        token = AdventureGame.CONSOLE.set(console)
+                        try:
+                            Replayer.drive(driver.sessionMenus(game.newSession()), replies, VirtualClock(0))
+                        finally:
+                            AdventureGame.CONSOLE.reset(token)
+                    return console.stats.frames
+                results["renderMenu"] = median(renderMenus, repeat)
+            finally:
+                game.close()
+    return results
+
+def runSuite(sizes, repeat: int = 5, operations: int = 1000, seed=0, storages=("csv",)) -> dict:
+    '''Results are keyed size/case, with storage: in front for backends other than CSV.'''
+    results = {}
+    for name in sizes:
+        catalogSize, playerCount = SIZES[name]
+        for storage in storages:
+            for case, seconds in runSize(catalogSize, playerCount, repeat, operations, seed, storage).items():
+                results[f"{'' if storage == 'csv' else storage + ':'}{name}/{case}"] = seconds
+    return {"python": platform.python_version(), "platform": platform.platform(), "seed": seed,
+            "repeat": repeat, "operations": operations, "results": results}
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    '''(case, baseline seconds, seconds, ratio, regressed) for every case in both runs.'''
+    rows = []
+    for case, seconds in report["results"].items():
+        before = baseline["results"].get(case)
+        if before:
+            ratio = seconds / before
+            rows.append((case, before, seconds, ratio, ratio > 1 + tolerance))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark startup, saving, fights and travel on synthetic game data.")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--operations", type=int, default=1000, help="calls per timing of the per-call cases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--storage", nargs="+", choices=AdventureGame.STORAGE, default=["csv"], help="player storage backends to run")
+    parser.add_argument("--out", help="write the results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results as the baseline to compare later runs with")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with this baseline and exit with 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="slowdown allowed before a case counts as a regression (0.3 is 30%%)")
+    args = parser.parse_args()
+    report = runSuite(args.sizes, args.repeat, args.operations, args.seed, args.storage)
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+    if not args.baseline:
+        for case, seconds in report["results"].items():
+            print(f"{case:>31}: {seconds * 1e6:14,.1f} us  {CASES[case.split('/')[1]]}")
+        return
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, args.tolerance)
+    for case, before, seconds, ratio, regressed in rows:
+        print(f"{case:>31}: {before * 1e6:14,.1f} us -> {seconds * 1e6:14,.1f} us  {ratio:6.2f}x{'  REGRESSION' if regressed else ''}")
+    regressions = sum(row[4] for row in rows)
+    print(f"{regressions} of {len(rows)} cases slower than the baseline by more than {args.tolerance:.0%}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,86 @@
 import AdventureGame
-import time
-from os import system
+from AdventureGame import Pause, clear, say
 
-# Clear console to get ready for input.
-clear = lambda: system('cls')
-game = AdventureGame.AdventureGame()
+# Menus are states: each returns the next menu to show, or None to quit, and sessionMenus loops over them.
+# Like the game's own menus they are generators, so server.py can run the same flow for each connection.
+def sessionMenus(game):
+    menu = mainMenu
+    while menu:
+        game.tick()
+        menu = yield from menu(game)
 
-maxCancelTries = 2
-
-def userYesNo(prompt: str) -> bool:
-    inn = input(prompt)
-    return inn.upper() == 'Y'
-
-def mainMenu():
-    print("--- Main Menu ---")
-    choice = AdventureGame.getMenu("Start New Game", "Load Game", "Scoreboard", "Quit")
+def mainMenu(game):
+    say("--- Main Menu ---")
+    choice = yield from AdventureGame.getMenu("Start New Game", "Load Game", "Scoreboard", "Quit")
     if choice == 1:
         try:
-            game.getNewPlayer()
+            yield from game.getNewPlayer()
         except(AttributeError):
-            game.player = None
+            game.releasePlayer()
         if game.player:
-            print("Game created successfully!")
-            time.sleep(2)
+            say("Game created successfully!")
+            yield Pause(2)
             clear()
-            print("Game created successfully!\n")
-            loadedMenu()
+            say("Game created successfully!\n")
+            return loadedMenu
         else:
-            print("Error creating game! Going back to main menu...")
-            game.player = None
-            mainMenu()
+            say("Error creating game! Going back to main menu...")
+            game.releasePlayer()
+            return mainMenu
     elif choice == 2:
-        game.loadPlayer()
+        yield from game.loadPlayer()
         if(game.player):
-            loadedMenu()
+            return loadedMenu
         else:
-            mainMenu()
+            return mainMenu
     elif choice == 3:
         clear()
         game.viewScoreboard()
-        print()
-        mainMenu()
+        say()
+        return mainMenu
     elif choice == 4:
-        print("Goodbye.")
+        say("Goodbye.")
     else:
-        print("Goodbye.")
+        say("Goodbye.")
 
-def loadedMenu():
-    choice = AdventureGame.getMenu("Play Game", "View Stats", "Save", "Save & Quit to Main Menu")
+def loadedMenu(game):
+    choice = yield from AdventureGame.getMenu("Play Game", "View Stats", "Save", "Save & Quit to Main Menu")
     if choice == 1:
         clear()
-        game.startGame()
-        loadedMenu()
+        yield from game.startGame()
+        return loadedMenu
     elif choice == 2:
         clear()
         game.viewStats()
-        print()
-        loadedMenu()
+        say()
+        return loadedMenu
     elif choice == 3:
         game.savePlayer()
         clear()
-        print("Game saved!")
-        loadedMenu()
+        say("Game saved!")
+        return loadedMenu
     elif choice == 4:
+        game.startResting()
         game.savePlayer()
+        game.releasePlayer()
         clear()
-        print("Game saved!")
-        mainMenu()
+        say("Game saved!")
+        return mainMenu
     else:
-        loadedMenu()
+        return loadedMenu
 
 def main():
+    game = AdventureGame.AdventureGame()
     clear()
-    print("Welcome to your own Epic Super Adventure!")
-    print("All code by Ryan Edwards rje7hp for IT4401 taught by Dale Musser")
-    print("10 December 2021")
-    print()
-    mainMenu()
+    say("Welcome to your own Epic Super Adventure!")
+    say("All code by Ryan Edwards rje7hp for IT4401 taught by Dale Musser")
+    say("10 December 2021")
+    say(game.startupReport())
+    say()
+    try:
+        AdventureGame.runInteractive(sessionMenus(game))
+    finally:
+        game.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,250 @@
+'''Player leaderboard ranked by level, then exp, then gold.
+
+Scores are kept in SortedKeys, a list of sorted buckets of at most 2 * LOAD (1024) keys, so changing one
+player's score is a couple of bisects plus a small list insert instead of a re-sort. A Fenwick tree of
+the bucket lengths finds a player's rank, or the bucket a page starts in, without adding up every
+bucket in front of it.
+
+python leaderboard.py --players 1000000 benchmarks building, updating and querying.
+'''
+import argparse
+import random
+import time
+from bisect import bisect_left, insort
+
+class SortedKeys:
+    '''Sorted multiset of comparable keys split into sorted buckets of at most 2 * LOAD keys. remove()
+    merges a bucket that drops under LOAD / 2 keys into its neighbour, so there are about n / LOAD buckets.
+    A Fenwick tree over the bucket lengths maps positions to buckets and back in O(log(n / LOAD)). It is
+    updated in place by every add and remove, and rebuilt after a split or merge.'''
+    LOAD = 512
+
+    def __init__(self, keys=()) -> None:
+        keys = sorted(keys)
+        self.buckets = [keys[start:start + self.LOAD] for start in range(0, len(keys), self.LOAD)]
+        self.maxes = [bucket[-1] for bucket in self.buckets]
+        self.size = len(keys)
+        self.tree = None # Fenwick tree of bucket lengths, built when first needed
+
+    def __len__(self) -> int:
+        return self.size
+
+    def buildTree(self) -> list:
+        tree = [0] * (len(self.buckets) + 1)
+        for index, bucket in enumerate(self.buckets, 1):
+            tree[index] += len(bucket)
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self.tree = tree
+        return tree
+
+    def resize(self, bucketIndex: int, change: int) -> None:
+        '''Record that bucket bucketIndex grew by change keys.'''
+        self.size += change
+        tree = self.tree
+        if tree is not None:
+            index = bucketIndex + 1
+            while index < len(tree):
+                tree[index] += change
+                index += index & -index
+
+    def before(self, bucketIndex: int) -> int:
+        '''Number of keys in the buckets before bucketIndex.'''
+        tree = self.tree or self.buildTree()
+        total = 0
+        while bucketIndex:
+            total += tree[bucketIndex]
+            bucketIndex -= bucketIndex & -bucketIndex
+        return total
+
+    def locate(self, position: int) -> tuple:
+        '''(bucket index, position in that bucket) of the key at position; (len(buckets), rest) past the end.'''
+        tree = self.tree or self.buildTree()
+        bucketIndex = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            if bucketIndex + step < len(tree) and tree[bucketIndex + step] <= position:
+                bucketIndex += step
+                position -= tree[bucketIndex]
+            step >>= 1
+        return bucketIndex, position
+
+    def add(self, key) -> None:
+        if not self.buckets:
+            self.buckets.append([key])
+            self.maxes.append(key)
+            self.size += 1
+            self.tree = None
+            return
+        index = bisect_left(self.maxes, key)
+        if index == len(self.buckets):
+            index -= 1
+            self.buckets[index].append(key)
+            self.maxes[index] = key
+        else:
+            insort(self.buckets[index], key)
+        self.resize(index, 1)
+        bucket = self.buckets[index]
+        if len(bucket) > 2 * self.LOAD:
+            self.buckets[index:index + 1] = [bucket[:self.LOAD], bucket[self.LOAD:]]
+            self.maxes[index:index + 1] = [bucket[self.LOAD - 1], bucket[-1]]
+            self.tree = None
+
+    def remove(self, key) -> None:
+        index = bisect_left(self.maxes, key)
+        bucket = self.buckets[index] if index < len(self.buckets) else []
+        position = bisect_left(bucket, key)
+        if position == len(bucket) or bucket[position] != key:
+            raise KeyError(key)
+        del bucket[position]
+        self.resize(index, -1)
+        if not bucket:
+            del self.buckets[index]
+            del self.maxes[index]
+            self.tree = None
+            return
+        self.maxes[index] = bucket[-1]
+        if len(bucket) < self.LOAD // 2 and len(self.buckets) > 1:
+            index = max(index - 1, 0) # Merge with the bucket before it (the first merges with the second)
+            merged = self.buckets[index] + self.buckets[index + 1]
+            halves = [merged] if len(merged) <= 2 * self.LOAD else [merged[:len(merged) // 2], merged[len(merged) // 2:]]
+            self.buckets[index:index + 2] = halves
+            self.maxes[index:index + 2] = [half[-1] for half in halves]
+            self.tree = None
+
+    def index(self, key) -> int:
+        '''Position of key (0 is the smallest). key must be present.'''
+        bucketIndex = bisect_left(self.maxes, key)
+        return self.before(bucketIndex) + bisect_left(self.buckets[bucketIndex], key)
+
+    def after(self, key, count: int) -> list:
+        '''Up to count keys, in order, starting at the first one not less than key.'''
+        index = bisect_left(self.maxes, key)
+        if index == len(self.buckets):
+            return []
+        bucket = self.buckets[index]
+        position = bisect_left(bucket, key)
+        found = bucket[position:position + count]
+        for index in range(index + 1, len(self.buckets)):
+            if len(found) >= count:
+                break
+            found.extend(self.buckets[index][:count - len(found)])
+        return found
+
+    def slice(self, start: int, stop: int) -> list:
+        '''Keys from position start up to (not including) stop.'''
+        found = []
+        count = stop - start
+        if count <= 0:
+            return found
+        index, offset = self.locate(start)
+        while index < len(self.buckets) and len(found) < count:
+            found.extend(self.buckets[index][offset:offset + count - len(found)])
+            index += 1
+            offset = 0
+        return found
+
+class Leaderboard:
+    '''Ranks players by (level, exp, gold), highest first, with ties broken by name.
+
+    loadScores returns (name, level, exp, gold) for every player. It is only called the first time
+    the leaderboard is queried; until then updates are ignored, since loading reads current scores.'''
+    def __init__(self, loadScores) -> None:
+        self.loadScores = loadScores
+        self.keys = None
+        self.scores = {} # name -> its key in self.keys
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.keys)
+
+    @staticmethod
+    def key(name: str, level: int, exp: int, gold: int) -> tuple:
+        return (-level, -exp, -gold, name)
+
+    def load(self) -> None:
+        if self.keys is None:
+            self.scores = {name: self.key(name, level, exp, gold) for name, level, exp, gold in self.loadScores()}
+            self.keys = SortedKeys(self.scores.values())
+
+    def set(self, name: str, level: int, exp: int, gold: int) -> None:
+        if self.keys is None:
+            return
+        key = self.key(name, level, exp, gold)
+        old = self.scores.get(name)
+        if old == key:
+            return
+        if old is not None:
+            self.keys.remove(old)
+        self.keys.add(key)
+        self.scores[name] = key
+
+    def update(self, player) -> None:
+        self.set(player.name, player.level, player.exp, player.gold)
+
+    def refresh(self) -> None:
+        '''Called before the queries answering one request. Scores are pushed by set(), so there is nothing to do.'''
+
+    def remove(self, name: str) -> None:
+        if self.keys is not None and name in self.scores:
+            self.keys.remove(self.scores.pop(name))
+
+    def rank(self, name: str):
+        '''1 for the leader, or None for an unknown player.'''
+        self.load()
+        key = self.scores.get(name)
+        return None if key is None else self.keys.index(key) + 1
+
+    def entries(self, start: int, stop: int) -> list:
+        '''(rank, name, level, exp, gold) for ranks start + 1 through stop.'''
+        return [(start + offset + 1, name, -level, -exp, -gold) for offset, (level, exp, gold, name) in enumerate(self.keys.slice(start, stop))]
+
+    def top(self, count: int) -> list:
+        self.load()
+        return self.entries(0, count)
+
+    def page(self, number: int, size: int = 10) -> list:
+        '''Page number (from 1) of size entries.'''
+        self.load()
+        return self.entries((number - 1) * size, number * size)
+
+def benchmark(count: int, queries: int = 1000, seed=0) -> dict:
+    '''Seconds to build a leaderboard of count players, and mean seconds per update, top-10, rank and page query.'''
+    rand = random.Random(seed)
+    scores = [(f"Player{i:07d}", rand.randint(1, 40), rand.randint(0, 999), rand.randint(0, 5000)) for i in range(count)]
+    results = {}
+    startTime = time.perf_counter()
+    board = Leaderboard(lambda: scores)
+    board.load()
+    results["build"] = time.perf_counter() - startTime
+    changes = [(rand.choice(scores)[0], rand.randint(1, 40), rand.randint(0, 999), rand.randint(0, 5000)) for _ in range(queries)]
+    startTime = time.perf_counter()
+    for change in changes:
+        board.set(*change)
+    results["update"] = (time.perf_counter() - startTime) / queries
+    startTime = time.perf_counter()
+    for _ in range(queries):
+        board.top(10)
+    results["top10"] = (time.perf_counter() - startTime) / queries
+    startTime = time.perf_counter()
+    for name, *_ in changes:
+        board.rank(name)
+    results["rank"] = (time.perf_counter() - startTime) / queries
+    startTime = time.perf_counter()
+    for _ in range(queries):
+        board.page(rand.randint(1, max(1, count // 10)))
+    results["page"] = (time.perf_counter() - startTime) / queries
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the leaderboard on synthetic players.")
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    results = benchmark(args.players, args.queries)
+    print(f"{args.players} players: build {results['build']:.2f} s, update {results['update'] * 1e6:.1f} us, "
+          f"top-10 {results['top10'] * 1e6:.1f} us, rank {results['rank'] * 1e6:.1f} us, random page {results['page'] * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+'''Opt-in timing of the game's hot paths, exported as p50/p99 latencies.
+
+Hot paths are registered by name with register(), which only records them: nothing is wrapped and
+nothing costs anything until enable() swaps in timing wrappers, and disable() puts the originals back.
+Menus are generators, so for them only the time spent running is counted, not the time spent waiting
+for the player to type. enable(profile=True) also runs the instrumented calls under cProfile.
+
+Turn it on with the ADVENTURE_METRICS environment variable ("1", or "profile" for the profiler too),
+read the numbers with prometheusText() / writeMetrics(), or scrape server.py --metrics-port.
+python metrics.py measures the cost of the wrappers, enabled and disabled.
+'''
+import argparse
+import cProfile
+import functools
+import inspect
+import math
+import os
+import pstats
+import time
+
+# Latency buckets grow by sqrt(2) from 1 microsecond to about 100 seconds
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** (i / 2) for i in range(54))
+
+class Histogram:
+    '''Count of observations per latency bucket, plus their total, for cheap percentile estimates.'''
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1) # The last bucket is everything slower
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = 0 if seconds <= BUCKET_BOUNDS[0] else min(len(BUCKET_BOUNDS), math.ceil(2 * math.log2(seconds / BUCKET_BOUNDS[0])))
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, fraction: float) -> float:
+        '''Estimate by interpolating inside the bucket holding the fraction-th observation.'''
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= target:
+                low = BUCKET_BOUNDS[index - 1] if index else 0.0
+                high = BUCKET_BOUNDS[min(index, len(BUCKET_BOUNDS) - 1)]
+                return low + (high - low) * (target - seen) / count
+            seen += count
+        return BUCKET_BOUNDS[-1]
+
+HOT_PATHS = {} # metric name -> (owner, attribute)
+HISTOGRAMS = {} # metric name -> Histogram
+_originals = {} # metric name -> the function enable() replaced
+_profiler = None
+_profileDepth = 0
+
+def register(owner, *attributes: str, prefix: str = None) -> None:
+    '''Make owner.attribute (a class or module function) something enable() can time.'''
+    for attribute in attributes:
+        HOT_PATHS[f"{prefix or owner.__name__}.{attribute}"] = (owner, attribute)
+
+def _startProfile() -> None:
+    global _profileDepth
+    _profileDepth += 1
+    if _profileDepth == 1:
+        _profiler.enable()
+
+def _stopProfile() -> None:
+    global _profileDepth
+    _profileDepth -= 1
+    if _profileDepth == 0:
+        _profiler.disable()
+
+def _timeFunction(func, histogram: Histogram, profile: bool):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        if profile:
+            _startProfile()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+            if profile:
+                _stopProfile()
+    return timed
+
+def _timeGenerator(func, histogram: Histogram, profile: bool):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        flow = func(*args, **kwargs)
+        running = 0.0
+        reply = None
+        try:
+            while True:
+                if profile:
+                    _startProfile()
+                start = time.perf_counter()
+                try:
+                    request = flow.send(reply)
+                except StopIteration as stop:
+                    return stop.value
+                finally:
+                    running += time.perf_counter() - start
+                    if profile:
+                        _stopProfile()
+                reply = yield request
+        finally:
+            flow.close()
+            histogram.observe(running)
+    return timed
+
+def enable(profile: bool = False) -> None:
+    '''Wrap every registered hot path. With profile, calls also run under one shared cProfile.Profile.'''
+    global _profiler
+    disable()
+    _profiler = cProfile.Profile() if profile else None
+    for name, (owner, attribute) in HOT_PATHS.items():
+        func = getattr(owner, attribute)
+        histogram = HISTOGRAMS.setdefault(name, Histogram())
+        wrap = _timeGenerator if inspect.isgeneratorfunction(func) else _timeFunction
+        _originals[name] = func
+        setattr(owner, attribute, wrap(func, histogram, profile))
+
+def disable() -> None:
+    '''Put the original functions back. Histograms are kept.'''
+    for name, func in _originals.items():
+        owner, attribute = HOT_PATHS[name]
+        setattr(owner, attribute, func)
+    _originals.clear()
+
+def enabled() -> bool:
+    return bool(_originals)
+
+def reset() -> None:
+    HISTOGRAMS.clear()
+
+def configureFromEnvironment(variable: str = "ADVENTURE_METRICS") -> None:
+    setting = os.environ.get(variable, "")
+    if setting and setting != "0":
+        enable(profile=setting == "profile")
+
+def prometheusText(prefix: str = "adventure") -> str:
+    '''Every histogram as a Prometheus summary: p50 and p99 plus the call count and total seconds.'''
+    lines = []
+    for name, histogram in sorted(HISTOGRAMS.items()):
+        metric = f"{prefix}_{name.replace('.', '_')}_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        lines.append(f'{metric}{{quantile="0.5"}} {histogram.percentile(0.5):.9f}')
+        lines.append(f'{metric}{{quantile="0.99"}} {histogram.percentile(0.99):.9f}')
+        lines.append(f"{metric}_sum {histogram.sum:.9f}")
+        lines.append(f"{metric}_count {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+def writeMetrics(path: str) -> None:
+    with open(path, 'w') as f:
+        f.write(prometheusText())
+
+def writeProfile(path: str) -> None:
+    '''Save what the profiler collected, for pstats or snakeviz.'''
+    if _profiler is not None:
+        pstats.Stats(_profiler).dump_stats(path)
+
+def measureOverhead(calls: int = 1_000_000) -> dict:
+    '''Nanoseconds per call of a trivial registered function: original, disabled, enabled and profiled.'''
+    global _profiler
+    class Probe:
+        def work(self, value):
+            return value + 1
+    probe = Probe()
+    def perCall() -> float:
+        start = time.perf_counter()
+        for i in range(calls):
+            probe.work(i)
+        return (time.perf_counter() - start) / calls * 1e9
+    results = {"original": perCall()}
+    wasEnabled, savedProfiler = enabled(), _profiler
+    disable()
+    savedPaths, savedHistograms = dict(HOT_PATHS), dict(HISTOGRAMS)
+    try:
+        HOT_PATHS.clear()
+        HISTOGRAMS.clear() # A fresh histogram for the probe, even if a real hot path shares its name
+        register(Probe, "work")
+        enable()
+        disable()
+        results["disabled"] = perCall()
+        enable()
+        results["enabled"] = perCall()
+        enable(profile=True)
+        results["profiled"] = perCall()
+    finally:
+        disable()
+        HOT_PATHS.clear()
+        HOT_PATHS.update(savedPaths)
+        HISTOGRAMS.clear()
+        HISTOGRAMS.update(savedHistograms)
+    if wasEnabled:
+        enable(profile=savedProfiler is not None)
+        _profiler = savedProfiler # Keeps what it collected before the measurement
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure what the timing wrappers cost per call.")
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args()
+    results = measureOverhead(args.calls)
+    for mode, nanoseconds in results.items():
+        print(f"{mode:>9}: {nanoseconds:7.1f} ns per call ({nanoseconds - results['original']:+.1f} ns)")
+
+if __name__ == "__main__":
+    main()
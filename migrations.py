@@ -0,0 +1,124 @@
+'''Versioned player records, and the migrations that upgrade old ones.
+
+bin/players_default.csv holds the current player fields (its header) and their version (its "#schema,N,"
+line). A player file records the layout of its rows the same way: its header, then a "#schema,N," line
+(files saved before versions were recorded have none and are version 1). When a game saves rows with a
+newer layout into an older file, PlayerStore first appends a "#schema,N,field,field,...," line, and every
+row after it has that layout. So an old file keeps working as it is: its old rows are upgraded one at a
+time when they are read, each save writes the player in the current layout, and compaction (or
+python migrations.py, in one streaming pass) rewrites the whole file in the current layout for good.
+
+Upgrading a row runs the MIGRATIONS from its version up to the current one, then picks the current fields
+out by name: fields that were dropped are left out and new fields come from FIELD_DEFAULTS. So adding,
+removing or reordering columns only needs a default for new fields; a migration is only needed when values
+change meaning. When you change the players_default.csv header, bump its version and register one:
+
+    @migration(1)
+    def renameBaseHealth(row: dict) -> dict:
+        row["maxHealth"] = row.pop("baseHealth")
+        return row
+'''
+import argparse
+import os
+import sys
+import time
+
+SCHEMA_MARKER = "#schema"
+FIELD_DEFAULTS = {} # field -> text for rows saved before the field existed
+MIGRATIONS = {} # version -> function upgrading a row dict (field -> text) from that version to the next
+
+class SchemaError(Exception):
+    pass
+
+def migration(version: int):
+    '''Register the decorated function as the upgrade from version to version + 1.'''
+    def register(func):
+        if version in MIGRATIONS:
+            raise SchemaError(f"Two migrations from version {version}!")
+        MIGRATIONS[version] = func
+        return func
+    return register
+
+def schemaLine(version: int, aspects: list = None) -> str:
+    '''The line recording a layout. Without aspects it describes the header line above it.'''
+    return f"{SCHEMA_MARKER},{version}," + "".join(f"{aspect}," for aspect in aspects or ()) + "\n"
+
+def parseSchemaLine(line: str, header: list):
+    '''(version, aspects) from a schema line, or None if line is something else.'''
+    if not line.startswith(SCHEMA_MARKER + ","):
+        return None
+    parts = line.strip(",\r\n").split(",")
+    try:
+        return int(parts[1]), parts[2:] or header
+    except (IndexError, ValueError):
+        raise SchemaError(f"Bad schema line '{line.strip()}'!") from None
+
+def readLayout(path: str) -> tuple:
+    '''(version, aspects) a file starts with: its header, and the schema line under it if any.'''
+    with open(path, 'r', newline='') as f:
+        header = f.readline().strip(",\r\n").split(",")
+        for line in f:
+            if not line.startswith("#"):
+                break
+            layout = parseSchemaLine(line, header)
+            if layout:
+                return layout
+    return 1, header
+
+class RowUpgrader:
+    '''Turns rows saved with one layout into rows of the current one.'''
+    def __init__(self, version: int, aspects: list, currentVersion: int, currentAspects: list) -> None:
+        if version > currentVersion:
+            raise SchemaError(f"Players were saved by a newer game (version {version}, this game knows up to {currentVersion})!")
+        self.aspects = aspects
+        self.currentAspects = currentAspects
+        self.steps = [MIGRATIONS[step] for step in range(version, currentVersion) if step in MIGRATIONS]
+        self.identity = not self.steps and aspects == currentAspects
+        if not self.steps:
+            missing = [aspect for aspect in currentAspects if aspect not in aspects and aspect not in FIELD_DEFAULTS]
+            if missing:
+                raise SchemaError(f"Saved players have no {', '.join(missing)} and there is no default or migration for {'it' if len(missing) == 1 else 'them'}!")
+
+    def row(self, line: str) -> dict:
+        '''The upgraded row as field -> text.'''
+        row = dict(zip(self.aspects, line.strip(",\r\n").split(",")))
+        for step in self.steps:
+            row = step(row)
+        return row
+
+    def __call__(self, line: str) -> str:
+        if self.identity:
+            return line
+        row = self.row(line)
+        try:
+            return "".join(f"{row[aspect] if aspect in row else FIELD_DEFAULTS[aspect]}," for aspect in self.currentAspects) + "\n"
+        except KeyError as error:
+            raise SchemaError(f"Migrated players have no {error.args[0]} and there is no default for it!") from None
+
+def main():
+    parser = argparse.ArgumentParser(description="Upgrade every saved player to the current layout in one pass, so no later start has to.")
+    parser.add_argument("--file", default="bin/players.csv")
+    parser.add_argument("--default", default="bin/players_default.csv", help="the file naming the current fields and version")
+    args = parser.parse_args()
+    # The game imports this module, so only import it back when run. Run as a script, this file is
+    # __main__, and the store raises the SchemaError of the imported migrations module.
+    import migrations
+    from AdventureGame import PlayerStore
+    if os.path.exists(args.file + ".journal"):
+        raise SystemExit(f"{args.file} has an unfinished save journal. Start and close the game once to apply it first.")
+    startTime = time.perf_counter()
+    try:
+        store = PlayerStore(args.file, args.default)
+    except migrations.SchemaError as error:
+        raise SystemExit(str(error))
+    indexTime = time.perf_counter() - startTime
+    if not store.outdated():
+        print(f"{args.file} is already version {store.version} ({len(store)} players, indexed in {indexTime:.2f}s)", file=sys.stderr)
+        return
+    startTime = time.perf_counter()
+    store.compact()
+    seconds = max(time.perf_counter() - startTime, 1e-9)
+    print(f"Upgraded {len(store)} players to version {store.version} in {seconds:.2f}s ({len(store) / seconds:,.0f} rows/s)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+'''Index of player names for the name prompts: case-insensitive lookups and "did you mean" suggestions.
+
+Names are matched by their casefold(), so "bob" finds Bob. A dict from folded name to the saved names
+answers "is this taken?" and "which player is this?" in constant time, and the folded names are also
+kept in a SortedKeys (see leaderboard.py), so the names starting with what was typed are a bisect away.
+Like the Leaderboard, the index is built the first time it is asked something, and kept up to date
+with add() and remove() from then on.
+
+python names.py --names 1000000 benchmarks building, adding and looking up.
+'''
+import argparse
+import random
+import time
+
+from leaderboard import SortedKeys
+
+class NameIndex:
+    '''loadNames returns every saved player's name. It is only called the first time the index is used.'''
+    SUGGESTIONS = 5
+
+    def __init__(self, loadNames) -> None:
+        self.loadNames = loadNames
+        self.folded = None # folded name -> the name, or a list of names differing only in case
+        self.keys = None # SortedKeys of the folded names
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.keys)
+
+    def __contains__(self, name: str) -> bool:
+        '''True if name is taken, ignoring case.'''
+        self.load()
+        return name.casefold() in self.folded
+
+    def load(self) -> None:
+        if self.folded is None:
+            self.folded = {}
+            for name in self.loadNames():
+                self.insert(name)
+            self.keys = SortedKeys(self.folded)
+
+    def insert(self, name: str) -> bool:
+        '''Add name to self.folded. True if its folded form is new.'''
+        key = name.casefold()
+        found = self.folded.get(key)
+        if found is None:
+            self.folded[key] = name
+            return True
+        if isinstance(found, list):
+            if name not in found:
+                found.append(name)
+        elif found != name:
+            self.folded[key] = [found, name]
+        return False
+
+    def add(self, name: str) -> None:
+        if self.folded is not None and self.insert(name):
+            self.keys.add(name.casefold())
+
+    def remove(self, name: str) -> None:
+        if self.folded is None:
+            return
+        key = name.casefold()
+        found = self.folded.get(key)
+        if found == name:
+            del self.folded[key]
+            self.keys.remove(key)
+        elif isinstance(found, list) and name in found:
+            found.remove(name)
+            if len(found) == 1:
+                self.folded[key] = found[0]
+
+    def find(self, name: str) -> list:
+        '''Every name equal to name, ignoring case.'''
+        self.load()
+        found = self.folded.get(name.casefold())
+        return [] if found is None else list(found) if isinstance(found, list) else [found]
+
+    def startingWith(self, prefix: str, count: int = SUGGESTIONS) -> list:
+        '''Up to count names starting with prefix, ignoring case, in alphabetical order.'''
+        self.load()
+        prefix = prefix.casefold()
+        names = []
+        for key in self.keys.after(prefix, count):
+            if not key.startswith(prefix):
+                break
+            names.extend(self.find(key))
+        return names[:count]
+
+    def suggest(self, name: str, count: int = SUGGESTIONS) -> list:
+        '''Names the player may have meant: those starting with what they typed, or failing that with
+        the longest part of its start that any name has, so a typo near the end still finds something.'''
+        for length in range(len(name), (len(name) + 1) // 2 - 1, -1):
+            names = self.startingWith(name[:length], count)
+            if names:
+                return names
+        return []
+
+def benchmark(count: int, queries: int = 1000, seed=0) -> dict:
+    '''Seconds to build an index of count names, and mean seconds per add, lookup and suggestion.'''
+    rand = random.Random(seed)
+    names = [f"Player{i:07d}" for i in range(count)]
+    results = {}
+    startTime = time.perf_counter()
+    index = NameIndex(lambda: names)
+    index.load()
+    results["build"] = time.perf_counter() - startTime
+    added = [f"New{i}" for i in range(queries)]
+    startTime = time.perf_counter()
+    for name in added:
+        index.add(name)
+    results["add"] = (time.perf_counter() - startTime) / queries
+    lookups = [rand.choice(names).lower() if i % 2 else f"Nobody{i}" for i in range(queries)]
+    startTime = time.perf_counter()
+    for name in lookups:
+        index.find(name)
+    results["find"] = (time.perf_counter() - startTime) / queries
+    typos = [rand.choice(names)[:-2] + "x" for _ in range(queries)]
+    startTime = time.perf_counter()
+    for name in typos:
+        index.suggest(name)
+    results["suggest"] = (time.perf_counter() - startTime) / queries
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the player name index on synthetic names.")
+    parser.add_argument("--names", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    results = benchmark(args.names, args.queries)
+    print(f"{args.names} names: build {results['build']:.2f} s, add {results['add'] * 1e6:.1f} us, "
+          f"find {results['find'] * 1e6:.1f} us, suggest {results['suggest'] * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    main()
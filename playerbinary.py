@@ -0,0 +1,217 @@
+'''Compact binary save format for players, alongside bin/players.csv.
+
+A file is a header, then one fixed-width RECORD per player sorted by name, then an interned
+string table holding every distinct name, species, location, armor and weapon once. Records
+store string table indexes instead of text and plain ints instead of digits, so a memory-mapped
+file is read with struct.unpack_from and a player is found by binary search, with no splitting
+or int() casts. Converts to and from the CSV format used by PlayerStore.
+
+python playerbinary.py tobinary bin/players.csv bin/players.bin
+python playerbinary.py tocsv bin/players.bin bin/players.csv
+python playerbinary.py bench --players 1000000
+'''
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+import AdventureGame
+from AdventureGame import CSV_DELIM, PlayerStore
+
+MAGIC = b"AGPB"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxIQQ") # magic, version, record count, string count, string table offset
+STRING_FIELDS = ("name", "species", "location", "armor", "weapon")
+FIELDS = ("name", "species", "level", "exp", "gold", "baseHealth", "currentHealth", "baseSpeed", "currentSpeed", "location", "armor", "weapon", "status")
+RECORD = struct.Struct("<2I7i3IB3x") # Same order as FIELDS
+OFFSET = struct.Struct("<I")
+
+def rowFromLine(line: str, aspects: list) -> dict:
+    '''Parse a players.csv row into a dict of typed FIELDS.'''
+    values = dict(zip(aspects, line.strip(",\r\n").split(CSV_DELIM)))
+    return {field: values[field] if field in STRING_FIELDS else int(values[field]) for field in FIELDS}
+
+def lineFromRow(row: dict) -> str:
+    return "".join(f"{row[field]}," for field in FIELDS) + "\n"
+
+def writeBinary(rows, path: str) -> int:
+    '''Write an iterable of row dicts to path. Returns the number of players written.'''
+    strings = {} # text -> index in the string table
+    def intern(text: str) -> int:
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+    records = [tuple(intern(row[field]) if field in STRING_FIELDS else row[field] for field in FIELDS) for row in sorted(rows, key=lambda row: row["name"])]
+    tempPath = path + ".tmp"
+    with open(tempPath, 'wb') as f:
+        f.write(b"\0" * HEADER.size)
+        f.write(b"".join([RECORD.pack(*record) for record in records]))
+        tableOffset = f.tell()
+        encoded = [text.encode() for text in strings]
+        position = 0
+        for text in encoded:
+            f.write(OFFSET.pack(position))
+            position += len(text)
+        f.write(OFFSET.pack(position))
+        f.write(b"".join(encoded))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), len(strings), tableOffset))
+    os.replace(tempPath, path)
+    return len(records)
+
+class BinaryPlayerFile:
+    '''Read-only, memory-mapped view of a binary player file.'''
+    def __init__(self, path: str) -> None:
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.stringCount, self.tableOffset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} binary player file!")
+        self.textOffset = self.tableOffset + OFFSET.size * (self.stringCount + 1)
+        self.strings = {} # Decoded strings, filled in as they are used
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.row(index)
+
+    def string(self, index: int) -> str:
+        text = self.strings.get(index)
+        if text is None:
+            start, end = struct.unpack_from("<II", self.map, self.tableOffset + OFFSET.size * index)
+            text = self.strings[index] = self.map[self.textOffset + start:self.textOffset + end].decode()
+        return text
+
+    def records(self):
+        '''Iterate raw record tuples (string fields as table indexes) without building dicts.'''
+        return RECORD.iter_unpack(memoryview(self.map)[HEADER.size:HEADER.size + RECORD.size * self.count])
+
+    def record(self, index: int) -> tuple:
+        return RECORD.unpack_from(self.map, HEADER.size + RECORD.size * index)
+
+    def row(self, index: int) -> dict:
+        record = self.record(index)
+        return {field: self.string(value) if field in STRING_FIELDS else value for field, value in zip(FIELDS, record)}
+
+    def find(self, name: str):
+        '''Binary search the name-sorted records. Returns the row dict, or None.'''
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            middleName = self.string(self.record(middle)[0])
+            if middleName < name:
+                low = middle + 1
+            elif middleName > name:
+                high = middle
+            else:
+                return self.row(middle)
+        return None
+
+    def close(self) -> None:
+        self.map.close()
+        self.file.close()
+
+def csvRows(path: str, defaultPath: str = None):
+    '''Rows of the players CSV at path, in the layout of defaultPath: by default the players_default.csv
+    beside path, or the file's own header if there is none.'''
+    if not os.path.exists(path): # PlayerStore would create an empty one
+        raise FileNotFoundError(f"No players CSV at {path}!")
+    if defaultPath is None:
+        defaultPath = os.path.join(os.path.dirname(path), os.path.basename(AdventureGame.FILE_DEFAULT_PLAYERS))
+    store = PlayerStore(path, defaultPath)
+    missing = set(FIELDS) - set(store.aspects)
+    if missing:
+        raise ValueError(f"{path} is missing the fields {sorted(missing)}!")
+    for line in store.rows():
+        yield rowFromLine(line, store.aspects)
+
+def csvToBinary(csvPath: str, binaryPath: str, defaultPath: str = None) -> int:
+    return writeBinary(csvRows(csvPath, defaultPath), binaryPath)
+
+def binaryToCsv(binaryPath: str, csvPath: str) -> int:
+    players = BinaryPlayerFile(binaryPath)
+    try:
+        with open(csvPath, 'w', newline='') as f:
+            f.write("".join(f"{field}," for field in FIELDS) + "\n")
+            for row in players:
+                f.write(lineFromRow(row))
+        return len(players)
+    finally:
+        players.close()
+
+def syntheticRows(count: int):
+    '''count made-up players drawn from the catalogs in bin/.'''
+    catalogs = AdventureGame.readCatalogs("locations", "armors", "weapons")
+    locations, armors, weapons = ([item.name for item in catalogs[name]] for name in ("locations", "armors", "weapons"))
+    for i in range(count):
+        yield {"name": f"Player{i:07d}", "species": ("Elf", "Human", "Orc", "Dwarf")[i % 4], "level": 1 + i % 40, "exp": i % 1000,
+               "gold": i % 500, "baseHealth": 10 + i % 20, "currentHealth": 5 + i % 20, "baseSpeed": 30, "currentSpeed": 27,
+               "location": locations[i % len(locations)], "armor": armors[i % len(armors)], "weapon": weapons[i % len(weapons)], "status": i % 5}
+
+def benchmark(count: int) -> dict:
+    '''Time saving and loading count players as CSV and as binary.'''
+    rows = list(syntheticRows(count))
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        csvPath, binaryPath = os.path.join(folder, "players.csv"), os.path.join(folder, "players.bin")
+        startTime = time.perf_counter()
+        with open(csvPath, 'w', newline='') as f:
+            f.write("".join(f"{field}," for field in FIELDS) + "\n")
+            for row in rows:
+                f.write(lineFromRow(row))
+        results["csvSave"] = time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        writeBinary(rows, binaryPath)
+        results["binarySave"] = time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        loaded = sum(1 for _ in csvRows(csvPath))
+        results["csvLoad"] = time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        players = BinaryPlayerFile(binaryPath)
+        loaded = sum(1 for _ in players)
+        results["binaryLoad"] = time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        sum(1 for _ in players.records())
+        results["binaryRecords"] = time.perf_counter() - startTime
+        startTime = time.perf_counter()
+        for i in range(0, count, max(1, count // 1000)):
+            players.find(f"Player{i:07d}")
+        results["binaryFind1000"] = time.perf_counter() - startTime
+        players.close()
+        results["csvBytes"] = os.path.getsize(csvPath)
+        results["binaryBytes"] = os.path.getsize(binaryPath)
+    assert loaded == count
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert and benchmark the binary player save format.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    toBinary = commands.add_parser("tobinary", help="convert a players CSV to binary")
+    toBinary.add_argument("source")
+    toBinary.add_argument("destination")
+    toBinary.add_argument("--default", help="the file naming the current fields and version (default: players_default.csv beside source)")
+    toCsv = commands.add_parser("tocsv", help="convert a binary player file to CSV")
+    toCsv.add_argument("source")
+    toCsv.add_argument("destination")
+    bench = commands.add_parser("bench", help="compare CSV and binary load/save throughput")
+    bench.add_argument("--players", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if args.command == "tobinary":
+        print(f"Wrote {csvToBinary(args.source, args.destination, args.default)} players to {args.destination}")
+    elif args.command == "tocsv":
+        print(f"Wrote {binaryToCsv(args.source, args.destination)} players to {args.destination}")
+    else:
+        results = benchmark(args.players)
+        for fmt in ("csv", "binary"):
+            print(f"{fmt:>6}: save {args.players / results[fmt + 'Save']:>12,.0f} players/s, load {args.players / results[fmt + 'Load']:>12,.0f} players/s, {results[fmt + 'Bytes'] / 2**20:.1f} MiB")
+        print(f"binary: raw records {args.players / results['binaryRecords']:>12,.0f} players/s")
+        print(f"binary: 1000 lookups by name in {results['binaryFind1000'] * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+'''Where a session's text goes: the local terminal, a socket (see server.py) or nowhere.
+
+A Console collects everything a session says into one frame and sends the frame in a single write
+when the session needs the player (a prompt) or pauses. clear() starts a new frame beginning with an
+ANSI clear-screen sequence instead of spawning a cls shell. Whatever the old frame still held is
+dropped, since the screen would be wiped before anyone could read it. Every console counts its
+frames, writes and process spawns in .stats.
+
+python render.py recordings/ replays recorded sessions (see replay.py) through the old one-write-per-line,
+shell-clearing console and through TerminalConsole, and compares the counts.
+'''
+import argparse
+import os
+import sys
+import time
+
+class RenderStats:
+    __slots__ = ("frames", "writes", "spawns", "bytes")
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.writes = 0 # write system calls
+        self.spawns = 0 # processes started
+        self.bytes = 0
+
+class Console:
+    '''Buffers a frame until flush(). Subclasses send it somewhere by overriding send().'''
+    CLEAR = "\x1b[2J\x1b[H" # Erase the screen and move to the top left
+
+    def __init__(self) -> None:
+        self.frame = []
+        self.stats = RenderStats()
+
+    def write(self, text: str) -> None:
+        self.frame.append(text)
+
+    def clear(self) -> None:
+        self.frame = [self.CLEAR]
+
+    def flush(self) -> None:
+        '''Send the frame, if there is anything in it.'''
+        if self.frame:
+            text = "".join(self.frame)
+            self.frame = []
+            self.stats.frames += 1
+            self.stats.bytes += len(text)
+            self.send(text)
+
+    def send(self, text: str) -> None:
+        pass
+
+class NullConsole(Console):
+    '''Discards everything, for headless runs.'''
+    def write(self, text: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+class TerminalConsole(Console):
+    '''Writes frames straight to the file descriptor of stream (the terminal by default).
+
+    Windows consoles only understand ANSI sequences once virtual terminal processing is turned on.
+    If that can't be done, clear() falls back to spawning cls.'''
+    def __init__(self, stream=None) -> None:
+        super().__init__()
+        self.stream = stream
+        self.shellClear = os.name == "nt" and not enableAnsi()
+
+    def clear(self) -> None:
+        if self.shellClear:
+            self.flush()
+            self.stats.spawns += 1
+            os.system('cls')
+        else:
+            super().clear()
+
+    def send(self, text: str) -> None:
+        stream = self.stream or sys.stdout
+        try:
+            fd = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None # IDLE and other stand-in streams have no file descriptor
+        if fd is None:
+            stream.write(text)
+            stream.flush()
+            self.stats.writes += 1
+            return
+        stream.flush()
+        data = text.encode(getattr(stream, "encoding", None) or "utf-8", errors="replace")
+        while data:
+            written = os.write(fd, data)
+            self.stats.writes += 1
+            data = data[written:]
+
+class LegacyConsole(TerminalConsole):
+    '''How output used to work, for comparison: every line written at once and cls run by the shell.'''
+    def __init__(self, stream=None) -> None:
+        super().__init__(stream)
+        self.shellClear = True
+
+    def write(self, text: str) -> None:
+        self.frame.append(text)
+        self.flush()
+
+    def clear(self) -> None:
+        self.flush()
+        self.stats.spawns += 1
+        # Output goes to the console's stream so a measurement doesn't print shell errors on Linux
+        os.system('cls' if os.name == "nt" else f"cls > {os.devnull} 2>&1")
+
+def enableAnsi() -> bool:
+    '''Turn on ANSI escape handling for the Windows console. True if it is on.'''
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11) # Standard output
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004)) # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except (AttributeError, OSError, ImportError):
+        return False
+
+def measure(paths: list) -> dict:
+    '''Replay the recordings through each console, writing to the null device. Returns {name: (RenderStats, seconds)}.'''
+    import replay
+    results = {}
+    with open(os.devnull, 'w') as sink:
+        for name, console in (("legacy", LegacyConsole(sink)), ("buffered", TerminalConsole(sink))):
+            replayer = replay.Replayer()
+            try:
+                startTime = time.perf_counter()
+                for path in paths:
+                    replayer.replay(path, console)
+                results[name] = (console.stats, time.perf_counter() - startTime)
+            finally:
+                replayer.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Count the writes and process spawns of recorded sessions, old console against new.")
+    parser.add_argument("paths", nargs="+", help="recordings from replay.py, or folders of them")
+    args = parser.parse_args()
+    import replay
+    results = measure(replay.recordingPaths(args.paths))
+    frames = max(1, results["buffered"][0].frames) # One per prompt or pause; the legacy console flushes every line
+    for name, (stats, seconds) in results.items():
+        print(f"{name:>8}: {stats.writes / frames:6.2f} writes and {stats.spawns / frames:5.2f} spawns per frame, "
+              f"{stats.bytes / frames:6.0f} bytes per frame, {seconds / frames * 1e6:8.1f} us per frame ({frames} frames)")
+
+if __name__ == "__main__":
+    main()
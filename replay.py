@@ -0,0 +1,276 @@
+'''Record sessions and replay them headlessly.
+
+A session's rolls all come from its SessionRandom, so its seed plus what the player typed (and when,
+since travel, sleep and rest run on the world clock) is enough to play it again. A recording is a JSON
+lines file: the seed, each saved player the session loaded (with its world timers) or found already
+taken when naming a new character, so the replay can start from the same state, each reply, and
+finally every roll the session made.
+
+Replaying runs the session in a scratch game folder with the recorded players, feeding the recorded
+replies and skipping every Pause by moving a virtual clock instead of sleeping, then checks that the
+same rolls came out. A replay whose rolls differ means the game's rules or menus changed behaviour.
+
+python replay.py record session.log plays from the keyboard while recording.
+python replay.py replay recordings/*.log replays a corpus (python server.py --record recordings/ captures one).
+'''
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import AdventureGame
+import driver
+import render
+
+RECORDING_VERSION = 1
+
+class SessionRecorder:
+    '''Records session (a game from newSession()) to path from now on: gives it a RecordingRandom and
+    becomes its recorder. Run its menus through flow(), and close() when the session ends.'''
+    def __init__(self, path: str, session) -> None:
+        self.file = open(path, 'w')
+        self.session = session
+        self.clock = session.WORLD.clock.source # Real seconds
+        self.rolls = []
+        self.played = set() # Players this session has had, whose state the replay recreates by itself
+        self.saved = set() # Players whose row is in the recording
+        seed = session.sessionSeed(next(session.sessionNumbers))
+        session.rand = AdventureGame.RecordingRandom(seed, self.rolls)
+        session.recorder = self
+        session.PLAYERS = WatchedPlayers(session.PLAYERS, self)
+        session.NAMES = WatchedNames(session.NAMES, self)
+        self.write({"version": RECORDING_VERSION, "seed": seed, "start": self.clock(), "timeScale": session.WORLD.clock.timeScale})
+
+    def write(self, event: dict) -> None:
+        self.file.write(json.dumps(event) + "\n")
+
+    def savedPlayer(self, player) -> None:
+        '''Record the row of a saved player the session found, unless the replay will have it anyway.'''
+        if player.name not in self.played and player.name not in self.saved:
+            self.saved.add(player.name)
+            self.write({"saved": player.toLine(self.session.playerStore.aspects)})
+
+    def loadedPlayer(self, game) -> None:
+        player = game.player
+        if player.name in self.played:
+            return
+        self.played.add(player.name)
+        timers = [(timer.kind, timer.due, timer.amount, timer.bulk) for timer in game.WORLD.timers.get(player.name, ())]
+        self.write({"player": player.toLine(game.playerStore.aspects), "timers": sorted(timers)})
+
+    def flow(self, flow):
+        '''Pass the menu flow through, writing every reply it is sent.'''
+        reply = None
+        while True:
+            try:
+                request = flow.send(reply)
+            except StopIteration as stop:
+                return stop.value
+            if self.session.player:
+                self.played.add(self.session.player.name)
+            reply = yield request
+            if not isinstance(request, AdventureGame.Pause):
+                self.write({"in": reply, "t": self.clock()})
+
+    def close(self) -> None:
+        self.write({"rolls": self.rolls})
+        self.file.close()
+
+class WatchedPlayers:
+    '''Stands in for a recorded session's PLAYERS, telling the recorder about every saved player it is asked about.'''
+    def __init__(self, players, recorder: SessionRecorder) -> None:
+        self.players = players
+        self.recorder = recorder
+
+    def __contains__(self, name: str) -> bool:
+        found = name in self.players
+        if found:
+            self.recorder.savedPlayer(self.players.get(name))
+        return found
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.players, attribute)
+
+class WatchedNames:
+    '''Stands in for a recorded session's NAMES, telling the recorder about every saved player a name prompt finds.'''
+    def __init__(self, names, recorder: SessionRecorder) -> None:
+        self.names = names
+        self.recorder = recorder
+
+    def find(self, name: str) -> list:
+        found = self.names.find(name)
+        for match in found:
+            player = self.recorder.session.PLAYERS.get(match)
+            if player: # Not yet saved by the session creating them otherwise
+                self.recorder.savedPlayer(player)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getattr__(self, attribute: str):
+        return getattr(self.names, attribute)
+
+class VirtualClock:
+    '''Stands in for time.time during a replay. Pauses move it forward instead of sleeping.'''
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+class Replayer:
+    '''Replays recordings against the catalogs in catalogFolder, each in a fresh game in one scratch folder.'''
+    CATALOGS = (AdventureGame.FILE_LOCATIONS, AdventureGame.FILE_ARMORS, AdventureGame.FILE_WEAPONS,
+                AdventureGame.FILE_CREATURES, AdventureGame.FILE_ENCOUNTERS, AdventureGame.FILE_DEFAULT_PLAYERS)
+
+    def __init__(self, catalogFolder: str = ".") -> None:
+        self.folder = tempfile.mkdtemp(prefix="replay-")
+        os.makedirs(os.path.join(self.folder, "bin"))
+        for path in self.CATALOGS:
+            if os.path.exists(os.path.join(catalogFolder, path)):
+                shutil.copy(os.path.join(catalogFolder, path), os.path.join(self.folder, path))
+
+    def close(self) -> None:
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def prepare(self, events: list) -> None:
+        '''Fresh player and world files holding only what the recording loaded.'''
+        with open(os.path.join(self.folder, AdventureGame.FILE_DEFAULT_PLAYERS), 'r') as f:
+            players = f.read()
+        world = "kind,name,due,amount,bulk,\n"
+        restored = set()
+        for event in events:
+            row = event.get("player") or event.get("saved")
+            name = row.split(AdventureGame.CSV_DELIM)[0] if row else None
+            if name is not None and name not in restored: # Later loads of the same player are replayed, not restored
+                restored.add(name)
+                players += row
+            if "timers" in event:
+                for kind, due, amount, bulk in event["timers"]:
+                    world += f"{kind},{name},{due!r},{amount},{'yes' if bulk else 'no'},\n"
+        for path, text in ((AdventureGame.FILE_PLAYERS, players), (AdventureGame.FILE_WORLD, world)):
+            with open(os.path.join(self.folder, path), 'w', newline='') as f:
+                f.write(text)
+        for path in (AdventureGame.FILE_PLAYERS + ".journal", AdventureGame.FILE_DATABASE, AdventureGame.FILE_DATABASE + "-wal", AdventureGame.FILE_DATABASE + "-shm"):
+            path = os.path.join(self.folder, path) # Left by the last replay; the database would be imported from players.csv again
+            if os.path.exists(path):
+                os.remove(path)
+
+    def replay(self, path: str, console: render.Console = None) -> dict:
+        '''Replay one recording, showing it on console (by default nowhere).
+        Returns the replies fed, the rolls made, and where the rolls first differ (None if they don't).'''
+        with open(path, 'r') as f:
+            events = [json.loads(line) for line in f]
+        header, events = events[0], events[1:]
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {header.get('version')}!")
+        recordedRolls = events.pop()["rolls"] if events and "rolls" in events[-1] else None
+        replies = [event for event in events if "in" in event]
+        self.prepare(events)
+        previous = os.getcwd()
+        os.chdir(self.folder)
+        token = AdventureGame.CONSOLE.set(console or render.NullConsole())
+        try:
+            game = AdventureGame.AdventureGame()
+            try:
+                clock = VirtualClock(header["start"])
+                game.WORLD.clock.source = clock
+                game.WORLD.clock.timeScale = header["timeScale"]
+                game.rand = AdventureGame.RecordingRandom(header["seed"])
+                fed = self.drive(driver.sessionMenus(game), replies, clock)
+            finally:
+                game.close()
+        finally:
+            AdventureGame.CONSOLE.reset(token)
+            os.chdir(previous)
+        rolls = game.rand.rolls
+        divergence = None
+        if recordedRolls is not None and rolls != recordedRolls:
+            divergence = next((i for i, (a, b) in enumerate(zip(rolls, recordedRolls)) if a != b), min(len(rolls), len(recordedRolls)))
+        return {"replies": fed, "rolls": len(rolls), "divergence": divergence}
+
+    @staticmethod
+    def drive(flow, replies: list, clock: VirtualClock) -> int:
+        '''Run flow on the recorded replies as fast as it goes. Returns how many replies were used.'''
+        fed = 0
+        console = AdventureGame.CONSOLE.get()
+        try:
+            request = next(flow)
+            while True:
+                if not isinstance(request, AdventureGame.Pause):
+                    console.write(request)
+                console.flush()
+                if isinstance(request, AdventureGame.Pause):
+                    clock.now += request.seconds
+                    reply = None
+                elif fed < len(replies):
+                    clock.now = max(clock.now, replies[fed]["t"])
+                    reply = replies[fed]["in"]
+                    fed += 1
+                else:
+                    break # The recording ends here, e.g. the player hung up
+                request = flow.send(reply)
+        except StopIteration:
+            pass
+        finally:
+            flow.close()
+            console.flush()
+        return fed
+
+def recordingPaths(paths: list) -> list:
+    '''paths with every folder replaced by the recordings in it.'''
+    found = []
+    for path in paths:
+        found.extend(sorted(glob.glob(os.path.join(path, "*.log"))) if os.path.isdir(path) else [path])
+    return found
+
+def replayAll(paths: list, catalogFolder: str = ".") -> list:
+    '''(path, result) for every recording, replayed one after another.'''
+    replayer = Replayer(catalogFolder)
+    try:
+        return [(path, replayer.replay(path)) for path in paths]
+    finally:
+        replayer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a session, or replay recorded sessions and check their rolls.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="play from the keyboard while recording")
+    record.add_argument("path")
+    replay = commands.add_parser("replay", help="replay recordings headlessly")
+    replay.add_argument("paths", nargs="+", help="recordings, or folders of them")
+    args = parser.parse_args()
+    if args.command == "record":
+        game = AdventureGame.AdventureGame()
+        session = game.newSession()
+        recorder = SessionRecorder(args.path, session)
+        try:
+            AdventureGame.runInteractive(recorder.flow(driver.sessionMenus(session)))
+        finally:
+            recorder.close()
+            game.close()
+        return
+    startTime = time.perf_counter()
+    results = replayAll(recordingPaths(args.paths))
+    elapsed = time.perf_counter() - startTime
+    diverged = 0
+    for path, result in results:
+        if result["divergence"] is not None:
+            diverged += 1
+            print(f"{path}: rolls differ from roll {result['divergence']} on ({result['replies']} replies replayed)")
+    print(f"Replayed {len(results)} sessions in {elapsed:.2f}s ({elapsed / max(1, len(results)) * 1000:.1f} ms each), {diverged} diverged")
+    if diverged:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+'''Multi-session game server.
+
+Hosts many players in one process over a telnet-style line protocol. Every connection gets its own
+AdventureGame session (its own player) that shares the catalogs and saved players loaded once at startup.
+The menus are generators (see AdventureGame.runInteractive), so a session costs one suspended generator
+stack instead of a thread.
+
+Run from the game folder: python server.py --port 4401, then connect with: telnet localhost 4401
+python server.py --measure 1000 connects that many local clients and reports memory per session.
+With --metrics-port 9401 the hot-path latencies (see metrics.py) are served as Prometheus text.
+With --record recordings/ every session is recorded there for replay.py.
+'''
+import argparse
+import asyncio
+import os
+import re
+import time
+import tracemalloc
+
+import AdventureGame
+import driver
+import metrics
+import render
+import replay
+
+# Telnet option negotiation, and the Ctrl-C a telnet client sends as "interrupt process"
+TELNET_COMMAND = re.compile(rb"\xff[\xfb-\xfe].|\xff[\xf0-\xfa]")
+TELNET_INTERRUPT = (b"\xff\xf4", b"\x03")
+
+class SocketConsole(render.Console):
+    '''Console for one connection. Each frame goes to the transport in one write.'''
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        super().__init__()
+        self.writer = writer
+
+    def send(self, text: str) -> None:
+        self.writer.write(text.replace("\n", "\r\n").encode())
+        self.stats.writes += 1
+
+class GameServer:
+    def __init__(self, game: AdventureGame.AdventureGame, recordFolder: str = None) -> None:
+        self.game = game
+        self.recordFolder = recordFolder
+        self.sessions = 0
+        self.server = None
+        self.ticker = None
+
+    async def start(self, host: str, port: int):
+        self.server = await asyncio.start_server(self.handleSession, host, port)
+        self.ticker = asyncio.create_task(self.tickWorld())
+        return self.server
+
+    async def tickWorld(self, interval: float = 1.0) -> None:
+        '''Run the world's due timers (travel, sleep, rest) for every player, connected or not.'''
+        while True:
+            self.game.tick()
+            await asyncio.sleep(interval)
+
+    async def readReply(self, reader: asyncio.StreamReader):
+        '''Read one line. Returns None if the user cancelled, raises ConnectionError when they hang up.'''
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Client disconnected")
+        if any(interrupt in line for interrupt in TELNET_INTERRUPT):
+            return None
+        return TELNET_COMMAND.sub(b"", line).decode(errors="replace").strip("\r\n")
+
+    async def handleSession(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Each connection runs in its own task, so setting the console here only affects this session.
+        console = SocketConsole(writer)
+        AdventureGame.CONSOLE.set(console)
+        session = self.game.newSession()
+        flow = driver.sessionMenus(session)
+        if self.recordFolder:
+            flow = replay.SessionRecorder(os.path.join(self.recordFolder, f"{time.time_ns()}-{id(session):x}.log"), session).flow(flow)
+        self.sessions += 1
+        try:
+            AdventureGame.say("Welcome to your own Epic Super Adventure!\n")
+            request = next(flow)
+            while True:
+                if isinstance(request, AdventureGame.Pause):
+                    console.flush()
+                    await asyncio.sleep(request.seconds)
+                    reply = None
+                else:
+                    console.write(request)
+                    console.flush()
+                    await writer.drain()
+                    reply = await self.readReply(reader)
+                request = flow.send(reply)
+        except StopIteration:
+            pass
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            flow.close()
+            session.releasePlayer()
+            if session.recorder:
+                session.recorder.close()
+            self.sessions -= 1
+            if not writer.is_closing():
+                console.flush() # Goodbye
+            writer.close()
+
+async def serveMetrics(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    '''Answer any HTTP request with metrics.prometheusText(), for a Prometheus scraper or curl.'''
+    try:
+        while (await reader.readline()).strip():
+            pass # Skip the request line and headers
+        body = metrics.prometheusText().encode()
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def serve(host: str, port: int, metricsPort: int = None, recordFolder: str = None, storage: str = None) -> None:
+    if metricsPort is not None and not metrics.enabled():
+        metrics.enable()
+    game = AdventureGame.AdventureGame(storage=storage)
+    print(game.startupReport())
+    if recordFolder:
+        os.makedirs(recordFolder, exist_ok=True)
+    server = await GameServer(game, recordFolder).start(host, port)
+    print(f"Serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}")
+    if metricsPort is not None:
+        await asyncio.start_server(serveMetrics, host, metricsPort)
+        print(f"Metrics on http://{host}:{metricsPort}/metrics")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        game.close()
+
+async def measure(count: int, storage: str = None) -> None:
+    '''Log count local clients into new characters and report the memory each session holds.'''
+    game = AdventureGame.AdventureGame(storage=storage)
+    gameServer = GameServer(game)
+    server = await gameServer.start("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    startTime = time.perf_counter()
+    clients = []
+    for i in range(count):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # New game, name, species, starter bonus, location, weapon, armor
+        writer.write(f"1\nmeasure{i}-{time.time_ns()}\nTester\n1\n1\n1\n1\n".encode())
+        clients.append((reader, writer))
+    await asyncio.gather(*(reader.readuntil(b"Save & Quit to Main Menu") for reader, _ in clients))
+    elapsed = time.perf_counter() - startTime
+    after = tracemalloc.take_snapshot()
+    used = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    print(f"{gameServer.sessions} sessions logged in in {elapsed:.2f}s")
+    print(f"{used / count / 1024:.1f} KB per session (both ends of each local connection included)")
+    for _, writer in clients:
+        writer.close()
+    while gameServer.sessions:
+        await asyncio.sleep(0.01)
+    gameServer.ticker.cancel()
+    server.close()
+    await server.wait_closed()
+    game.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Epic Super Adventure sessions over TCP.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4401)
+    parser.add_argument("--measure", type=int, metavar="SESSIONS", help="measure memory per session with local clients, then exit")
+    parser.add_argument("--metrics-port", type=int, help="serve hot-path latencies as Prometheus text on this port")
+    parser.add_argument("--record", metavar="FOLDER", help="record every session to FOLDER for replay.py")
+    parser.add_argument("--storage", choices=AdventureGame.STORAGE, help="where to keep players (default: ADVENTURE_STORAGE, or csv)")
+    args = parser.parse_args()
+    if args.measure:
+        asyncio.run(measure(args.measure, args.storage))
+    else:
+        asyncio.run(serve(args.host, args.port, args.metrics_port, args.record, args.storage))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+'''Headless combat simulator.
+
+Resolves fights with the same rules as AdventureGame.fightMenu, but without any menus, printing or
+clearing, so weapons and armors can be balance tested in bulk. A policy plays the player's side.
+
+Run from the game folder: python simulator.py --trials 1000 --seed 1 --out balance.csv
+With NumPy installed (see requirements-optional.txt), --vectorized advances whole batches of fights at once: python simulator.py --vectorized --trials 10000 --out balance.json
+--encounters draws hostiles from the same spawn tables as the game: python simulator.py --encounters --place caves --out caves.csv
+'''
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import AdventureGame
+from AdventureGame import (HEAL_PER_TURN, approachDistance, attackDamage, escapeSucceeds, failedEscapeDistance,
+                           fightRewards, hostileApproachDistance, lootDrops, mitigateDamage, retreatDistance, startDistance)
+
+ACTIONS_IN_RANGE = ("attack", "retreat")
+ACTIONS_OUT_OF_RANGE = ("approach", "wait", "escape", "heal")
+MAX_TURNS = 500
+
+class FightState:
+    '''What a policy can see at the start of a player turn.'''
+    __slots__ = ("hostile", "weapon", "armor", "speed", "distance", "playerHP", "playerBaseHP", "hostileHP", "turn", "withinRange")
+
+    def __init__(self, hostile, weapon, armor, speed: int, distance: int, playerHP: int, playerBaseHP: int) -> None:
+        self.hostile = hostile
+        self.weapon = weapon
+        self.armor = armor
+        self.speed = speed
+        self.distance = distance
+        self.playerHP = playerHP
+        self.playerBaseHP = playerBaseHP
+        self.hostileHP = hostile.baseHealth
+        self.turn = 0
+        self.withinRange = False
+
+class FightResult:
+    __slots__ = ("outcome", "turns", "damageDealt", "damageTaken", "gold", "exp", "drops")
+
+    def __init__(self) -> None:
+        self.outcome = None # "won", "died", "escaped" or "stalemate"
+        self.turns = 0
+        self.damageDealt = 0
+        self.damageTaken = 0
+        self.gold = 0
+        self.exp = 0
+        self.drops = ()
+
+# Player policies take a FightState and return one of ACTIONS_IN_RANGE or ACTIONS_OUT_OF_RANGE.
+def aggressivePolicy(state: FightState) -> str:
+    '''Always close in and attack.'''
+    return "attack" if state.withinRange else "approach"
+
+def cautiousPolicy(state: FightState) -> str:
+    '''Attack in range, patch wounds while out of range, and run when badly hurt.'''
+    if state.withinRange:
+        return "attack"
+    if state.playerHP * 4 <= state.playerBaseHP:
+        return "escape"
+    if state.playerHP < state.playerBaseHP:
+        return "heal"
+    return "approach"
+
+def kitingPolicy(state: FightState) -> str:
+    '''Back off whenever the hostile could hit back, otherwise attack or wait.'''
+    if state.withinRange:
+        if state.distance <= state.hostile.weapon.range and state.weapon.range > state.hostile.weapon.range:
+            return "retreat"
+        return "attack"
+    return "wait"
+
+POLICIES = {"aggressive": aggressivePolicy, "cautious": cautiousPolicy, "kiting": kitingPolicy}
+
+def playerSpeed(baseSpeed: int, armor) -> int:
+    '''Same as Player.updateSpeed.'''
+    return math.ceil(baseSpeed - (armor.speedPenalty * baseSpeed))
+
+def simulateFight(weapon, armor, hostile, policy=aggressivePolicy, rand=random, baseHealth: int = 10, baseSpeed: int = 30,
+                  currentHealth: int = None) -> FightResult:
+    '''Resolve one fight between a player with the given gear and hostile.'''
+    result = FightResult()
+    state = FightState(hostile, weapon, armor, playerSpeed(baseSpeed, armor), startDistance(rand),
+                       baseHealth if currentHealth is None else currentHealth, baseHealth)
+    hostileWep = hostile.weapon
+    while state.turn < MAX_TURNS:
+        state.turn += 1
+        state.withinRange = weapon.range >= state.distance
+        action = policy(state)
+        # PLAYER TURN
+        if state.withinRange:
+            if action == "attack":
+                damageDealt = attackDamage(weapon, hostile.armor, rand)
+                state.hostileHP -= damageDealt
+                result.damageDealt += damageDealt
+                if state.hostileHP <= 0:
+                    result.outcome = "won"
+                    result.gold, result.exp = fightRewards(hostile, rand)
+                    result.drops = tuple(item.name for item in lootDrops(hostile, weapon, armor, rand))
+                    break
+            elif action == "retreat":
+                state.distance = retreatDistance(state.distance, state.speed, hostile, rand)
+            else:
+                raise ValueError(f"Policy chose '{action}' but only {ACTIONS_IN_RANGE} are available within range!")
+        else:
+            if action == "approach":
+                state.distance = approachDistance(state.distance, state.speed)
+            elif action == "wait":
+                pass
+            elif action == "escape":
+                if escapeSucceeds(state.distance, state.speed, hostile, rand):
+                    result.outcome = "escaped"
+                    break
+                state.distance = failedEscapeDistance(state.distance, hostile, rand)
+            elif action == "heal" and state.playerHP < state.playerBaseHP:
+                state.playerHP += min(HEAL_PER_TURN, state.playerBaseHP - state.playerHP)
+            else:
+                raise ValueError(f"Policy chose '{action}' but only {ACTIONS_OUT_OF_RANGE} are available out of range!")
+        # HOSTILE TURN
+        if hostileWep.range < state.distance:
+            state.distance = hostileApproachDistance(state.distance, hostile, action == "heal" or action == "wait", rand)
+        if hostileWep.range >= state.distance and action != "approach" and action != "wait":
+            damageTaken = mitigateDamage(rand.choice(hostileWep.damage), hostileWep.damageType, armor)
+            state.playerHP = max(0, state.playerHP - damageTaken)
+            result.damageTaken += damageTaken
+            if state.playerHP <= 0:
+                result.outcome = "died"
+                break
+    else:
+        result.outcome = "stalemate"
+    result.turns = state.turn
+    return result
+
+PERCENTILES = (50, 90, 99) # Reported for kill turns and damage, besides the mean
+
+def percentiles(counts: Counter) -> list:
+    '''Nearest-rank PERCENTILES of a value -> occurrences Counter, 0 for each if it is empty.'''
+    total = sum(counts.values())
+    if not total:
+        return [0] * len(PERCENTILES)
+    found = []
+    ranks = iter(math.ceil(percent / 100 * total) for percent in PERCENTILES)
+    rank = next(ranks)
+    seen = 0
+    for value, count in sorted(counts.items()):
+        seen += count
+        while rank is not None and seen >= rank:
+            found.append(value)
+            rank = next(ranks, None)
+        if rank is None:
+            break
+    return found
+
+class MatchupStats:
+    '''Aggregated results of many fights for one weapon, armor and creature.'''
+    def __init__(self) -> None:
+        self.fights = 0
+        self.outcomes = Counter()
+        self.killTurns = Counter() # turns -> fights won in that many turns
+        self.damageDealt = Counter()
+        self.damageTaken = Counter()
+        self.gold = 0
+        self.exp = 0
+        self.drops = Counter()
+
+    def add(self, result: FightResult) -> None:
+        self.fights += 1
+        self.outcomes[result.outcome] += 1
+        if result.outcome == "won":
+            self.killTurns[result.turns] += 1
+        self.damageDealt[result.damageDealt] += 1
+        self.damageTaken[result.damageTaken] += 1
+        self.gold += result.gold
+        self.exp += result.exp
+        self.drops.update(result.drops)
+
+    def merge(self, other: "MatchupStats") -> None:
+        self.fights += other.fights
+        self.outcomes.update(other.outcomes)
+        self.killTurns.update(other.killTurns)
+        self.damageDealt.update(other.damageDealt)
+        self.damageTaken.update(other.damageTaken)
+        self.gold += other.gold
+        self.exp += other.exp
+        self.drops.update(other.drops)
+
+    def winRate(self) -> float:
+        return self.outcomes["won"] / self.fights if self.fights else 0.0
+
+    def meanKillTurns(self) -> float:
+        wins = sum(self.killTurns.values())
+        return sum(turns * count for turns, count in self.killTurns.items()) / wins if wins else 0.0
+
+    def summary(self) -> dict:
+        return {"fights": self.fights,
+                "winRate": self.winRate(),
+                "deathRate": self.outcomes["died"] / self.fights if self.fights else 0.0,
+                "escapeRate": self.outcomes["escaped"] / self.fights if self.fights else 0.0,
+                "meanKillTurns": self.meanKillTurns(),
+                "meanDamageDealt": sum(dmg * count for dmg, count in self.damageDealt.items()) / self.fights if self.fights else 0.0,
+                "meanDamageTaken": sum(dmg * count for dmg, count in self.damageTaken.items()) / self.fights if self.fights else 0.0,
+                "meanGold": self.gold / self.fights if self.fights else 0.0,
+                "meanExp": self.exp / self.fights if self.fights else 0.0,
+                **self.distribution("killTurns", self.killTurns),
+                **self.distribution("damageDealt", self.damageDealt),
+                **self.distribution("damageTaken", self.damageTaken)}
+
+    @staticmethod
+    def distribution(name: str, counts: Counter) -> dict:
+        '''{name + "P50": value, ...} for each of PERCENTILES.'''
+        return {f"{name}P{percent}": value for percent, value in zip(PERCENTILES, percentiles(counts))}
+
+def matchupRandom(seed, weapon, armor, creature) -> random.Random:
+    '''Independent, reproducible stream for one matchup.'''
+    return random.Random(f"{seed}:{weapon.name}:{armor.name}:{creature.name}")
+
+def runMatrix(weapons, armors, creatures, trials: int, seed=0, policy=aggressivePolicy, baseHealth: int = 10, baseSpeed: int = 30) -> dict:
+    '''Simulate trials fights for every weapon x armor x creature. Returns {(weapon, armor, creature): MatchupStats}.'''
+    matrix = {}
+    for weapon in weapons:
+        for armor in armors:
+            for creature in creatures:
+                rand = matchupRandom(seed, weapon, armor, creature)
+                stats = MatchupStats()
+                for _ in range(trials):
+                    stats.add(simulateFight(weapon, armor, creature, policy, rand, baseHealth, baseSpeed))
+                matrix[(weapon.name, armor.name, creature.name)] = stats
+    return matrix
+
+def runEncounters(weapons, armors, encounters, trials: int, seed=0, policy=aggressivePolicy, baseHealth: int = 10, baseSpeed: int = 30,
+                  location: str = None, place: str = None) -> dict:
+    '''Simulate trials fights per weapon x armor against hostiles drawn from the same encounter table fightMenu
+    uses at place near location. Returns {(weapon, armor, creature): MatchupStats} for the creatures that spawned.'''
+    matrix = {}
+    for weapon in weapons:
+        for armor in armors:
+            rand = random.Random(f"{seed}:{weapon.name}:{armor.name}:{location}:{place}")
+            for _ in range(trials):
+                hostile = encounters.choose(baseHealth, location, place, rand)
+                key = (weapon.name, armor.name, hostile.name)
+                if key not in matrix:
+                    matrix[key] = MatchupStats()
+                matrix[key].add(simulateFight(weapon, armor, hostile, policy, rand, baseHealth, baseSpeed))
+    return matrix
+
+# Vectorized mode. Each array element is one fight; every pass of the loop in simulateBatch is one
+# turn of fightMenu for all fights still running. Only the built-in policies can be vectorized.
+ATTACK, RETREAT, APPROACH, WAIT, ESCAPE, HEAL = range(6)
+RUNNING, WON, DIED, ESCAPED, STALEMATE = range(5)
+
+def batchAggressivePolicy(f: dict):
+    return np.where(f["within"], ATTACK, APPROACH)
+
+def batchCautiousPolicy(f: dict):
+    outOfRange = np.where(f["playerHP"] * 4 <= f["baseHP"], ESCAPE, np.where(f["playerHP"] < f["baseHP"], HEAL, APPROACH))
+    return np.where(f["within"], ATTACK, outOfRange)
+
+def batchKitingPolicy(f: dict):
+    kite = (f["distance"] <= f["cRange"]) & (f["wRange"] > f["cRange"])
+    return np.where(f["within"], np.where(kite, RETREAT, ATTACK), WAIT)
+
+BATCH_POLICIES = {"aggressive": batchAggressivePolicy, "cautious": batchCautiousPolicy, "kiting": batchKitingPolicy}
+
+def batchChance(generator, chance):
+    '''Vectorized AdventureGame.rng.'''
+    return (chance >= 100) | ((chance > 0) & (generator.integers(0, 101, size=len(chance)) <= chance))
+
+def simulateBatch(weapons, armors, creatures, trials: int, seed=0, policy: str = "aggressive", baseHealth: int = 10,
+                  baseSpeed: int = 30, batchSize: int = 1_000_000) -> dict:
+    '''Vectorized runMatrix. Returns {(weapon, armor, creature): summary dict} with win, death and escape
+    probabilities and the expected gold and exp per fight.'''
+    if np is None:
+        raise ImportError("Vectorized simulation needs NumPy. Install it with 'pip install numpy'.")
+    policyFunc = BATCH_POLICIES[policy]
+    combos = [(weapon, armor, creature) for weapon in weapons for armor in armors for creature in creatures]
+    seedSequence = np.random.SeedSequence(list(str(seed).encode()))
+    combosPerChunk = max(1, batchSize // trials)
+    chunkStarts = range(0, len(combos), combosPerChunk)
+    children = seedSequence.spawn(len(chunkStarts)) # One independent stream per chunk
+    report = {}
+    for chunkIndex, chunkStart in enumerate(chunkStarts):
+        chunk = combos[chunkStart:chunkStart + combosPerChunk]
+        generator = np.random.default_rng(children[chunkIndex])
+        outcome, gold, exp = runBatch(chunk, trials, generator, policyFunc, baseHealth, baseSpeed)
+        comboIndex = np.repeat(np.arange(len(chunk)), trials)
+        counts = [np.bincount(comboIndex, weights=(outcome == result), minlength=len(chunk)) for result in (WON, DIED, ESCAPED)]
+        goldSums = np.bincount(comboIndex, weights=gold, minlength=len(chunk))
+        expSums = np.bincount(comboIndex, weights=exp, minlength=len(chunk))
+        for i, (weapon, armor, creature) in enumerate(chunk):
+            report[(weapon.name, armor.name, creature.name)] = {
+                "fights": trials,
+                "winRate": counts[0][i] / trials,
+                "deathRate": counts[1][i] / trials,
+                "escapeRate": counts[2][i] / trials,
+                "meanGold": goldSums[i] / trials,
+                "meanExp": expSums[i] / trials}
+    return report
+
+def runBatch(combos: list, trials: int, generator, policyFunc, baseHealth: int, baseSpeed: int) -> tuple:
+    '''Run trials fights for every combo. Returns per-fight (outcome, gold, exp) arrays.'''
+    def column(values, dtype=np.int64):
+        return np.repeat(np.array(values, dtype=dtype), trials)
+    # Fights are compacted out of f as they finish; idx maps the survivors back to their result slot.
+    f = {"wRange": column([w.range for w, a, c in combos]),
+         "wLo": column([w.damage.start for w, a, c in combos]),
+         "wHi": column([w.damage.stop for w, a, c in combos]),
+         "wType": column([w.damageType for w, a, c in combos]),
+         "aProt": column([a.protection for w, a, c in combos], np.float64),
+         "aType": column([a.protectionType for w, a, c in combos]),
+         "speed": column([playerSpeed(baseSpeed, a) for w, a, c in combos]),
+         "cHP": column([c.baseHealth for w, a, c in combos]),
+         "cSpeed": column([c.baseSpeed for w, a, c in combos]),
+         "cRange": column([c.weapon.range for w, a, c in combos]),
+         "cLo": column([c.weapon.damage.start for w, a, c in combos]),
+         "cHi": column([c.weapon.damage.stop for w, a, c in combos]),
+         "cType": column([c.weapon.damageType for w, a, c in combos]),
+         "cProt": column([c.armor.protection for w, a, c in combos], np.float64),
+         "cArmorType": column([c.armor.protectionType for w, a, c in combos])}
+    count = len(combos) * trials
+    f["baseHP"] = np.full(count, baseHealth, dtype=np.int64)
+    f["playerHP"] = f["baseHP"].copy()
+    f["hostileHP"] = f["cHP"].copy()
+    f["distance"] = generator.integers(AdventureGame.FIGHT_START_DISTANCE[0], AdventureGame.FIGHT_START_DISTANCE[1] + 1, size=count)
+    idx = np.arange(count)
+    outcome = np.full(count, STALEMATE, dtype=np.int8)
+    gold = np.zeros(count, dtype=np.int64)
+    exp = np.zeros(count, dtype=np.int64)
+
+    for _ in range(MAX_TURNS):
+        if len(idx) == 0:
+            break
+        n = len(idx)
+        done = np.full(n, RUNNING, dtype=np.int8)
+        f["within"] = f["wRange"] >= f["distance"]
+        action = policyFunc(f)
+        # PLAYER TURN
+        attack = f["within"] & (action == ATTACK)
+        damage = generator.integers(f["wLo"], f["wHi"])
+        damage = np.where(f["wType"] == f["cArmorType"], damage - np.ceil(f["cProt"] * damage).astype(np.int64), damage)
+        f["hostileHP"] = np.where(attack, f["hostileHP"] - damage, f["hostileHP"])
+        won = attack & (f["hostileHP"] <= 0)
+        done[won] = WON
+        gold[idx[won]] = generator.integers(f["cHP"][won] // 4, f["cHP"][won] + 1)
+        exp[idx[won]] = generator.integers(f["cHP"][won] // 2, f["cHP"][won] + 1)
+
+        retreat = f["within"] & (action == RETREAT)
+        hostileApproach = generator.integers(f["cSpeed"] // 2, f["cSpeed"] + 1)
+        f["distance"] = np.where(retreat, np.maximum(1, f["distance"] + f["speed"] - hostileApproach), f["distance"])
+        approach = ~f["within"] & (action == APPROACH)
+        f["distance"] = np.where(approach, np.maximum(1, f["distance"] - f["speed"]), f["distance"])
+        escape = ~f["within"] & (action == ESCAPE)
+        escaped = escape & (batchChance(generator, np.full(n, AdventureGame.ESCAPE_CHANCE)) | (f["speed"] > f["cSpeed"] + 20)
+                            | (f["distance"] > f["speed"] - (f["cSpeed"] + 20)))
+        done[escaped] = ESCAPED
+        failedEscape = escape & ~escaped
+        slip = generator.integers(-(f["cSpeed"] // 2), f["cSpeed"] + 1)
+        f["distance"] = np.where(failedEscape, f["distance"] + slip, f["distance"])
+        heal = ~f["within"] & (action == HEAL)
+        f["playerHP"] = np.where(heal, f["playerHP"] + np.minimum(HEAL_PER_TURN, f["baseHP"] - f["playerHP"]), f["playerHP"])
+        waited = ~f["within"] & (action == WAIT)
+
+        # HOSTILE TURN
+        running = done == RUNNING
+        closing = running & (f["cRange"] < f["distance"])
+        unhurried = heal | waited
+        fast = generator.integers(f["cSpeed"], f["cSpeed"] * 2 + 1)
+        slow = generator.integers(np.floor(f["cSpeed"] * 0.75).astype(np.int64), f["cSpeed"] + 1)
+        f["distance"] = np.where(closing, np.maximum(1, f["distance"] - np.where(unhurried, fast, slow)), f["distance"])
+        hits = running & (f["cRange"] >= f["distance"]) & ~approach & ~waited
+        damage = generator.integers(f["cLo"], f["cHi"])
+        damage = np.where(f["cType"] == f["aType"], np.ceil(damage - f["aProt"] * damage).astype(np.int64), damage)
+        f["playerHP"] = np.where(hits, np.maximum(0, f["playerHP"] - damage), f["playerHP"])
+        done[hits & (f["playerHP"] <= 0)] = DIED
+
+        finished = done != RUNNING
+        outcome[idx[finished]] = done[finished]
+        keep = ~finished
+        idx = idx[keep]
+        for key in f:
+            f[key] = f[key][keep]
+    return outcome, gold, exp
+
+def writeReport(report: dict, path: str, keyFields: tuple = ("weapon", "armor", "creature")) -> None:
+    '''Write a {key: summary} report as JSON or, for any other extension, CSV. keyFields names the parts of each key.'''
+    rows = [{**dict(zip(keyFields, key)), **summary} for key, summary in report.items()]
+    if path.endswith(".json"):
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=1)
+        return
+    with open(path, 'w', newline='') as f:
+        if rows:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate every weapon x armor x creature matchup without a human at the keyboard.")
+    parser.add_argument("--trials", type=int, default=1000, help="fights per matchup")
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="aggressive")
+    parser.add_argument("--health", type=int, default=10, help="player base health")
+    parser.add_argument("--speed", type=int, default=30, help="player base speed")
+    parser.add_argument("--vectorized", action="store_true", help="simulate batches of fights as NumPy arrays")
+    parser.add_argument("--encounters", action="store_true", help="draw hostiles from the encounter tables instead of fighting every creature")
+    parser.add_argument("--location", default=None, help="location whose encounter table --encounters uses")
+    parser.add_argument("--place", default=None, help="fight place (see PLACES_FIGHT) whose encounter table --encounters uses")
+    parser.add_argument("--out", default="balance.csv", help="report path; .json for JSON, otherwise CSV")
+    args = parser.parse_args()
+
+    # Only the catalogs: AdventureGame() would also open the players and world files and start its save thread
+    catalogs = AdventureGame.readCatalogs("locations", "creatures") if args.encounters else AdventureGame.readCatalogs("creatures")
+    weapons, armors = catalogs["weapons"], catalogs["armors"]
+    hostiles = catalogs["creatures"].view(lambda creature: not creature.friendly)
+    startTime = time.perf_counter()
+    if args.encounters:
+        rows = AdventureGame.readEncounters(AdventureGame.FILE_ENCOUNTERS, catalogs["locations"]) if os.path.exists(AdventureGame.FILE_ENCOUNTERS) else ()
+        matrix = runEncounters(weapons, armors, AdventureGame.Encounters(hostiles, rows), args.trials, args.seed, POLICIES[args.policy], args.health, args.speed,
+                               args.location, args.place)
+        report = {key: stats.summary() for key, stats in sorted(matrix.items())}
+    elif args.vectorized:
+        try:
+            report = simulateBatch(weapons, armors, hostiles, args.trials, args.seed, args.policy, args.health, args.speed)
+        except ImportError as error:
+            parser.error(str(error))
+    else:
+        matrix = runMatrix(weapons, armors, hostiles, args.trials, args.seed, POLICIES[args.policy], args.health, args.speed)
+        report = {key: stats.summary() for key, stats in matrix.items()}
+    elapsed = time.perf_counter() - startTime
+    writeReport(report, args.out)
+    fights = sum(summary["fights"] for summary in report.values())
+    print(f"Simulated {fights} fights in {elapsed:.1f}s ({fights / elapsed:,.0f} fights/s). Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
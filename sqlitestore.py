@@ -0,0 +1,258 @@
+'''SQLite storage for saved players and the compiled catalogs, instead of bin/players.csv and bin/catalog.snapshot.
+
+Each player is one row keyed by name. The row keeps the player's players.csv line in the current layout,
+so the game builds Players the same way from either backend, plus copies of level, exp and gold under an
+index in scoreboard order. Name checks and loads are primary key lookups, and scoreboard pages and ranks
+are index range scans, so none of them read every player. The database runs in WAL mode and every
+saveMany is one transaction: a SaveQueue batch is applied completely or not at all without a journal
+file. Statements take ? parameters, so sqlite3 prepares each once and reuses it from its statement cache.
+
+Use it with ADVENTURE_STORAGE=sqlite. The first start imports bin/players.csv, if there is one, and the
+CSV file is left alone from then on (admin.py and migrations.py work on the CSV file only).
+'''
+import marshal
+import sqlite3
+from threading import RLock
+
+from migrations import RowUpgrader, readLayout
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (name TEXT PRIMARY KEY, level INTEGER NOT NULL, exp INTEGER NOT NULL,
+                                    gold INTEGER NOT NULL, line TEXT NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS playersByScore ON players (level DESC, exp DESC, gold DESC, name);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS catalog (id INTEGER PRIMARY KEY CHECK (id = 0), signature BLOB NOT NULL, snapshot BLOB NOT NULL);
+'''
+BATCH = 500 # Names per IN (...) query, well under SQLite's limit on parameters
+
+class SqliteStorage:
+    '''One database file holding the players and the catalog snapshot. importRows, if given, returns the
+    rows of the players.csv this database replaces; they are copied in when the database is created.'''
+    def __init__(self, path: str, defaultPath: str, importRows=None) -> None:
+        self.path = path
+        self.defaultPath = defaultPath
+        self.importRows = importRows
+        self.lock = RLock() # The SaveQueue writes from its own thread
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None) # Transactions are explicit
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.synchronous = None
+        self.db.executescript(SCHEMA)
+
+    def setSync(self, sync: bool) -> None:
+        '''With sync, a commit is on disk before it returns; without, WAL mode still survives process crashes.'''
+        if sync != self.synchronous:
+            self.db.execute(f"PRAGMA synchronous={'FULL' if sync else 'NORMAL'}")
+            self.synchronous = sync
+
+    def readSnapshot(self, signature: tuple):
+        with self.lock:
+            found = self.db.execute("SELECT signature, snapshot FROM catalog WHERE id = 0").fetchone()
+        try:
+            if found is None or marshal.loads(found[0]) != signature:
+                return None
+            return marshal.loads(found[1])
+        except (EOFError, ValueError, TypeError):
+            return None
+
+    def writeSnapshot(self, signature: tuple, snapshot: dict) -> None:
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO catalog VALUES (0, ?, ?)", (marshal.dumps(signature), marshal.dumps(snapshot)))
+
+    def dropSnapshot(self) -> None:
+        with self.lock:
+            self.db.execute("DELETE FROM catalog")
+
+    def openPlayers(self):
+        return SqlitePlayerStore(self, self.defaultPath, self.importRows)
+
+    def leaderboard(self, store, loadScores, flush):
+        return SqlLeaderboard(store, flush)
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+class SqlitePlayerStore:
+    '''The PlayerStore interface over the players table.'''
+    TRANSACTIONAL = True # saveMany is atomic, so the SaveQueue needs no journal
+
+    def __init__(self, storage: SqliteStorage, defaultPath: str, importRows=None) -> None:
+        self.storage = storage
+        self.db = storage.db
+        self.lock = storage.lock
+        self.path = storage.path
+        self.badRows = 0
+        self.duplicates = 0 # A name is a primary key
+        self.version, self.aspects = readLayout(defaultPath)
+        self.columns = [self.aspects.index(field) for field in ("name", "level", "exp", "gold")]
+        with self.lock:
+            layout = dict(self.db.execute("SELECT key, value FROM meta").fetchall())
+            if not layout:
+                self.create(importRows)
+            elif int(layout["version"]) != self.version or layout["aspects"].split(",") != self.aspects:
+                self.upgrade(int(layout["version"]), layout["aspects"].split(","))
+            self.count = self.db.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def create(self, importRows) -> None:
+        '''Copy in the rows importRows returns, if given, and record the layout, in one transaction. The layout
+        is only there once the import is complete, so a start that crashes part way is redone by the next one.'''
+        self.storage.setSync(True)
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("DELETE FROM players") # Only a database whose setup never finished has rows but no layout
+            if importRows:
+                self.db.executemany("INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?)", (self.record(line) for line in importRows()))
+            self.recordLayout()
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def recordLayout(self) -> None:
+        self.db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", (("version", str(self.version)), ("aspects", ",".join(self.aspects))))
+
+    def upgrade(self, version: int, aspects: list) -> None:
+        '''Rewrite every row in the current layout, in one transaction, and record it. Only the first start after a layout change pays for this.'''
+        upgrader = RowUpgrader(version, aspects, self.version, self.aspects)
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            lines = [line for line, in self.db.execute("SELECT line FROM players")]
+            self.db.executemany("INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?)", (self.record(upgrader(line)) for line in lines))
+            self.recordLayout()
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def record(self, line: str) -> tuple:
+        '''(name, level, exp, gold, line), the columns of line's row.'''
+        fields = line.strip(",\r\n").split(",")
+        name, level, exp, gold = (fields[column] for column in self.columns)
+        return (name, int(level), int(exp), int(gold), line)
+
+    def __contains__(self, name: str) -> bool:
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM players WHERE name = ?", (name,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def names(self) -> list:
+        with self.lock:
+            return [name for name, in self.db.execute("SELECT name FROM players")]
+
+    def outdated(self) -> bool:
+        return False # Upgraded when opened
+
+    def read(self, name: str) -> str:
+        '''Return the saved row for name.'''
+        with self.lock:
+            found = self.db.execute("SELECT line FROM players WHERE name = ?", (name,)).fetchone()
+        if found is None:
+            raise KeyError(name)
+        return found[0]
+
+    def rows(self):
+        '''Yield every saved row, fetching a batch at a time.'''
+        with self.lock:
+            cursor = self.db.execute("SELECT line FROM players")
+        while True:
+            with self.lock:
+                batch = cursor.fetchmany(BATCH)
+            if not batch:
+                return
+            for line, in batch:
+                yield line
+
+    def save(self, name: str, line: str) -> None:
+        self.saveMany({name: line})
+
+    def saveMany(self, rows: dict, sync: bool = False) -> None:
+        '''Write {name: line} rows in one transaction.'''
+        if not rows:
+            return
+        with self.lock:
+            self.storage.setSync(sync)
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                names = list(rows)
+                known = 0
+                for start in range(0, len(names), BATCH):
+                    chunk = names[start:start + BATCH]
+                    known += self.db.execute(f"SELECT COUNT(*) FROM players WHERE name IN ({','.join('?' * len(chunk))})", chunk).fetchone()[0]
+                self.db.executemany("INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?, ?)", (self.record(line) for line in rows.values()))
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.count += len(names) - known
+
+    def compact(self) -> None:
+        '''Fold the write-ahead log back into the database file.'''
+        with self.lock:
+            self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def memoryUsage(self) -> int:
+        '''Nothing per player is kept in memory; the name index is in the database file.'''
+        return 0
+
+    def close(self) -> None:
+        pass # The connection belongs to the SqliteStorage
+
+class SqlLeaderboard:
+    '''The Leaderboard interface answered by queries on the score index. Saves update the table, so
+    update() and remove() have nothing to do. Queued saves only reach the table when the SaveQueue
+    flushes, so refresh() flushes it, once before all the queries answering one request.'''
+    ORDER = "level DESC, exp DESC, gold DESC, name"
+
+    def __init__(self, store: SqlitePlayerStore, flush) -> None:
+        self.store = store
+        self.flush = flush
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def load(self) -> None:
+        pass
+
+    def refresh(self) -> None:
+        self.flush()
+
+    def set(self, name: str, level: int, exp: int, gold: int) -> None:
+        pass
+
+    def update(self, player) -> None:
+        pass
+
+    def remove(self, name: str) -> None:
+        pass
+
+    def rank(self, name: str):
+        '''1 for the leader, or None for an unknown player.'''
+        with self.store.lock:
+            found = self.store.db.execute("SELECT level, exp, gold FROM players WHERE name = ?", (name,)).fetchone()
+            if found is None:
+                return None
+            level, exp, gold = found
+            # One range of the score index per column, which SQLite counts faster than a single OR of them
+            ahead = self.store.db.execute(
+                "SELECT (SELECT COUNT(*) FROM players WHERE level > ?1)"
+                " + (SELECT COUNT(*) FROM players WHERE level = ?1 AND exp > ?2)"
+                " + (SELECT COUNT(*) FROM players WHERE level = ?1 AND exp = ?2 AND gold > ?3)"
+                " + (SELECT COUNT(*) FROM players WHERE level = ?1 AND exp = ?2 AND gold = ?3 AND name < ?4)",
+                (level, exp, gold, name)).fetchone()[0]
+        return ahead + 1
+
+    def entries(self, start: int, stop: int) -> list:
+        '''(rank, name, level, exp, gold) for ranks start + 1 through stop.'''
+        with self.store.lock:
+            found = self.store.db.execute(f"SELECT name, level, exp, gold FROM players ORDER BY {self.ORDER} LIMIT ? OFFSET ?",
+                                          (max(0, stop - start), start)).fetchall()
+        return [(start + offset + 1, *entry) for offset, entry in enumerate(found)]
+
+    def top(self, count: int) -> list:
+        return self.entries(0, count)
+
+    def page(self, number: int, size: int = 10) -> list:
+        '''Page number (from 1) of size entries.'''
+        return self.entries((number - 1) * size, number * size)
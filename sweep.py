@@ -0,0 +1,118 @@
+'''Parallel parameter sweeps for the combat simulator.
+
+Crosses player stats (base health, base speed and the starter health and speed bonuses offered by
+getNewPlayer; the gold bonus changes nothing in a fight) with every weapon, armor and hostile creature, and spreads the fights over a process pool. Work is cut into fixed
+blocks of fights, and every block seeds its own random.Random from the sweep seed and the block's key, so
+a given seed gives identical results no matter how many workers run or in which order blocks finish.
+
+Run from the game folder: python sweep.py --trials 1000 --workers 8 --out sweep.csv
+'''
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import AdventureGame
+import simulator
+
+KEY_FIELDS = ("config", "baseHealth", "baseSpeed", "weapon", "armor", "creature")
+
+_catalogs = None # Loaded once per worker process
+
+class Catalogs:
+    '''The armors, weapons and creatures a sweep fights with, read straight from the catalog files.
+    Unlike AdventureGame(), this opens no player, world or journal files and starts no save thread.'''
+    def __init__(self) -> None:
+        catalogs = AdventureGame.readCatalogs("creatures")
+        self.ARMORS, self.WEAPONS, self.CREATURES = catalogs["armors"], catalogs["weapons"], catalogs["creatures"]
+        self.HOSTILES = self.CREATURES.view(lambda creature: not creature.friendly)
+
+def _initWorker() -> None:
+    global _catalogs
+    _catalogs = Catalogs()
+
+def buildConfigs(healths=(), speeds=(), starters=True) -> list:
+    '''Player stat configurations as (label, baseHealth, baseSpeed) tuples.'''
+    default = AdventureGame.Player()
+    configs = []
+    if starters:
+        configs.append(("starter-health", AdventureGame.STARTER_HEALTH, default.baseSpeed))
+        configs.append(("starter-speed", default.baseHealth, AdventureGame.STARTER_SPEED))
+    for health in healths:
+        for speed in speeds:
+            configs.append((f"h{health}-s{speed}", health, speed))
+    return configs
+
+def buildTasks(configs, weapons, armors, creatures, trials: int, blockSize: int) -> list:
+    '''Cut the sweep into (config, weapon, armor, creature, blockIndex, blockTrials) tasks.'''
+    tasks = []
+    for config in configs:
+        for weapon in weapons:
+            for armor in armors:
+                for creature in creatures:
+                    for blockIndex, blockStart in enumerate(range(0, trials, blockSize)):
+                        tasks.append((config, weapon.name, armor.name, creature.name, blockIndex, min(blockSize, trials - blockStart)))
+    return tasks
+
+def runTask(task: tuple, seed, policy: str) -> tuple:
+    '''Run one block of fights in a worker. Returns (key, MatchupStats).'''
+    (label, health, speed), weaponName, armorName, creatureName, blockIndex, blockTrials = task
+    weapon = _catalogs.WEAPONS.get(weaponName)
+    armor = _catalogs.ARMORS.get(armorName)
+    creature = _catalogs.CREATURES.get(creatureName)
+    rand = random.Random(f"{seed}:{label}:{health}:{speed}:{weaponName}:{armorName}:{creatureName}:{blockIndex}")
+    stats = simulator.MatchupStats()
+    for _ in range(blockTrials):
+        stats.add(simulator.simulateFight(weapon, armor, creature, simulator.POLICIES[policy], rand, health, speed))
+    return (label, health, speed, weaponName, armorName, creatureName), stats
+
+def _runTaskStar(args: tuple) -> tuple:
+    return runTask(*args)
+
+def runSweep(tasks: list, seed=0, policy: str = "aggressive", workers: int = None) -> dict:
+    '''Run every task and merge the blocks into {key: MatchupStats}.'''
+    workers = workers or os.cpu_count() or 1
+    jobs = [(task, seed, policy) for task in tasks]
+    results = {}
+    if workers == 1:
+        _initWorker()
+        for key, stats in map(_runTaskStar, jobs):
+            mergeInto(results, key, stats)
+        return results
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker) as pool:
+        for key, stats in pool.map(_runTaskStar, jobs, chunksize=max(1, len(jobs) // (workers * 16))):
+            mergeInto(results, key, stats)
+    return results
+
+def mergeInto(results: dict, key: tuple, stats) -> None:
+    if key in results:
+        results[key].merge(stats)
+    else:
+        results[key] = stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep player stats x weapons x armors x creatures across all cores.")
+    parser.add_argument("--trials", type=int, default=1000, help="fights per matchup")
+    parser.add_argument("--block", type=int, default=250, help="fights per work unit")
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--policy", choices=sorted(simulator.POLICIES), default="aggressive")
+    parser.add_argument("--health", type=int, nargs="*", default=[], help="extra base health values to cross with --speed")
+    parser.add_argument("--speed", type=int, nargs="*", default=[], help="extra base speed values to cross with --health")
+    parser.add_argument("--no-starters", action="store_true", help="skip the getNewPlayer starter bonuses")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: all cores)")
+    parser.add_argument("--out", default="sweep.csv", help="report path; .json for JSON, otherwise CSV")
+    args = parser.parse_args()
+
+    catalogs = Catalogs()
+    configs = buildConfigs(args.health, args.speed, not args.no_starters)
+    tasks = buildTasks(configs, catalogs.WEAPONS, catalogs.ARMORS, catalogs.HOSTILES, args.trials, args.block)
+    startTime = time.perf_counter()
+    results = runSweep(tasks, args.seed, args.policy, args.workers)
+    elapsed = time.perf_counter() - startTime
+    simulator.writeReport({key: stats.summary() for key, stats in sorted(results.items())}, args.out, KEY_FIELDS)
+    fights = sum(stats.fights for stats in results.values())
+    print(f"Simulated {fights} fights over {len(tasks)} blocks in {elapsed:.1f}s ({fights / elapsed:,.0f} fights/s). Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+'''The game's modules live in the repository root, and open bin/... relative to the working directory.'''
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import AdventureGame
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    '''A game in a scratch folder with the real catalogs and no saved players.'''
+    shutil.copytree(os.path.join(ROOT, "bin"), tmp_path / "bin",
+                    ignore=shutil.ignore_patterns("players.csv*", "players.db*", "world.csv", "catalog.snapshot"))
+    monkeypatch.chdir(tmp_path)
+    game = AdventureGame.AdventureGame(seed=1, storage="csv")
+    yield game
+    game.close()
@@ -0,0 +1,94 @@
+'''admin.py: streaming stages over a scratch players file, dry runs, and the atomic swap.'''
+import os
+import shutil
+import sys
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+import admin
+
+@pytest.fixture
+def players(tmp_path, monkeypatch):
+    '''(players file, players_default file) in a scratch folder, holding 30 saved players. The catalogs are read from the repository.'''
+    monkeypatch.chdir(ROOT)
+    defaultPath = str(tmp_path / "players_default.csv")
+    shutil.copy(os.path.join(ROOT, AdventureGame.FILE_DEFAULT_PLAYERS), defaultPath)
+    path = str(tmp_path / "players.csv")
+    store = AdventureGame.PlayerStore(path, defaultPath)
+    catalogs = AdventureGame.readCatalogs("locations", "armors", "weapons")
+    def row(i: int, gold: int) -> str:
+        values = {"name": f"Player{i:02d}", "species": "Elf", "level": 1 + i % 5, "exp": i, "gold": gold, "baseHealth": 10,
+                  "currentHealth": 0 if i % 3 == 0 else 10, "baseSpeed": 30, "currentSpeed": 30, "location": catalogs["locations"][i % 3].name,
+                  "armor": catalogs["armors"][0].name, "weapon": catalogs["weapons"][0].name, "status": AdventureGame.PLAYER_STATUS["idle"]}
+        return "".join(f"{values[aspect]}," for aspect in store.aspects) + "\n"
+    store.saveMany({f"Player{i:02d}": row(i, 10 * i) for i in range(30)})
+    store.saveMany({"Player05": row(5, 12345)}) # Leaves a dead row behind
+    return path, defaultPath
+
+def runAdmin(monkeypatch, paths, *arguments: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["admin.py", "--file", paths[0], "--default", paths[1], *arguments])
+    admin.main()
+
+def savedRows(paths) -> dict:
+    store = AdventureGame.PlayerStore(*paths)
+    return {name: dict(zip(store.aspects, store.read(name).strip(",\r\n").split(","))) for name in store.names()}
+
+def scratchFiles(path: str) -> list:
+    folder = os.path.dirname(path)
+    return sorted(name for name in os.listdir(folder) if name.endswith(".tmp"))
+
+def test_where_set_and_delete(players, monkeypatch):
+    before = savedRows(players)
+    inode = os.stat(players[0]).st_ino
+    runAdmin(monkeypatch, players, "--where", "currentHealth<=0", "--set", "status=0", "--where", "level>=4", "--delete")
+    after = savedRows(players)
+
+    assert os.stat(players[0]).st_ino != inode # A new file swapped in, not the old one rewritten
+    assert scratchFiles(players[0]) == []
+    dead = {name for name, row in before.items() if row["currentHealth"] == "0"}
+    deleted = {name for name in dead if int(before[name]["level"]) >= 4} # The second --where narrows the first
+    assert deleted and set(after) == set(before) - deleted
+    for name, row in after.items():
+        expected = dict(before[name], status="0") if name in dead else before[name]
+        assert row == expected
+    assert after["Player05"]["gold"] == "12345"
+    with open(players[0], 'rb') as f:
+        assert not any(line.startswith(AdventureGame.PlayerStore.DEAD_MARKER) for line in f)
+
+def test_dry_run_leaves_the_file_alone(players, monkeypatch, capsys):
+    with open(players[0], 'rb') as f:
+        original = f.read()
+    runAdmin(monkeypatch, players, "--where", "gold>100", "--scale", "gold=0.5", "--dry-run")
+    with open(players[0], 'rb') as f:
+        assert f.read() == original
+    assert scratchFiles(players[0]) == []
+    output = capsys.readouterr()
+    assert "- Player11," in output.out and "+ Player11,Elf,2,11,55," in output.out
+    assert "Would change 20 and would delete 0 of 30 players" in output.err # Player11 to Player29, and Player05
+    assert "would drop 1 dead rows" in output.err
+
+def test_a_failed_run_keeps_the_old_file(players, monkeypatch):
+    with open(players[0], 'rb') as f:
+        original = f.read()
+    def failingFsync(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(admin.os, "fsync", failingFsync) # Every row is written by now, but not swapped in
+    with pytest.raises(OSError):
+        admin.runPipeline(players[0], [("revive", [])], defaultPath=players[1])
+    with open(players[0], 'rb') as f:
+        assert f.read() == original
+    assert scratchFiles(players[0]) == []
+
+def test_bad_arguments_change_nothing(players, monkeypatch):
+    with open(players[0], 'rb') as f:
+        original = f.read()
+    for arguments in (["--set", "weapon=Banana"], ["--where", "colour=red", "--revive"], ["--scale", "gold=lots"]):
+        with pytest.raises(SystemExit):
+            runAdmin(monkeypatch, players, *arguments)
+    with pytest.raises(SystemExit):
+        runAdmin(monkeypatch, players, "--delete") # Would delete everyone
+    with open(players[0], 'rb') as f:
+        assert f.read() == original
+    assert scratchFiles(players[0]) == []
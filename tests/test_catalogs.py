@@ -0,0 +1,65 @@
+'''readRows and Field: catalog CSVs are checked row by row, and errors name the file and line.'''
+import pytest
+
+import AdventureGame
+
+WEAPONS_HEADER = "name,type,range,damageRange,damageType,starter,player,market,cost,drop,dropChance\n"
+SHORT_SWORD = "Short Sword,melee,2,5|8,physical,yes,yes,yes,0,yes,50\n"
+
+def writeFile(tmp_path, text: str, name: str = "weapons.csv") -> str:
+    path = str(tmp_path / name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+def test_columns_in_any_order_extra_columns_and_blank_lines(tmp_path):
+    path = writeFile(tmp_path, "starter,notes,position,name,country\nyes,ignored,1|2,Here,Maxia\n\n,,,,\nno,,30|40,There,Puremaven\n", "locations.csv")
+    locations = list(AdventureGame.readCatalog(path, AdventureGame.Location))
+    assert [(location.name, location.country, location.position, location.starter) for location in locations] == \
+           [("Here", "Maxia", (1, 2), True), ("There", "Puremaven", (30, 40), False)]
+
+def test_weapon_fields_are_converted(tmp_path):
+    path = writeFile(tmp_path, WEAPONS_HEADER + SHORT_SWORD)
+    sword, = AdventureGame.readCatalog(path, AdventureGame.Weapon)
+    assert sword.range == 2 and sword.damage == range(5, 9) and sword.damageType == AdventureGame.DAMAGE_TYPE["physical"]
+    assert sword.starter is True and sword.dropChance == 50
+
+@pytest.mark.parametrize("text, message", [
+    ("name,type,range,damageType\n", "line 1: missing columns damageRange, starter, player, market, cost, drop, dropChance!"),
+    ("", "line 1: missing columns name, type, range"),
+    (WEAPONS_HEADER + SHORT_SWORD + "Axe,melee,2,5|8,fire,no,yes,yes,10,no,0\n",
+     "line 3: bad damageType 'fire' (expected one of none, physical, magic, true)!"),
+    (WEAPONS_HEADER + SHORT_SWORD + "Axe,melee,2,5|8,physical,maybe,yes,yes,10,no,0\n", "line 3: bad starter 'maybe' (expected one of no, yes)!"),
+    (WEAPONS_HEADER + "Axe,melee,far,5|8,physical,no,yes,yes,10,no,0\n", "line 2: bad range 'far'!"),
+    (WEAPONS_HEADER + "Axe,melee,2,5-8,physical,no,yes,yes,10,no,0\n", "line 2: bad damageRange '5-8'!"),
+    (WEAPONS_HEADER + "\n" + "Axe,melee,2,5|8,physical,no,yes,yes,ten,no,0\n", "line 3: bad cost 'ten'!"),
+    (WEAPONS_HEADER + SHORT_SWORD + "Axe,melee,2\n", "line 3: expected 11 columns, found 3!"),
+])
+def test_bad_rows_name_the_file_and_line(tmp_path, text, message):
+    path = writeFile(tmp_path, text)
+    with pytest.raises(AdventureGame.CatalogError) as error:
+        list(AdventureGame.readCatalog(path, AdventureGame.Weapon))
+    assert str(error.value).startswith(f"{path}, {message}")
+
+def test_rows_before_the_bad_one_are_still_streamed(tmp_path):
+    path = writeFile(tmp_path, WEAPONS_HEADER + SHORT_SWORD + "Axe,melee,far,5|8,physical,no,yes,yes,10,no,0\n")
+    rows = AdventureGame.readCatalog(path, AdventureGame.Weapon)
+    assert next(rows).name == "Short Sword"
+    with pytest.raises(AdventureGame.CatalogError, match="line 3"):
+        next(rows)
+
+def test_converters_replace_a_column_check():
+    armors = {"Leather": "the Leather armor"}
+    lines = ["name,armor,\n", "Bob,Leather,\n", "Rob,Tinfoil,\n"]
+    schema = (AdventureGame.Field("name"), AdventureGame.Field("armor"))
+    rows = AdventureGame.readRows(lines, schema, "creatures", {"armor": armors})
+    assert next(rows) == (2, ["Bob", "the Leather armor"])
+    with pytest.raises(AdventureGame.CatalogError, match=r"^creatures, line 3: bad armor 'Tinfoil' \(expected one of Leather\)!$"):
+        next(rows)
+
+def test_bad_weights_and_negative_numbers():
+    lines = ["creature,area,weight\n", "Bat,caves,2.5\n", "Bat,caves,-1\n"]
+    rows = AdventureGame.readRows(lines, AdventureGame.ENCOUNTER_SCHEMA, "encounters.csv")
+    assert next(rows) == (2, ["caves", "Bat", 2.5])
+    with pytest.raises(AdventureGame.CatalogError, match=r"^encounters.csv, line 3: bad weight '-1'!$"):
+        next(rows)
@@ -0,0 +1,99 @@
+'''driver.sessionMenus driven by scripted answers, as runInteractive or server.py would drive it.'''
+import AdventureGame
+import driver
+import render
+
+MENU = "Choose an option: "
+NAME = "What is your name? : "
+SPECIES = "What species are you? : "
+LOOPS = 300
+
+class CapturingConsole(render.Console):
+    def __init__(self) -> None:
+        super().__init__()
+        self.text = []
+
+    def send(self, text: str) -> None:
+        self.text.append(text)
+
+def delegationDepth(flow) -> int:
+    '''How many generators deep the yield from chain of flow currently is.'''
+    depth = 0
+    while flow is not None:
+        depth += 1
+        flow = flow.gi_yieldfrom
+    return depth
+
+def drive(flow, replies: list, console: render.Console) -> tuple:
+    '''Run flow on replies, sending each screen to console the way runInteractive does.
+    Returns the prompts it asked and the delegation depth at each of them.'''
+    prompts, depths = [], []
+    replies = iter(replies)
+    request = next(flow)
+    try:
+        while True:
+            console.flush()
+            if isinstance(request, AdventureGame.Pause):
+                request = flow.send(None)
+                continue
+            prompts.append(request)
+            depths.append(delegationDepth(flow))
+            request = flow.send(next(replies))
+    except StopIteration:
+        console.flush()
+    return prompts, depths
+
+def test_new_game_stats_save_and_quit(game):
+    console = CapturingConsole()
+    token = AdventureGame.CONSOLE.set(console)
+    try:
+        replies = ["1", "Tess", "Tester", "1", "1", "1", "1", # New game: name, species, starter bonus, location, weapon, armor
+                   "2", "3"] # View stats, save
+        replies += ["2"] * LOOPS # View stats over and over
+        replies += ["4"] # Save & Quit to Main Menu
+        replies += ["3"] * LOOPS # Scoreboard over and over
+        replies += ["4"] # Quit
+        prompts, depths = drive(driver.sessionMenus(game), replies, console)
+    finally:
+        AdventureGame.CONSOLE.reset(token)
+
+    assert prompts[:7] == [MENU, NAME, SPECIES, MENU, MENU, MENU, MENU]
+    assert prompts[7:] == [MENU] * (len(replies) - 7)
+    assert len(prompts) == len(replies) # Every reply was asked for, and nothing after Quit
+    # Every menu prompt sits as deep as the first: sessionMenus, a menu, getMenu
+    assert set(depths[7:]) == {depths[0]} == {3}
+
+    text = "".join(console.text)
+    assert "Game created successfully!" in text and "Tess the Tester is at" in text
+    assert text.count("--- Player Stats ---") == LOOPS + 1
+    assert text.count("Game saved!") == 2
+    assert text.count("1. Tess the Tester") == LOOPS
+    assert text.rstrip().endswith("Goodbye.")
+    assert game.player is None and game.ACTIVE_PLAYERS == set()
+    game.saveQueue.flush()
+    assert list(game.playerStore.names()) == ["Tess"]
+
+def test_unloadable_save_returns_to_the_menu(game):
+    aspects = game.playerStore.aspects
+    def row(name: str, location: str) -> str:
+        values = {"name": name, "species": "Ghost", "level": 1, "exp": 0, "gold": 5, "baseHealth": 10, "currentHealth": 10,
+                  "baseSpeed": 30, "currentSpeed": 30, "location": location, "armor": game.ARMORS[0].name,
+                  "weapon": game.WEAPONS[0].name, "status": AdventureGame.PLAYER_STATUS["idle"]}
+        return "".join(f"{values[aspect]}," for aspect in aspects) + "\n"
+    game.playerStore.saveMany({"Casper": row("Casper", "Atlantis"), "Boo": row("Boo", game.LOCATIONS[0].name)})
+    console = CapturingConsole()
+    token = AdventureGame.CONSOLE.set(console)
+    try:
+        replies = ["2", "Casper", # Load game: a location the catalogs no longer have
+                   "2", "Boo", "4", # Load game, then Save & Quit to Main Menu
+                   "4"] # Quit
+        prompts, _ = drive(driver.sessionMenus(game), replies, console)
+    finally:
+        AdventureGame.CONSOLE.reset(token)
+
+    assert prompts == [MENU, NAME, MENU, NAME, MENU, MENU]
+    text = "".join(console.text)
+    assert "Casper's save could not be loaded: Unknown location 'Atlantis'!" in text
+    assert "Boo found!" in text and text.count("Game saved!") == 1 # Boo loaded and saved, so the session carried on
+    assert text.rstrip().endswith("Goodbye.")
+    assert game.player is None and game.ACTIVE_PLAYERS == set()
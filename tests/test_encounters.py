@@ -0,0 +1,78 @@
+'''Encounter tables: seeded draws follow bin/encounters.csv, and areas without rows use the default table.'''
+import csv
+import math
+import os
+import random
+from collections import Counter
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+
+DRAWS = 20000
+
+def csvWeights(hostiles, area: str) -> dict:
+    '''Creature name -> weight in area, read straight from bin/encounters.csv. Creatures without a row weigh 1.'''
+    weights = {hostile.name: 1.0 for hostile in hostiles}
+    with open(os.path.join(ROOT, AdventureGame.FILE_ENCOUNTERS), newline='') as f:
+        for row in csv.DictReader(f):
+            if row["area"] == area:
+                for hostile in hostiles:
+                    if row["creature"] in (hostile.name, hostile.species):
+                        weights[hostile.name] = float(row["weight"])
+    return weights
+
+def checkFrequencies(draw, hostiles, weights: dict, maxHealth: int) -> None:
+    '''DRAWS calls of draw() land on each creature that can spawn as often as its weight says, within five standard deviations.'''
+    counts = Counter(draw().name for _ in range(DRAWS))
+    allowed = {hostile.name: weights[hostile.name] for hostile in hostiles if hostile.baseHealth <= maxHealth}
+    total = sum(allowed.values())
+    assert set(counts) <= {name for name, weight in allowed.items() if weight > 0}
+    for name, weight in allowed.items():
+        chance = weight / total
+        assert abs(counts[name] - DRAWS * chance) <= 5 * math.sqrt(DRAWS * chance * (1 - chance)) + 1, (name, counts[name], chance)
+
+@pytest.mark.parametrize("place", ["firey caves", "abandoned mineshafts", "outlying trade routes"])
+def test_draws_follow_the_encounters_file(game, place):
+    hostiles = game.HOSTILES
+    weights = csvWeights(hostiles, place)
+    assert weights != csvWeights(hostiles, "nowhere") # The place has rows
+    location = game.LOCATIONS[0].name
+    healths = sorted(hostile.baseHealth for hostile in hostiles)
+    for maxHealth in (healths[-1], healths[len(healths) // 2]): # Everything, or only the weaker half
+        rand = random.Random(f"{place}:{maxHealth}")
+        checkFrequencies(lambda: game.ENCOUNTERS.choose(maxHealth, location, place, rand), hostiles, weights, maxHealth)
+
+def test_areas_without_rows_use_the_default_table(game):
+    hostiles = game.HOSTILES
+    place = "rolling hills" # No rows in bin/encounters.csv
+    assert game.ENCOUNTERS.table(game.LOCATIONS[0].name, place) is game.ENCOUNTERS.default
+    assert game.ENCOUNTERS.table() is game.ENCOUNTERS.default
+    rand = random.Random(0)
+    maxHealth = max(hostile.baseHealth for hostile in hostiles)
+    checkFrequencies(lambda: game.ENCOUNTERS.choose(maxHealth, game.LOCATIONS[0].name, place, rand), hostiles, csvWeights(hostiles, place), maxHealth)
+
+def tableWeights(table: AdventureGame.EncounterTable) -> dict:
+    return {creature.name: total - before for creature, before, total in zip(table.creatures, [0] + table.totals, table.totals)}
+
+def test_more_specific_areas_win(game):
+    location, other = game.LOCATIONS[0].name, game.LOCATIONS[1].name
+    bat = next(hostile for hostile in game.HOSTILES if hostile.species == "Bat").name
+    encounters = AdventureGame.Encounters(game.HOSTILES, [("caves", bat, 0.0), (location, bat, 7.0), (f"{location}:caves", bat, 9.0)])
+    assert tableWeights(encounters.table(location, "caves"))[bat] == 9
+    assert tableWeights(encounters.table(location, "forests"))[bat] == 7
+    assert tableWeights(encounters.table(other, "caves"))[bat] == 0
+    assert tableWeights(encounters.table(other, "forests"))[bat] == 1
+
+def test_no_creature_weak_enough_to_spawn(game):
+    weakest = min(hostile.baseHealth for hostile in game.HOSTILES)
+    with pytest.raises(AdventureGame.CatalogError):
+        game.ENCOUNTERS.choose(weakest - 1, None, "caves")
+
+def test_unknown_area_is_rejected(game, tmp_path):
+    path = str(tmp_path / "encounters.csv")
+    with open(path, 'w') as f:
+        f.write("creature,area,weight\nBat,caves,4\nBat,moon,2\n")
+    with pytest.raises(AdventureGame.CatalogError, match="line 3: unknown area 'moon'"):
+        AdventureGame.readEncounters(path, game.LOCATIONS)
@@ -0,0 +1,110 @@
+'''Leaderboard and SortedKeys checked against a plain sorted() of the same keys.'''
+import random
+
+import pytest
+
+from leaderboard import Leaderboard, SortedKeys
+
+LOAD = SortedKeys.LOAD
+
+def randomScore(rand: random.Random) -> tuple:
+    # Narrow ranges, so plenty of players tie on level and exp and are ordered by gold or name
+    return rand.randint(1, 5), rand.randint(0, 20), rand.randint(0, 50)
+
+def expected(scores: dict) -> list:
+    '''(rank, name, level, exp, gold) for every player, by sorting their keys from scratch.'''
+    keys = sorted(Leaderboard.key(name, *score) for name, score in scores.items())
+    return [(rank, name, -level, -exp, -gold) for rank, (level, exp, gold, name) in enumerate(keys, 1)]
+
+def checkBoard(board: Leaderboard, scores: dict) -> None:
+    entries = expected(scores)
+    assert len(board) == len(entries)
+    assert board.top(10) == entries[:10]
+    for number in (1, 2, len(entries) // 10 + 1, len(entries) // 10 + 2):
+        assert board.page(number) == entries[(number - 1) * 10:number * 10]
+    assert board.page(3, LOAD + 7) == entries[2 * (LOAD + 7):3 * (LOAD + 7)] # Spans buckets
+    for rank, name, *_ in entries[::37] + entries[-1:]:
+        assert board.rank(name) == rank
+    assert board.rank("Nobody") is None
+
+def checkBuckets(keys: SortedKeys) -> None:
+    '''Buckets are sorted, in order, within their size limits, and the tree agrees with them.'''
+    flat = [key for bucket in keys.buckets for key in bucket]
+    assert flat == sorted(flat) and len(flat) == len(keys)
+    assert keys.maxes == [bucket[-1] for bucket in keys.buckets]
+    assert all(0 < len(bucket) <= 2 * LOAD for bucket in keys.buckets)
+    for index in range(len(keys.buckets) + 1):
+        assert keys.before(index) == sum(len(bucket) for bucket in keys.buckets[:index])
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_adds_updates_and_removes_match_sorted(seed):
+    rand = random.Random(seed)
+    scores = {f"Player{i:05d}": randomScore(rand) for i in range(3 * LOAD)}
+    board = Leaderboard(lambda: [(name, *score) for name, score in scores.items()])
+    checkBoard(board, scores)
+    for step in range(6000):
+        roll = rand.random()
+        if roll < 0.4:
+            name = f"New{step:05d}"
+        elif roll < 0.75 and scores:
+            name = rand.choice(list(scores))
+        else:
+            if scores:
+                name = rand.choice(list(scores))
+                board.remove(name)
+                del scores[name]
+            continue
+        scores[name] = randomScore(rand)
+        board.set(name, *scores[name])
+        if step % 500 == 0:
+            checkBoard(board, scores)
+            checkBuckets(board.keys)
+    checkBoard(board, scores)
+    checkBuckets(board.keys)
+
+def test_bucket_splits_past_twice_load():
+    keys = SortedKeys(range(0, 4 * LOAD, 2)) # Two full buckets of LOAD keys
+    assert [len(bucket) for bucket in keys.buckets] == [LOAD, LOAD]
+    keys.before(1) # Build the tree, so the adds below update it in place
+    added = [key + 0.5 for key in range(LOAD + 1)] # All land in the first bucket, one more than it can hold
+    for key in added:
+        keys.add(key)
+    assert [len(bucket) for bucket in keys.buckets] == [LOAD, LOAD + 1, LOAD]
+    checkBuckets(keys)
+    everything = sorted(list(range(0, 4 * LOAD, 2)) + added)
+    assert keys.slice(0, len(keys)) == everything
+    for key in everything[::11]:
+        assert keys.index(key) == everything.index(key)
+
+def test_buckets_merge_on_remove():
+    everything = list(range(4 * LOAD))
+    keys = SortedKeys(everything)
+    assert len(keys.buckets) == 4
+    keys.before(1)
+    for key in range(LOAD, LOAD + LOAD // 2 + 1): # The second bucket drops under LOAD / 2
+        keys.remove(key)
+        everything.remove(key)
+    assert len(keys.buckets) == 3
+    checkBuckets(keys)
+    for key in range(0, LOAD - 1): # The first bucket merges with the second
+        keys.remove(key)
+        everything.remove(key)
+    checkBuckets(keys)
+    assert keys.slice(0, len(keys)) == everything
+    assert [keys.index(key) for key in everything[::13]] == list(range(0, len(everything), 13))
+    for key in list(everything): # Down to nothing, one bucket at a time
+        keys.remove(key)
+    assert len(keys) == 0 and keys.buckets == []
+    with pytest.raises(KeyError):
+        keys.remove(0)
+    keys.add(5)
+    assert keys.slice(0, 1) == [5] and keys.index(5) == 0
+
+def test_updates_before_the_first_query_are_ignored():
+    scores = {"Alice": (3, 10, 100), "Bob": (3, 10, 200)}
+    board = Leaderboard(lambda: [(name, *score) for name, score in scores.items()])
+    board.set("Alice", 9, 0, 0) # Not loaded yet; loading reads the current scores instead
+    assert board.top(10) == expected(scores)
+    scores["Alice"] = (9, 0, 0)
+    board.set("Alice", *scores["Alice"])
+    assert board.rank("Alice") == 1 and board.top(10) == expected(scores)
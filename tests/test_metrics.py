@@ -0,0 +1,42 @@
+'''metrics.measureOverhead puts the timing wrappers back the way it found them.'''
+import pytest
+
+import metrics
+
+class Probe:
+    def work(self, value):
+        return value + 1
+
+@pytest.fixture
+def probe():
+    '''A Probe whose work() is the only registered hot path; the game's own are put back afterwards.'''
+    savedPaths, savedHistograms = dict(metrics.HOT_PATHS), dict(metrics.HISTOGRAMS)
+    metrics.disable()
+    metrics.HOT_PATHS.clear()
+    metrics.register(Probe, "work")
+    yield Probe()
+    metrics.disable()
+    metrics._profiler = None
+    metrics.HOT_PATHS.clear()
+    metrics.HOT_PATHS.update(savedPaths)
+    metrics.HISTOGRAMS.clear()
+    metrics.HISTOGRAMS.update(savedHistograms)
+
+@pytest.mark.parametrize("profile", [False, True])
+def test_measure_overhead_restores_the_previous_mode(probe, profile):
+    metrics.enable(profile=profile)
+    profiler = metrics._profiler
+    probe.work(1)
+    metrics.measureOverhead(1000)
+    assert metrics.enabled()
+    assert metrics._profiler is profiler # Still profiling, into the same profiler
+    assert list(metrics.HOT_PATHS) == ["Probe.work"]
+    probe.work(2)
+    assert metrics.HISTOGRAMS["Probe.work"].count == 2 # The measurement's own calls are not counted
+    if profile:
+        assert any(getattr(entry.code, "co_name", None) == "work" for entry in profiler.getstats())
+
+def test_measure_overhead_leaves_metrics_off(probe):
+    metrics.measureOverhead(1000)
+    assert not metrics.enabled()
+    assert Probe.work.__name__ == "work" and not hasattr(Probe.work, "__wrapped__")
@@ -0,0 +1,52 @@
+'''NameIndex lookups, prefix search and suggestions.'''
+from names import NameIndex
+
+SAVED = ["Alice", "Alison", "Bob", "BOB", "Straße"] + [f"Player{i:04d}" for i in range(1500)]
+
+def test_find_ignores_case():
+    index = NameIndex(lambda: SAVED)
+    assert index.find("alice") == ["Alice"]
+    assert index.find("ALICE") == ["Alice"]
+    assert index.find("STRASSE") == ["Straße"] # casefold, not just lower
+    assert sorted(index.find("bob")) == ["BOB", "Bob"]
+    assert index.find("Alic") == []
+    assert "player0007" in index and "Nobody" not in index
+    assert len(index) == len(SAVED) - 1 # Bob and BOB share a key
+
+def test_starting_with_crosses_a_bucket_boundary():
+    index = NameIndex(lambda: SAVED)
+    index.load()
+    assert len(index.keys.buckets) > 1
+    first = index.keys.buckets[1][0] # Folded name at the start of the second bucket
+    prefix = first[:-1].upper()
+    expected = sorted(name for name in SAVED if name.casefold().startswith(prefix.casefold()))
+    assert index.keys.buckets[0][-1] in (name.casefold() for name in expected) # Some before the boundary, some after
+    assert index.startingWith(prefix, len(expected) + 5) == expected
+    assert index.startingWith(prefix, 3) == expected[:3]
+    assert index.startingWith("player15") == []
+
+def test_suggest_a_near_miss():
+    index = NameIndex(lambda: SAVED)
+    assert index.suggest("Alixe") == ["Alice", "Alison"] # Nothing starts with "alix", so "ali"
+    assert index.suggest("player001x") == [f"Player{i:04d}" for i in range(10, 15)]
+    assert index.suggest("Zed") == []
+
+def test_names_added_in_the_same_session_are_found():
+    index = NameIndex(lambda: SAVED)
+    assert index.find("zed") == []
+    index.add("Zed")
+    assert index.find("ZED") == ["Zed"]
+    assert index.startingWith("z") == ["Zed"]
+    assert "zed" in index
+    index.add("ZED")
+    assert sorted(index.find("zed")) == ["ZED", "Zed"]
+    index.remove("Zed")
+    index.remove("ZED")
+    assert index.find("zed") == [] and index.startingWith("z") == []
+
+def test_names_added_before_loading_come_from_load_names():
+    saved = list(SAVED)
+    index = NameIndex(lambda: saved)
+    index.add("Zed") # Ignored: loading reads every saved name
+    saved.append("Yan")
+    assert index.find("zed") == [] and index.find("yan") == ["Yan"]
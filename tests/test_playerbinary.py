@@ -0,0 +1,70 @@
+'''playerbinary.py: CSV to binary and back, find() by name, and refusing files that aren't there.'''
+import os
+import shutil
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+import playerbinary
+
+@pytest.fixture
+def csvPath(tmp_path, monkeypatch) -> str:
+    '''A players.csv of 300 made-up players, with players_default.csv beside it. The catalogs are read from the repository.'''
+    monkeypatch.chdir(ROOT)
+    shutil.copy(os.path.join(ROOT, AdventureGame.FILE_DEFAULT_PLAYERS), tmp_path)
+    path = str(tmp_path / "players.csv")
+    store = AdventureGame.PlayerStore(path, str(tmp_path / "players_default.csv"))
+    rows = list(playerbinary.syntheticRows(300))[::-1] # Saved out of name order
+    store.saveMany({row["name"]: playerbinary.lineFromRow(row) for row in rows})
+    rows[0]["gold"] = 123456
+    store.save(rows[0]["name"], playerbinary.lineFromRow(rows[0])) # Longer, so the old row is left dead
+    return path
+
+def expectedRows(path: str) -> list:
+    return sorted(playerbinary.csvRows(path), key=lambda row: row["name"])
+
+def test_csv_to_binary_and_back(csvPath, tmp_path):
+    rows = expectedRows(csvPath)
+    assert len(rows) == 300 and any(row["gold"] == 123456 for row in rows)
+    binaryPath, backPath = str(tmp_path / "players.bin"), str(tmp_path / "back.csv")
+    assert playerbinary.csvToBinary(csvPath, binaryPath) == 300
+    players = playerbinary.BinaryPlayerFile(binaryPath)
+    try:
+        assert len(players) == 300
+        assert list(players) == rows
+    finally:
+        players.close()
+    assert playerbinary.binaryToCsv(binaryPath, backPath) == 300
+    assert expectedRows(backPath) == rows
+    assert playerbinary.csvToBinary(backPath, binaryPath) == 300 # The CSV it writes converts again
+    with open(binaryPath, 'rb') as f:
+        again = f.read()
+    playerbinary.csvToBinary(csvPath, binaryPath)
+    with open(binaryPath, 'rb') as f:
+        assert f.read() == again
+
+def test_find_by_name(csvPath, tmp_path):
+    rows = expectedRows(csvPath)
+    binaryPath = str(tmp_path / "players.bin")
+    playerbinary.csvToBinary(csvPath, binaryPath)
+    players = playerbinary.BinaryPlayerFile(binaryPath)
+    try:
+        for row in rows:
+            assert players.find(row["name"]) == row
+        for name in ("", "Aaron", "Player0000150x", "Zed", rows[0]["name"] + "!", rows[-1]["name"] + "0"):
+            assert players.find(name) is None
+    finally:
+        players.close()
+
+def test_missing_or_foreign_files_are_refused(tmp_path):
+    shutil.copy(os.path.join(ROOT, AdventureGame.FILE_DEFAULT_PLAYERS), tmp_path)
+    missing, binaryPath = str(tmp_path / "players.csv"), str(tmp_path / "players.bin")
+    with pytest.raises(FileNotFoundError):
+        playerbinary.csvToBinary(missing, binaryPath)
+    assert not os.path.exists(missing) and not os.path.exists(binaryPath) # Nothing was created in its place
+
+    with open(binaryPath, 'wb') as f:
+        f.write(b"name,species,\n" + b"\0" * playerbinary.HEADER.size)
+    with pytest.raises(ValueError, match="not a version 1 binary player file"):
+        playerbinary.BinaryPlayerFile(binaryPath)
@@ -0,0 +1,97 @@
+'''PlayerStore: the append-only players file, its name index, and compaction.'''
+import os
+import random
+import shutil
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+
+@pytest.fixture
+def paths(tmp_path):
+    '''(players file, players_default file) in a scratch folder; the players file does not exist yet.'''
+    defaultPath = str(tmp_path / "players_default.csv")
+    shutil.copy(os.path.join(ROOT, AdventureGame.FILE_DEFAULT_PLAYERS), defaultPath)
+    return str(tmp_path / "players.csv"), defaultPath
+
+def openStore(paths) -> AdventureGame.PlayerStore:
+    store = AdventureGame.PlayerStore(*paths)
+    store.COMPACT_MIN_BYTES = float("inf") # Only compact when a test asks to
+    return store
+
+def row(store: AdventureGame.PlayerStore, name: str, value: str) -> str:
+    return name + "," + ",".join([value] * (len(store.aspects) - 1)) + ",\n"
+
+def dataLines(path: str) -> list:
+    '''Every player row after the header, leaving out comments, dead rows and schema lines.'''
+    with open(path, 'r', newline='') as f:
+        return [line for line in f.readlines()[1:] if not line.startswith("#")]
+
+def test_overwritten_name_reads_its_newest_row_after_restart(paths):
+    store = openStore(paths)
+    store.save("Alice", row(store, "Alice", "1"))
+    store.save("Bob", row(store, "Bob", "1"))
+    store.save("Alice", row(store, "Alice", "2")) # Same length, overwritten in place
+    store.save("Alice", row(store, "Alice", "333")) # Longer, appended and the old row marked dead
+    store.save("Alice", row(store, "Alice", "4")) # Shorter, appended again
+    assert store.read("Alice") == row(store, "Alice", "4")
+
+    reopened = openStore(paths)
+    assert sorted(reopened.names()) == ["Alice", "Bob"]
+    assert reopened.read("Alice") == row(store, "Alice", "4")
+    assert reopened.read("Bob") == row(store, "Bob", "1")
+    assert reopened.duplicates == 0 and reopened.deadBytes == store.deadBytes
+
+def test_torn_last_row_is_ignored_then_cut_off(paths):
+    store = openStore(paths)
+    store.save("Alice", row(store, "Alice", "1"))
+    size = os.path.getsize(paths[0])
+    with open(paths[0], 'ab') as f:
+        f.write(row(store, "Torn", "1")[:-5].encode()) # A crash partway through appending
+
+    reopened = openStore(paths)
+    assert list(reopened.names()) == ["Alice"]
+    assert reopened.fileSize == size
+    reopened.save("Bob", row(store, "Bob", "1"))
+    with open(paths[0], 'r', newline='') as f:
+        text = f.read()
+    assert "Torn" not in text and text.endswith(row(store, "Bob", "1"))
+    assert sorted(openStore(paths).names()) == ["Alice", "Bob"]
+
+def test_compact_keeps_exactly_the_live_rows(paths):
+    store = openStore(paths)
+    rand = random.Random(0)
+    saved = {}
+    for step in range(500):
+        name = f"Player{rand.randrange(40):02d}"
+        saved[name] = row(store, name, str(step) * rand.randint(1, 3))
+        store.save(name, saved[name])
+    with open(paths[0], 'a', newline='') as f: # Replaced without being marked dead, as by a crash mid-save
+        saved["Crash"] = row(store, "Crash", "2")
+        f.write(row(store, "Crash", "1") + saved["Crash"])
+    store = openStore(paths)
+    assert store.deadBytes > 0 and store.duplicates == 1
+    store.compact()
+    assert sorted(dataLines(paths[0])) == sorted(saved.values())
+    assert store.deadBytes == 0 and store.duplicates == 0
+    assert {name: store.read(name) for name in store.names()} == saved
+    with open(paths[0], 'rb') as f:
+        assert not any(line.startswith(store.DEAD_MARKER) for line in f)
+
+def test_reopening_a_file_full_of_dead_rows(paths):
+    store = openStore(paths)
+    rand = random.Random(1)
+    for step in range(300):
+        name = f"Player{rand.randrange(10)}"
+        store.saveMany({name: row(store, name, str(step) * rand.randint(1, 3)),
+                        "Zed": row(store, "Zed", str(step))}) # saveMany always appends, leaving Zed's last row dead
+    with open(paths[0], 'rb') as f:
+        dead = sum(line.startswith(store.DEAD_MARKER) for line in f)
+    assert dead > 250
+
+    reopened = openStore(paths)
+    assert sorted(reopened.names()) == sorted(store.names())
+    assert {name: reopened.read(name) for name in reopened.names()} == {name: store.read(name) for name in store.names()}
+    assert reopened.deadBytes == store.deadBytes and reopened.fileSize == store.fileSize
+    assert sorted(reopened.rows()) == sorted(store.read(name) for name in store.names())
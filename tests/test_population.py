@@ -0,0 +1,89 @@
+'''PlayerPopulation built from saved rows ranks players the same as sorting the Player objects, and leaves out stale rows.'''
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import AdventureGame
+import driver
+from leaderboard import Leaderboard
+from test_driver import CapturingConsole, drive
+
+def makePlayers(game, count: int, rand: random.Random, locations=None) -> list:
+    locations = locations or game.LOCATIONS
+    players = []
+    for i in range(count):
+        player = AdventureGame.Player()
+        player.name, player.species = f"Player{i:05d}", rand.choice(("Elf", "Orc", "Human"))
+        # Narrow ranges, so plenty of players tie on level and exp and are ordered by gold or name
+        player.level, player.exp, player.gold = rand.randint(1, 4), rand.randint(0, 10), rand.randint(0, 30)
+        player.location = rand.choice(locations.items)
+        player.armor, player.weapon = rand.choice(game.ARMORS.items), rand.choice(game.WEAPONS.items)
+        players.append(player)
+    return players
+
+def test_scoreboard_order_matches_sorted_players(game):
+    players = makePlayers(game, 3000, random.Random(11))
+    aspects = game.playerStore.aspects
+    population = AdventureGame.PlayerPopulation(game)
+    population.appendLines((player.toLine(aspects) for player in players), aspects)
+    assert population.names == [player.name for player in players]
+    for field in ("location", "armor", "weapon"):
+        registry = population.registries[field]
+        assert [registry[index] for index in population.columns[field]] == [getattr(player, field) for player in players]
+
+    board = Leaderboard(lambda: zip(population.names, population.columns["level"], population.columns["exp"], population.columns["gold"]))
+    ranked = sorted(players, key=lambda player: (-player.level, -player.exp, -player.gold, player.name))
+    entries = board.page(1, len(players))
+    assert [name for _, name, *_ in entries] == [player.name for player in ranked]
+    assert [(level, exp, gold) for _, _, level, exp, gold in entries] == [(player.level, player.exp, player.gold) for player in ranked]
+
+def test_references_past_65535_items(game):
+    template = game.LOCATIONS[0].snapshotValues()
+    locations = AdventureGame.Registry("location")
+    for i in range(70_000):
+        locations.add(AdventureGame.Location.fromSnapshot((f"City{i}",) + tuple(template[1:])))
+    population = AdventureGame.PlayerPopulation(SimpleNamespace(LOCATIONS=locations, ARMORS=game.ARMORS, WEAPONS=game.WEAPONS))
+    players = makePlayers(game, 50, random.Random(12), locations)
+    players[0].location = locations[69_999]
+    for player in players:
+        population.append(player)
+    assert [locations[index] for index in population.columns["location"]] == [player.location for player in players]
+
+def staleLine(player, aspects: list, **stale) -> str:
+    '''player's saved row with some of its location, armor or weapon renamed to ones the catalogs don't have.'''
+    values = {aspect: getattr(player, aspect) for aspect in aspects}
+    values.update({field: getattr(player, field).name for field in AdventureGame.Player.REFERENCE_FIELDS})
+    values.update(stale)
+    return "".join(f"{values[aspect]}," for aspect in aspects) + "\n"
+
+@pytest.mark.parametrize("storage", ["csv", "sqlite"])
+def test_stale_rows_are_left_off_the_scoreboard(game, storage):
+    if storage != "csv":
+        game = AdventureGame.AdventureGame(seed=1, storage=storage)
+    try:
+        players = makePlayers(game, 6, random.Random(13))
+        aspects = game.playerStore.aspects
+        stale = {players[1].name: {"location": "Atlantis"}, players[4].name: {"armor": "Tinfoil", "weapon": "Spoon"}}
+        game.playerStore.saveMany({player.name: staleLine(player, aspects, **stale.get(player.name, {})) for player in players})
+
+        population = AdventureGame.PlayerPopulation(game)
+        population.appendLines(game.playerStore.rows(), aspects)
+        assert population.staleRows == 2
+        assert population.names == [player.name for player in players if player.name not in stale]
+
+        console = CapturingConsole()
+        token = AdventureGame.CONSOLE.set(console)
+        try:
+            drive(driver.sessionMenus(game), ["3", "4"], console) # Scoreboard, Quit
+        finally:
+            AdventureGame.CONSOLE.reset(token)
+        text = "".join(console.text)
+        assert text.rstrip().endswith("Goodbye.")
+        for player in players:
+            assert (f"{player.name} the {player.species}" in text) == (player.name not in stale)
+        if storage == "csv": # The database ranks from its own score columns, without reading rows
+            assert "WARNING: 2 saved players left off the scoreboard" in text
+    finally:
+        if storage != "csv":
+            game.close()
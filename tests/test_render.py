@@ -0,0 +1,65 @@
+'''render.py: consoles buffer a frame until flush(), send it in one piece, and clear() with an ANSI sequence.'''
+import AdventureGame
+import driver
+import render
+from test_driver import CapturingConsole, drive
+
+CLEAR = render.Console.CLEAR
+
+def test_writes_are_held_until_flush():
+    console = CapturingConsole()
+    console.write("--- Main Menu ---\n")
+    console.write("1. Start New Game\n")
+    assert console.text == []
+    console.flush()
+    assert console.text == ["--- Main Menu ---\n1. Start New Game\n"]
+    console.flush() # Nothing new, so nothing is sent
+    assert console.text == ["--- Main Menu ---\n1. Start New Game\n"]
+    assert console.stats.frames == 1 and console.stats.bytes == len(console.text[0])
+
+def test_clear_starts_a_new_frame():
+    console = CapturingConsole()
+    console.write("Gone before anyone could read it\n")
+    console.clear()
+    console.write("Fresh screen\n")
+    console.flush()
+    assert console.text == [CLEAR + "Fresh screen\n"]
+    console.clear()
+    console.flush() # A clear on its own still wipes the screen
+    assert console.text[-1] == CLEAR and console.stats.spawns == 0
+
+def test_menus_send_one_frame_per_screen(game):
+    console = CapturingConsole()
+    token = AdventureGame.CONSOLE.set(console)
+    try:
+        replies = ["1", "Tess", "Tester", "1", "1", "1", "1"] + ["2", "3"] * 20 + ["4", "4"] # New game, stats and save, quit
+        prompts, _ = drive(driver.sessionMenus(game), replies, console)
+    finally:
+        AdventureGame.CONSOLE.reset(token)
+    assert len(prompts) == len(replies)
+    # A frame before every prompt but the species one, which adds nothing to the name prompt's screen,
+    # plus one for the pause after creating the game and one for the goodbye
+    assert len(console.text) == console.stats.frames == len(prompts) + 1
+    assert all(CLEAR not in frame[1:] for frame in console.text) # A clear only ever starts a frame
+    assert sum(frame.startswith(CLEAR) for frame in console.text) >= 40
+    stats = [frame for frame in console.text if "--- Player Stats ---" in frame]
+    assert len(stats) == 20 and all(frame.startswith(CLEAR) and frame.endswith("4. Save & Quit to Main Menu\n") for frame in stats)
+
+def test_terminal_console_writes_each_frame_once(tmp_path):
+    with open(tmp_path / "screen.txt", 'w') as stream:
+        console = render.TerminalConsole(stream)
+        for number in range(3):
+            console.clear()
+            console.write(f"Screen {number}\n")
+            console.write("Choose an option: ")
+            console.flush()
+    assert (tmp_path / "screen.txt").read_text() == "".join(f"{CLEAR}Screen {number}\nChoose an option: " for number in range(3))
+    assert console.stats.frames == console.stats.writes == 3
+    assert console.stats.spawns == 0
+
+def test_null_console_sends_nothing():
+    console = render.NullConsole()
+    console.write("Hello\n")
+    console.clear()
+    console.flush()
+    assert console.stats.frames == 0 and console.frame == []
@@ -0,0 +1,60 @@
+'''replay.py: a recorded session replays with the same rolls, and a changed roll is found where it changed.'''
+import json
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+import driver
+import replay
+from test_driver import CapturingConsole, drive
+
+REPLIES = ["1", "Tess", "Tester", "1", "1", "1", "1", # New game: name, species, starter bonus, location, weapon, armor
+           *["1"] * 40, # Play, then fight whatever turns up until Tess dies
+           "4", "4"] # Save & Quit to Main Menu, Quit
+
+@pytest.fixture
+def recording(game, tmp_path) -> str:
+    '''Path of a recording of REPLIES played in a session of game.'''
+    path = str(tmp_path / "session.log")
+    session = game.newSession()
+    recorder = replay.SessionRecorder(path, session)
+    console = CapturingConsole()
+    token = AdventureGame.CONSOLE.set(console)
+    try:
+        drive(recorder.flow(driver.sessionMenus(session)), REPLIES, console)
+    finally:
+        AdventureGame.CONSOLE.reset(token)
+        recorder.close()
+    text = "".join(console.text)
+    assert "You won the fight!" in text and "Tess has passed away!" in text and text.rstrip().endswith("Goodbye.")
+    return path
+
+def readEvents(path: str) -> list:
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f]
+
+def replayed(path: str, console=None) -> dict:
+    replayer = replay.Replayer(ROOT)
+    try:
+        return replayer.replay(path, console)
+    finally:
+        replayer.close()
+
+def test_recorded_session_replays_the_same_rolls(recording):
+    rolls = readEvents(recording)[-1]["rolls"]
+    assert len(rolls) > 50
+    console = CapturingConsole()
+    result = replayed(recording, console)
+    assert result == {"replies": len(REPLIES), "rolls": len(rolls), "divergence": None}
+    assert "".join(console.text).rstrip().endswith("Goodbye.")
+
+@pytest.mark.parametrize("index", [0, 17, -1])
+def test_changed_roll_is_where_the_replay_diverges(recording, index):
+    events = readEvents(recording)
+    rolls = events[-1]["rolls"]
+    index %= len(rolls)
+    rolls[index] += 1
+    with open(recording, 'w') as f:
+        f.write("".join(json.dumps(event) + "\n" for event in events))
+    assert replayed(recording)["divergence"] == index
@@ -0,0 +1,63 @@
+'''SaveQueue durability: kill a process mid-flush with SIGKILL, then check the next start recovers.'''
+import os
+import shutil
+import signal
+import subprocess
+import sys
+from collections import Counter
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+
+NAMES = [f"Player{i:03d}" for i in range(50)]
+
+# Saves every player once per round, one flush per round, and SIGKILLs itself right after its
+# killAt-th fsync. Each flush fsyncs the journal and then the appended rows, so odd kill points
+# land after the journal is committed and even ones after the rows are appended but before the
+# rows they replace are marked dead.
+CHILD = '''
+import os, signal, sys
+import AdventureGame
+path, defaultPath, killAt = sys.argv[1], sys.argv[2], int(sys.argv[3])
+store = AdventureGame.PlayerStore(path, defaultPath)
+calls = 0
+realFsync = AdventureGame.fsync
+def fsync(fd):
+    global calls
+    realFsync(fd)
+    calls += 1
+    if calls == killAt:
+        os.kill(os.getpid(), signal.SIGKILL)
+AdventureGame.fsync = fsync
+queue = AdventureGame.SaveQueue(store, interval=3600)
+for round in range(100):
+    for name in %r:
+        queue.put(name, name + "," + ",".join([str(round) * (round %% 3 + 1)] * (len(store.aspects) - 1)) + ",\\n")
+    queue.flush()
+'''
+
+def playerRows(path: str) -> list:
+    '''Every data row in the file that is not marked dead.'''
+    with open(path, 'r', newline='') as f:
+        return [line for line in f.readlines()[1:] if not line.startswith("#")]
+
+@pytest.mark.parametrize("killAt", range(1, 9))
+def test_kill_mid_flush_leaves_one_row_per_player(tmp_path, killAt):
+    defaultPath = str(tmp_path / "players_default.csv")
+    shutil.copy(os.path.join(ROOT, AdventureGame.FILE_DEFAULT_PLAYERS), defaultPath)
+    path = str(tmp_path / "players.csv")
+    child = subprocess.run([sys.executable, "-c", CHILD % (NAMES,), path, defaultPath, str(killAt)],
+                           cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT})
+    assert child.returncode == -signal.SIGKILL
+    assert os.path.exists(path + ".journal") # Every kill point is inside a flush
+
+    store = AdventureGame.PlayerStore(path, defaultPath)
+    AdventureGame.SaveQueue(store).close() # Replays the journal
+    assert not os.path.exists(path + ".journal")
+    rows = playerRows(path)
+    assert Counter(row.split(",")[0] for row in rows) == Counter(NAMES)
+    committed = str((killAt - 1) // 2)
+    assert {row.split(",")[4].strip("\r\n") for row in rows} == {committed * (int(committed) % 3 + 1)}
+    assert sorted(store.names()) == NAMES
@@ -0,0 +1,120 @@
+'''GameServer sessions driven by asyncio clients over local sockets.'''
+import asyncio
+
+import server
+
+LOADED_MENU = "Save & Quit to Main Menu"
+TIMEOUT = 20 # Seconds; a new game pauses for 2 after it is created
+
+def newGameReplies(name: str) -> bytes:
+    # New game, name, species, starter bonus, location, weapon, armor
+    return f"1\n{name}\nTester\n1\n1\n1\n1\n".encode()
+
+async def expect(reader: asyncio.StreamReader, text: str) -> str:
+    return (await asyncio.wait_for(reader.readuntil(text.encode()), TIMEOUT)).decode()
+
+async def withServer(game, clientsFunc):
+    '''Start a GameServer on a free local port, run clientsFunc(gameServer, port), then shut everything down.'''
+    gameServer = server.GameServer(game)
+    listener = await gameServer.start("127.0.0.1", 0)
+    try:
+        return await clientsFunc(gameServer, listener.sockets[0].getsockname()[1])
+    finally:
+        gameServer.ticker.cancel()
+        listener.close()
+        await listener.wait_closed()
+
+async def sessionsEnd(gameServer) -> None:
+    '''Wait until the server has cleaned up every session.'''
+    for _ in range(TIMEOUT * 100):
+        if not gameServer.sessions:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{gameServer.sessions} sessions still open")
+
+def test_concurrent_logins(game):
+    names = [f"Player{i}" for i in range(8)]
+    async def clients(gameServer, port):
+        connections = [await asyncio.open_connection("127.0.0.1", port) for _ in names]
+        for (_, writer), name in zip(connections, names):
+            writer.write(newGameReplies(name))
+        await asyncio.gather(*(expect(reader, LOADED_MENU) for reader, _ in connections))
+        assert gameServer.sessions == len(names)
+        assert game.ACTIVE_PLAYERS == set(names)
+        for _, writer in connections:
+            writer.write(b"4\n4\n") # Save & Quit to Main Menu, then Quit
+        await asyncio.gather(*(expect(reader, "Goodbye.") for reader, _ in connections))
+        await sessionsEnd(gameServer)
+    asyncio.run(withServer(game, clients))
+    assert game.ACTIVE_PLAYERS == set()
+    game.saveQueue.flush()
+    assert sorted(game.playerStore.names()) == names
+
+def test_second_claim_on_a_name_is_refused(game):
+    async def clients(gameServer, port):
+        firstReader, firstWriter = await asyncio.open_connection("127.0.0.1", port)
+        firstWriter.write(newGameReplies("Alice"))
+        await expect(firstReader, LOADED_MENU)
+        firstWriter.write(b"3\n") # Save, staying in the game
+        await expect(firstReader, "Game saved!")
+
+        secondReader, secondWriter = await asyncio.open_connection("127.0.0.1", port)
+        secondWriter.write(b"2\nalice\n") # Load Game, in any case
+        assert "Alice found!" in await expect(secondReader, "Alice is already being played!")
+        secondWriter.write(b"1\nALICE\n") # New game with the same name
+        assert "ALICE is already in use as Alice!" in await expect(secondReader, "Specify a unique name.")
+        assert game.ACTIVE_PLAYERS == {"Alice"}
+        firstWriter.close()
+        secondWriter.close()
+        await sessionsEnd(gameServer)
+    asyncio.run(withServer(game, clients))
+
+def test_disconnect_mid_menu_releases_the_session(game):
+    async def clients(gameServer, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"1\nBob\n") # Hang up halfway through creating a character
+        await expect(reader, "What species are you?")
+        writer.close()
+        await sessionsEnd(gameServer)
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(newGameReplies("Bob")) # Created but never saved, then hang up in the game menu
+        await expect(reader, LOADED_MENU)
+        assert game.ACTIVE_PLAYERS == {"Bob"}
+        writer.close()
+        await sessionsEnd(gameServer)
+        assert game.ACTIVE_PLAYERS == set()
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(newGameReplies("Bob")) # The name is free again
+        await expect(reader, LOADED_MENU)
+        writer.close()
+        await sessionsEnd(gameServer)
+    asyncio.run(withServer(game, clients))
+    game.saveQueue.flush()
+    assert "Bob" not in game.playerStore
+
+def test_scoreboard_while_another_session_creates_a_character(game):
+    async def clients(gameServer, port):
+        viewerReader, viewerWriter = await asyncio.open_connection("127.0.0.1", port)
+        viewerWriter.write(newGameReplies("Alice") + b"4\n3\n") # Save & Quit to Main Menu, then Scoreboard
+        await expect(viewerReader, "Game saved!")
+        await expect(viewerReader, "--- Main Menu ---")
+        assert "1. Alice the Tester" in await expect(viewerReader, "--- Main Menu ---")
+
+        creatorReader, creatorWriter = await asyncio.open_connection("127.0.0.1", port)
+        creatorWriter.write(newGameReplies("Zed")) # Created, not saved yet
+        await expect(creatorReader, LOADED_MENU)
+        viewerWriter.write(b"3\n")
+        board = await expect(viewerReader, "--- Main Menu ---")
+        assert "1. Alice the Tester" in board and "Zed" not in board
+
+        creatorWriter.write(b"3\n") # Saved, so now on the board
+        await expect(creatorReader, "Game saved!")
+        viewerWriter.write(b"3\n")
+        board = await expect(viewerReader, "--- Main Menu ---")
+        assert "Alice the Tester" in board and "Zed the Tester" in board
+        viewerWriter.close()
+        creatorWriter.close()
+        await sessionsEnd(gameServer)
+    asyncio.run(withServer(game, clients))
@@ -0,0 +1,63 @@
+'''The vectorized simulator against the scalar one it reimplements, and main() touching nothing but the catalogs.'''
+import math
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from conftest import ROOT
+import simulator
+
+TRIALS = 4000
+
+# Close fights, where the rates are most sensitive to the rules, plus a sure win and a likely loss
+MATCHUPS = (("Short Sword", "Leather", "Speslic"), ("Short Sword", "None", "Cerlisk"), ("Short Sword", "Full Plate", "Feltfog"),
+            ("Short Sword", "Light Chainmail", "Masonfruit"), ("Small Bow", "Light Chainmail", "Thiffs"))
+
+def pickMatchups(game) -> list:
+    return [(game.WEAPONS.get(weapon), game.ARMORS.get(armor), game.CREATURES.get(creature)) for weapon, armor, creature in MATCHUPS]
+
+@pytest.mark.parametrize("policy", sorted(simulator.BATCH_POLICIES))
+def test_batch_rates_match_the_scalar_simulator(game, policy):
+    pytest.importorskip("numpy")
+    for weapon, armor, creature in pickMatchups(game):
+        key = (weapon.name, armor.name, creature.name)
+        batch = simulator.simulateBatch([weapon], [armor], [creature], TRIALS, seed=1, policy=policy)[key]
+        scalar = simulator.runMatrix([weapon], [armor], [creature], TRIALS, seed=1, policy=simulator.POLICIES[policy])[key].summary()
+        assert batch["fights"] == scalar["fights"] == TRIALS
+        for rate in ("winRate", "deathRate", "escapeRate"):
+            pooled = (batch[rate] + scalar[rate]) / 2
+            allowed = 5 * math.sqrt(pooled * (1 - pooled) * 2 / TRIALS) + 1e-9 # Five standard errors of the difference
+            assert abs(batch[rate] - scalar[rate]) <= allowed, (key, rate, batch[rate], scalar[rate])
+
+def test_batch_is_reproducible(game):
+    pytest.importorskip("numpy")
+    weapons, armors, creatures = zip(*pickMatchups(game)[:2])
+    def run():
+        return simulator.simulateBatch(weapons, armors, creatures, 200, seed=7, batchSize=300) # Several chunks
+    assert run() == run()
+
+def test_vectorized_without_numpy_is_a_usage_error(game, tmp_path):
+    if simulator.np is not None:
+        pytest.skip("NumPy is installed")
+    child = subprocess.run([sys.executable, os.path.join(ROOT, "simulator.py"), "--vectorized", "--trials", "1", "--out", str(tmp_path / "balance.csv")],
+                           cwd=tmp_path, capture_output=True, text=True) # The game fixture's scratch folder
+    assert child.returncode == 2
+    assert "Traceback" not in child.stderr and "needs NumPy" in child.stderr
+
+@pytest.mark.parametrize("encounters", [False, True])
+def test_main_only_reads_the_catalogs(tmp_path, monkeypatch, encounters):
+    shutil.copytree(os.path.join(ROOT, "bin"), tmp_path / "bin", ignore=shutil.ignore_patterns("players.csv*", "players.db*", "world.csv", "catalog.snapshot"))
+    before = sorted(os.listdir(tmp_path / "bin"))
+    monkeypatch.chdir(tmp_path)
+    arguments = ["--trials", "2", "--out", "balance.csv"] + (["--encounters", "--place", "caves"] if encounters else [])
+    monkeypatch.setattr(sys, "argv", ["simulator.py", *arguments])
+    threads = threading.active_count()
+    simulator.main()
+    assert sorted(os.listdir(tmp_path / "bin")) == before # No players, world or snapshot files
+    assert threading.active_count() == threads # No save thread left running
+    with open(tmp_path / "balance.csv", newline='') as f:
+        assert len(f.readlines()) > 1
@@ -0,0 +1,58 @@
+'''The catalog snapshot: a warm start parses no CSV, and changing any catalog file brings the parsing back.'''
+import os
+
+import pytest
+
+import AdventureGame
+
+CATALOG_FILES = (AdventureGame.FILE_LOCATIONS, AdventureGame.FILE_ARMORS, AdventureGame.FILE_WEAPONS,
+                 AdventureGame.FILE_CREATURES, AdventureGame.FILE_ENCOUNTERS)
+
+@pytest.fixture
+def parsed(monkeypatch) -> list:
+    '''The sources readRows is asked to parse from now on.'''
+    sources = []
+    readRows = AdventureGame.readRows
+    def countingReadRows(lines, schema, source="catalog", converters=None):
+        sources.append(source)
+        return readRows(lines, schema, source, converters)
+    monkeypatch.setattr(AdventureGame, "readRows", countingReadRows)
+    return sources
+
+def startAgain() -> AdventureGame.AdventureGame:
+    game = AdventureGame.AdventureGame(seed=1, storage="csv")
+    game.close()
+    return game
+
+def names(items) -> list:
+    return [item.name for item in items]
+
+def test_warm_start_parses_nothing(game, parsed):
+    assert game.catalogSource == "CSV" # The fixture starts without a snapshot
+    warm = startAgain()
+    assert warm.catalogSource == "snapshot"
+    assert parsed == []
+    assert warm.views.__dict__.keys().isdisjoint({"encounters", "map", "routes"}) # Not built until a session needs them
+    for registry in ("LOCATIONS", "ARMORS", "WEAPONS", "CREATURES"):
+        assert names(getattr(warm, registry)) == names(getattr(game, registry))
+    for view in ("STARTER_LOCATIONS", "STARTER_WEAPONS", "STARTER_ARMORS", "MARKET_WEAPONS", "MARKET_ARMORS", "HOSTILES"):
+        assert names(getattr(warm, view)) == names(getattr(game, view))
+    assert warm.ENCOUNTERS.rows == game.ENCOUNTERS.rows
+    assert all(creature.armor is warm.ARMORS.get(creature.armor.name) for creature in warm.CREATURES)
+
+@pytest.mark.parametrize("path", CATALOG_FILES)
+@pytest.mark.parametrize("change", ["mtime", "size"])
+def test_any_catalog_change_drops_the_snapshot(game, parsed, path, change):
+    info = os.stat(path)
+    if change == "mtime":
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+    else:
+        with open(path, 'a') as f:
+            f.write("\n") # Blank lines are skipped, so only the size changes
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns))
+    cold = startAgain()
+    assert cold.catalogSource == "CSV"
+    assert sorted(parsed) == sorted(CATALOG_FILES) # Everything is parsed again, not only the changed file
+    parsed.clear()
+    assert startAgain().catalogSource == "snapshot" # Rewritten for the changed files
+    assert parsed == []
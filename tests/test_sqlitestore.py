@@ -0,0 +1,108 @@
+'''SqlitePlayerStore and SqlLeaderboard: importing players.csv, upgrading the layout, atomic saves, and ranks checked against sorted().'''
+import os
+import random
+import shutil
+
+import pytest
+
+from conftest import ROOT
+import AdventureGame
+import migrations
+from sqlitestore import SqliteStorage, SqlLeaderboard
+from test_leaderboard import checkBoard, randomScore
+
+@pytest.fixture
+def paths(tmp_path):
+    '''(database, players_default file, players.csv) in a scratch folder; neither the database nor players.csv exist yet.'''
+    defaultPath = str(tmp_path / "players_default.csv")
+    shutil.copy(os.path.join(ROOT, AdventureGame.FILE_DEFAULT_PLAYERS), defaultPath)
+    return str(tmp_path / "players.db"), defaultPath, str(tmp_path / "players.csv")
+
+def row(aspects: list, name: str, level: int = 1, exp: int = 0, gold: int = 5) -> str:
+    values = {"name": name, "level": level, "exp": exp, "gold": gold}
+    return "".join(f"{values.get(aspect, 7)}," for aspect in aspects) + "\n"
+
+def test_first_open_imports_players_csv(paths):
+    database, defaultPath, csvPath = paths
+    csvStore = AdventureGame.PlayerStore(csvPath, defaultPath)
+    aspects = csvStore.aspects
+    csvStore.saveMany({f"Player{i:03d}": row(aspects, f"Player{i:03d}", i % 4, i, 2 * i) for i in range(200)})
+    csvStore.save("Player007", row(aspects, "Player007", 9, 999, 12345)) # Leaves a dead row behind
+
+    storage = SqliteStorage(database, defaultPath, lambda: AdventureGame.PlayerStore(csvPath, defaultPath).rows())
+    store = storage.openPlayers()
+    assert len(store) == 200 and sorted(store.names()) == sorted(csvStore.names())
+    assert all(store.read(name) == csvStore.read(name) for name in csvStore.names())
+    assert SqlLeaderboard(store, lambda: None).rank("Player007") == 1
+    storage.close()
+
+    def importAgain():
+        raise AssertionError("players.csv imported twice")
+    storage = SqliteStorage(database, defaultPath, importAgain) # The database is set up, so players.csv is left alone
+    assert len(storage.openPlayers()) == 200
+    storage.close()
+
+def test_opening_with_a_new_layout_upgrades_every_row(paths, monkeypatch):
+    database, defaultPath, _ = paths
+    storage = SqliteStorage(database, defaultPath)
+    store = storage.openPlayers()
+    oldAspects = store.aspects
+    store.saveMany({name: row(oldAspects, name, level, 10, 20) for name, level in (("Alice", 3), ("Bob", 5))})
+    storage.close()
+
+    # Version 2 adds a title before status
+    newAspects = oldAspects[:oldAspects.index("status")] + ["title"] + oldAspects[oldAspects.index("status"):]
+    newDefault = defaultPath.replace(".csv", "_v2.csv")
+    with open(newDefault, 'w', newline='') as f:
+        f.write("".join(f"{aspect}," for aspect in newAspects) + "\n" + migrations.schemaLine(2))
+    monkeypatch.setitem(migrations.FIELD_DEFAULTS, "title", "Nobody")
+    storage = SqliteStorage(database, newDefault)
+    store = storage.openPlayers()
+    assert store.version == 2 and store.aspects == newAspects
+    for name, level in (("Alice", 3), ("Bob", 5)):
+        fields = dict(zip(newAspects, store.read(name).strip(",\r\n").split(",")))
+        assert fields["title"] == "Nobody" and fields["level"] == str(level) and fields["gold"] == "20"
+    assert SqlLeaderboard(store, lambda: None).top(2) == [(1, "Bob", 5, 10, 20), (2, "Alice", 3, 10, 20)]
+    storage.close()
+
+    storage = SqliteStorage(database, newDefault) # The new layout is recorded, so the next start upgrades nothing
+    assert dict(storage.db.execute("SELECT key, value FROM meta").fetchall())["version"] == "2"
+    storage.close()
+
+def test_save_many_is_all_or_nothing(paths):
+    database, defaultPath, _ = paths
+    storage = SqliteStorage(database, defaultPath)
+    store = storage.openPlayers()
+    aspects = store.aspects
+    store.saveMany({"Alice": row(aspects, "Alice", 1), "Bob": row(aspects, "Bob", 2)})
+    broken = {"Alice": row(aspects, "Alice", 4), "Carol": row(aspects, "Carol", 3),
+              "Dave": "Dave," + "x," * (len(aspects) - 1) + "\n"} # No level to rank by
+    with pytest.raises(ValueError):
+        store.saveMany(broken)
+    assert len(store) == 2 and sorted(store.names()) == ["Alice", "Bob"]
+    assert store.read("Alice") == row(aspects, "Alice", 1)
+
+    store.saveMany({"Alice": row(aspects, "Alice", 4), "Carol": row(aspects, "Carol", 3)}, sync=True)
+    assert len(store) == 3 and store.read("Alice") == row(aspects, "Alice", 4)
+    storage.close()
+    storage = SqliteStorage(database, defaultPath)
+    assert len(storage.openPlayers()) == 3
+    storage.close()
+
+@pytest.mark.parametrize("seed", range(2))
+def test_ranks_and_pages_match_sorted(paths, seed):
+    database, defaultPath, _ = paths
+    storage = SqliteStorage(database, defaultPath)
+    store = storage.openPlayers()
+    aspects = store.aspects
+    board = SqlLeaderboard(store, lambda: None)
+    rand = random.Random(seed)
+    scores = {f"Player{i:05d}": randomScore(rand) for i in range(1500)}
+    store.saveMany({name: row(aspects, name, *score) for name, score in scores.items()})
+    checkBoard(board, scores)
+    for _ in range(5): # Batches of new players and changed scores, as the SaveQueue writes them
+        changed = {rand.choice(list(scores)) if rand.random() < 0.6 else f"New{rand.randrange(10**6):06d}": randomScore(rand) for _ in range(200)}
+        scores.update(changed)
+        store.saveMany({name: row(aspects, name, *score) for name, score in changed.items()})
+        checkBoard(board, scores)
+    storage.close()
@@ -0,0 +1,18 @@
+'''sweep.py gives the same results for a seed however many workers share the blocks.'''
+from conftest import ROOT
+import sweep
+
+def test_workers_do_not_change_results(monkeypatch):
+    monkeypatch.chdir(ROOT) # Workers read the catalogs from bin/
+    catalogs = sweep.Catalogs()
+    configs = sweep.buildConfigs([20], [30])
+    tasks = sweep.buildTasks(configs, catalogs.WEAPONS[:2], catalogs.ARMORS[:2], catalogs.HOSTILES[:3], trials=60, blockSize=25)
+    assert len(tasks) == len(configs) * 2 * 2 * 3 * 3 # Blocks of 25, 25 and 10 fights
+
+    def summaries(seed, workers: int) -> dict:
+        return {key: stats.summary() for key, stats in sweep.runSweep(tasks, seed, "aggressive", workers).items()}
+    alone = summaries("7", 1)
+    assert len(alone) == len(configs) * 2 * 2 * 3
+    assert all(summary["fights"] == 60 for summary in alone.values())
+    assert summaries("7", 2) == alone
+    assert summaries("8", 2) != alone # The seed, not the worker count, decides the fights
@@ -0,0 +1,93 @@
+'''SpatialIndex queries against a full scan, and RoutePlanner against a plain Dijkstra.'''
+import heapq
+import math
+import random
+
+from travel import RoutePlanner, SpatialIndex, syntheticLocations
+
+def scan(locations, position, exclude=None) -> list:
+    '''Distance to every location but exclude, nearest first.'''
+    return sorted(math.dist(position, location.position) for location in locations if location is not exclude)
+
+def dijkstra(planner: RoutePlanner, start, goal):
+    '''Shortest distance from start to goal over the planner's legs, without the straight-line estimate.'''
+    best = {start: 0.0}
+    queue = [(0.0, 0, start)]
+    tiebreak = 1
+    while queue:
+        travelled, _, location = heapq.heappop(queue)
+        if location is goal:
+            return travelled
+        if travelled > best[location]:
+            continue
+        for distance, neighbour in planner.legsFrom(location):
+            if travelled + distance < best.get(neighbour, math.inf):
+                best[neighbour] = travelled + distance
+                heapq.heappush(queue, (travelled + distance, tiebreak, neighbour))
+                tiebreak += 1
+    return None
+
+def test_nearest_and_within_match_a_full_scan():
+    locations = syntheticLocations(2000, seed=3)
+    index = SpatialIndex(locations)
+    rand = random.Random(3)
+    for _ in range(200):
+        origin = rand.choice(locations)
+        # From a city, and from points anywhere on the map or off its edges
+        for position, exclude in ((origin.position, origin), ((rand.uniform(-200, 650), rand.uniform(-200, 650)), None)):
+            everything = scan(locations, position, exclude)
+            count = rand.choice((1, 6, 8, 40))
+            assert [distance for distance, _ in index.nearest(position, count, exclude)] == everything[:count]
+            radius = rand.uniform(0, 60)
+            found = index.within(position, radius, exclude)
+            assert [distance for distance, _ in found] == [distance for distance in everything if distance <= radius]
+            assert all(location is not exclude for _, location in found)
+
+def test_nearest_on_a_map_smaller_than_count():
+    locations = syntheticLocations(5, seed=4)
+    index = SpatialIndex(locations)
+    found = index.nearest(locations[0].position, 8, exclude=locations[0])
+    assert [distance for distance, _ in found] == scan(locations, locations[0].position, locations[0])
+    assert {location.name for _, location in found} == {location.name for location in locations[1:]}
+    assert SpatialIndex([]).nearest((0, 0), 3) == []
+
+def test_routes_cost_the_same_as_dijkstra():
+    locations = syntheticLocations(400, seed=5)
+    planner = RoutePlanner(SpatialIndex(locations), neighbours=4) # Few legs, so routes detour and some cities can't be reached
+    rand = random.Random(5)
+    unreachable = 0
+    for _ in range(150):
+        start, goal = rand.choice(locations), rand.choice(locations)
+        expected = dijkstra(planner, start, goal)
+        found = planner.search(start, goal)
+        if expected is None:
+            assert found is None
+            unreachable += 1
+            continue
+        distance, path = found
+        assert math.isclose(distance, expected)
+        assert path[0] is start and path[-1] is goal
+        legs = [next(leg for leg, there in planner.legsFrom(here) if there is nextStop) for here, nextStop in zip(path, path[1:])]
+        assert math.isclose(sum(legs), distance) # The path follows legs of the graph, and costs what they add up to
+    assert 0 < unreachable < 50
+    assert planner.route(locations[0], locations[0]) == (0.0, [locations[0]])
+
+def test_cached_routes_are_returned_unchanged():
+    locations = syntheticLocations(300, seed=6)
+    planner = RoutePlanner(SpatialIndex(locations))
+    start, goal = locations[1], locations[2]
+    first = planner.route(start, goal)
+    distance, path = first
+    path = list(path)
+    for other in locations[3:50]:
+        planner.route(start, other)
+    assert planner.route(start, goal) is first
+    assert first == (distance, path)
+
+    planner = RoutePlanner(SpatialIndex(locations))
+    planner.ROUTE_CACHE = 10
+    planner.route(start, goal)
+    for other in locations[50:60]: # Pushes the oldest route out, so it is searched again
+        planner.route(other, goal)
+    assert (start, goal) not in planner.routes
+    assert planner.route(start, goal) == first
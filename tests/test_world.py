@@ -0,0 +1,135 @@
+'''World timers on a fake clock: due order across TimerWheel turns, cancelling, and save/load.'''
+import random
+
+import AdventureGame
+from world import World, WorldClock
+
+class FakeClock(WorldClock):
+    '''Game time that only moves when a test sets minutes.'''
+    def __init__(self) -> None:
+        super().__init__(timeScale=60, source=lambda: self.minutes) # now() is minutes itself
+        self.minutes = 0.0
+
+def recordingWorld(clock: FakeClock, fired: list) -> World:
+    '''A World whose handlers note (clock time, timer) in fired. "repeat" timers come back every 90 minutes while amount lasts.'''
+    def repeat(timer):
+        fired.append((clock.now(), timer))
+        if timer.amount > 1:
+            world.schedule("repeat", timer.name, 90, timer.amount - 1, bulk=True, start=timer.due)
+    world = World(clock, {"once": lambda timer: fired.append((clock.now(), timer)), "repeat": repeat})
+    return world
+
+def scheduleMany(world: World, rand: random.Random, count: int) -> None:
+    for number in range(count):
+        bulk = rand.random() < 0.5
+        world.schedule("repeat" if bulk else "once", f"Player{number % 40}", rand.uniform(0, 3000), rand.randint(1, 4), bulk=bulk)
+
+def checkFired(fired: list, steps: list) -> None:
+    '''Timers ran in due order, each on the first advance at or after its due time.'''
+    dues = [timer.due for _, timer in fired]
+    assert dues == sorted(dues)
+    for now, timer in fired:
+        assert timer.due <= now
+        assert not any(timer.due <= step < now for step in steps) # No earlier advance should have run it
+
+def test_timers_fire_in_due_order_across_wheel_turns():
+    rand = random.Random(0)
+    clock = FakeClock()
+    fired = []
+    world = recordingWorld(clock, fired)
+    scheduleMany(world, rand, 2000)
+    expected = len(world.events) + sum(timer.amount for timers in world.timers.values() for timer in timers if timer.bulk)
+    steps = []
+    while clock.minutes < 4000: # Past the 1024-minute wheel several times over, sometimes a whole turn in one step
+        clock.minutes += rand.choice((0.5, 7, 60, 333, 1500))
+        steps.append(clock.now())
+        world.advance()
+    checkFired(fired, steps)
+    clock.minutes = 1e6
+    world.advance()
+    assert len(fired) == expected and world.timers == {} and len(world.wheel) == 0
+
+def test_cancel_and_pending():
+    clock = FakeClock()
+    fired = []
+    world = recordingWorld(clock, fired)
+    world.schedule("once", "Alice", 2000)
+    heal = world.schedule("repeat", "Alice", 30, 3, bulk=True)
+    world.schedule("once", "Bob", 45)
+    assert world.pending("Alice") is heal
+    assert world.pending("Alice", "once").due == 2000
+    assert world.pending("Nobody") is None
+
+    world.cancel("Alice")
+    assert world.pending("Alice") is None
+    clock.minutes = 5000
+    assert world.advance() == 1
+    assert [timer.name for _, timer in fired] == ["Bob"]
+    assert world.timers == {} and len(world.wheel) == 0 and len(world.events) == 0
+
+def test_save_and_load_keep_due_times(tmp_path):
+    rand = random.Random(1)
+    clock = FakeClock()
+    fired = []
+    world = recordingWorld(clock, fired)
+    scheduleMany(world, rand, 300)
+    world.cancel("Player7")
+    clock.minutes = 700
+    world.advance()
+    path = str(tmp_path / "world.csv")
+    world.save(path)
+
+    loadedFired = []
+    loaded = recordingWorld(clock, loadedFired)
+    loaded.load(path)
+    def timers(world):
+        return sorted((timer.kind, timer.name, timer.due, timer.amount, timer.bulk) for timers in world.timers.values() for timer in timers)
+    assert timers(loaded) == timers(world)
+    assert "Player7" not in loaded.timers
+    del fired[:]
+    for minutes in (800, 1900, 2500, 9000):
+        clock.minutes = minutes
+        world.advance()
+        loaded.advance()
+    assert [(now, timer.kind, timer.name, timer.due) for now, timer in loadedFired] == [(now, timer.kind, timer.name, timer.due) for now, timer in fired]
+
+def test_overdue_timers_run_on_the_first_advance_after_loading(tmp_path):
+    clock = FakeClock()
+    world = recordingWorld(clock, [])
+    world.schedule("once", "Alice", 10)
+    world.schedule("repeat", "Bob", 20, 2, bulk=True)
+    path = str(tmp_path / "world.csv")
+    world.save(path)
+
+    clock.minutes = 5000 # The game was down for a few days
+    fired = []
+    loaded = recordingWorld(clock, fired)
+    loaded.load(path)
+    loaded.advance()
+    assert [(timer.name, timer.due) for _, timer in fired] == [("Alice", 10), ("Bob", 20), ("Bob", 110)]
+
+def test_wait_while_a_lost_timer_puts_the_player_back_to_idle(game):
+    player = AdventureGame.Player()
+    player.name = "Ann"
+    player.status = AdventureGame.PLAYER_STATUS["travelling"]
+    assert game.claimPlayer(player)
+    assert list(game.waitWhile(AdventureGame.PLAYER_STATUS["travelling"])) == [] # No timer to wait for
+    assert player.status == AdventureGame.PLAYER_STATUS["idle"]
+
+def test_wait_while_travelling_ends_on_arrival(game):
+    clock = FakeClock()
+    game.WORLD.clock = clock
+    player = AdventureGame.Player()
+    player.name = "Ann"
+    player.status = AdventureGame.PLAYER_STATUS["idle"]
+    assert game.claimPlayer(player) # So the arrival is left for this session to save
+    minutes = game.depart(game.LOCATIONS[1], AdventureGame.TRAVEL_SPEED) # An hour away
+    assert minutes == 60 and player.location is game.LOCATIONS[1]
+    waiting = game.waitWhile(AdventureGame.PLAYER_STATUS["travelling"])
+    assert isinstance(next(waiting), AdventureGame.Pause)
+    clock.minutes = 59
+    next(waiting)
+    assert player.status == AdventureGame.PLAYER_STATUS["travelling"]
+    clock.minutes = 60
+    assert list(waiting) == []
+    assert player.status == AdventureGame.PLAYER_STATUS["idle"]
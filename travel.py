@@ -0,0 +1,193 @@
+'''Spatial index and route planner over Location.position.
+
+SpatialIndex buckets locations into a uniform grid, so nearest-N and within-radius queries only look
+at the cells around a point instead of at every city. RoutePlanner links every location to its nearest
+neighbours and finds the shortest chain of legs between two cities. The legs and the routes are cached.
+
+python travel.py --locations 10000 100000 benchmarks both at those map sizes.
+'''
+import argparse
+import heapq
+import math
+import random
+import time
+from collections import OrderedDict
+
+class SpatialIndex:
+    '''Uniform grid over location positions. Cells are sized so each holds a few locations on average.'''
+    TARGET_PER_CELL = 4
+
+    def __init__(self, locations, cellSize: float = None) -> None:
+        self.locations = tuple(locations)
+        if cellSize is None:
+            xs = [location.position[0] for location in self.locations] or [0]
+            ys = [location.position[1] for location in self.locations] or [0]
+            area = max(max(xs) - min(xs), 1) * max(max(ys) - min(ys), 1)
+            cellSize = math.sqrt(area * self.TARGET_PER_CELL / max(len(self.locations), 1))
+        self.cellSize = max(cellSize, 1e-9)
+        self.cells = {}
+        for location in self.locations:
+            self.cells.setdefault(self.cell(location.position), []).append(location)
+        keys = self.cells.keys()
+        self.bounds = (min((x for x, _ in keys), default=0), max((x for x, _ in keys), default=0),
+                       min((y for _, y in keys), default=0), max((y for _, y in keys), default=0))
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def cell(self, position) -> tuple:
+        return (math.floor(position[0] / self.cellSize), math.floor(position[1] / self.cellSize))
+
+    def ring(self, center: tuple, radius: int):
+        '''Locations in the cells exactly radius cells away from center (a square ring).'''
+        cx, cy = center
+        if radius == 0:
+            yield from self.cells.get(center, ())
+            return
+        for x in range(cx - radius, cx + radius + 1):
+            yield from self.cells.get((x, cy - radius), ())
+            yield from self.cells.get((x, cy + radius), ())
+        for y in range(cy - radius + 1, cy + radius):
+            yield from self.cells.get((cx - radius, y), ())
+            yield from self.cells.get((cx + radius, y), ())
+
+    def within(self, position, radius: float, exclude=None) -> list:
+        '''(distance, location) pairs no farther than radius from position, nearest first.'''
+        px, py = position
+        low, high = self.cell((px - radius, py - radius)), self.cell((px + radius, py + radius))
+        found = []
+        for x in range(max(low[0], self.bounds[0]), min(high[0], self.bounds[1]) + 1):
+            for y in range(max(low[1], self.bounds[2]), min(high[1], self.bounds[3]) + 1):
+                for location in self.cells.get((x, y), ()):
+                    distance = math.dist(position, location.position)
+                    if distance <= radius and location is not exclude:
+                        found.append((distance, location))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def nearest(self, position, count: int, exclude=None) -> list:
+        '''The count locations closest to position as (distance, location) pairs, nearest first.
+
+        Searches rings of cells outwards. After ring r every location within r cell widths has been
+        seen, so the search stops once count candidates are that close or the grid runs out.'''
+        center = self.cell(position)
+        # Rings beyond this are outside the grid in every direction
+        lastRing = max(abs(center[0] - self.bounds[0]), abs(center[0] - self.bounds[1]),
+                       abs(center[1] - self.bounds[2]), abs(center[1] - self.bounds[3]))
+        candidates = []
+        for radius in range(lastRing + 1):
+            for location in self.ring(center, radius):
+                if location is not exclude:
+                    candidates.append((math.dist(position, location.position), location))
+            if len(candidates) >= count and heapq.nsmallest(count, candidates, key=lambda pair: pair[0])[-1][0] <= radius * self.cellSize:
+                break
+        return heapq.nsmallest(count, candidates, key=lambda pair: pair[0])
+
+class RoutePlanner:
+    '''Shortest routes over a travel graph linking every location to its nearest neighbours.
+
+    A location's legs are found with the SpatialIndex the first time a route passes through it and kept
+    afterwards, and the most recent routes are cached. Routes are searched Dijkstra-style, ordered by the
+    distance travelled plus the straight-line distance left (A*), which never overestimates.'''
+    NEIGHBOURS = 6
+    ROUTE_CACHE = 1024
+
+    def __init__(self, index: SpatialIndex, neighbours: int = NEIGHBOURS) -> None:
+        self.index = index
+        self.neighbours = neighbours
+        self.legs = {} # location -> ((distance, location), ...)
+        self.routes = OrderedDict() # (start, goal) -> (distance, [locations]) or None
+
+    def legsFrom(self, location) -> tuple:
+        legs = self.legs.get(location)
+        if legs is None:
+            legs = self.legs[location] = tuple(self.index.nearest(location.position, self.neighbours, exclude=location))
+        return legs
+
+    def route(self, start, goal):
+        '''(total distance, [start, ..., goal]) along the travel graph, or None if goal can't be reached.'''
+        key = (start, goal)
+        if key in self.routes:
+            self.routes.move_to_end(key)
+            return self.routes[key]
+        result = self.search(start, goal)
+        self.routes[key] = result
+        if len(self.routes) > self.ROUTE_CACHE:
+            self.routes.popitem(last=False)
+        return result
+
+    def search(self, start, goal):
+        goalPosition = goal.position
+        travelled = {start: 0.0}
+        previous = {}
+        queue = [(math.dist(start.position, goalPosition), 0, start)]
+        tiebreak = 1 # Locations don't compare, so equal priorities fall back to insertion order
+        while queue:
+            _, _, location = heapq.heappop(queue)
+            if location is goal:
+                path = [goal]
+                while path[-1] is not start:
+                    path.append(previous[path[-1]])
+                return travelled[goal], path[::-1]
+            for distance, neighbour in self.legsFrom(location):
+                total = travelled[location] + distance
+                if total < travelled.get(neighbour, math.inf):
+                    travelled[neighbour] = total
+                    previous[neighbour] = location
+                    heapq.heappush(queue, (total + math.dist(neighbour.position, goalPosition), tiebreak, neighbour))
+                    tiebreak += 1
+        return None
+
+def syntheticLocations(count: int, seed=0) -> list:
+    '''count made-up locations scattered over a square map with about one city per 100 square miles.'''
+    from AdventureGame import Location
+    rand = random.Random(seed)
+    side = int(math.sqrt(count) * 10)
+    return [Location.fromSnapshot((f"City{i}", "Benchland", (rand.randint(0, side), rand.randint(0, side)), False)) for i in range(count)]
+
+def benchmark(count: int, queries: int = 1000, seed=0) -> dict:
+    '''Build time and mean query latency (seconds) on count synthetic locations.'''
+    locations = syntheticLocations(count, seed)
+    rand = random.Random(seed)
+    results = {}
+    startTime = time.perf_counter()
+    index = SpatialIndex(locations)
+    results["build"] = time.perf_counter() - startTime
+    origins = [rand.choice(locations) for _ in range(queries)]
+    startTime = time.perf_counter()
+    for origin in origins:
+        index.nearest(origin.position, 8, exclude=origin)
+    results["nearest8"] = (time.perf_counter() - startTime) / queries
+    startTime = time.perf_counter()
+    for origin in origins:
+        sorted(((math.dist(origin.position, location.position), location) for location in locations if location is not origin), key=lambda pair: pair[0])[:8]
+    results["nearest8Scan"] = (time.perf_counter() - startTime) / queries
+    startTime = time.perf_counter()
+    for origin in origins:
+        index.within(origin.position, 30, exclude=origin)
+    results["within30"] = (time.perf_counter() - startTime) / queries
+    planner = RoutePlanner(index)
+    pairs = [(rand.choice(locations), rand.choice(locations)) for _ in range(max(1, queries // 10))]
+    startTime = time.perf_counter()
+    for start, goal in pairs:
+        planner.route(start, goal)
+    results["route"] = (time.perf_counter() - startTime) / len(pairs)
+    startTime = time.perf_counter()
+    for start, goal in pairs:
+        planner.route(start, goal)
+    results["routeCached"] = (time.perf_counter() - startTime) / len(pairs)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark travel queries on large synthetic maps.")
+    parser.add_argument("--locations", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+    for count in args.locations:
+        results = benchmark(count, args.queries)
+        print(f"{count:>8} locations: build {results['build'] * 1000:.0f} ms, nearest-8 {results['nearest8'] * 1e6:.1f} us "
+              f"(full scan {results['nearest8Scan'] * 1e6:,.0f} us), within-30 {results['within30'] * 1e6:.1f} us, "
+              f"route {results['route'] * 1000:.2f} ms (cached {results['routeCached'] * 1e6:.1f} us)")
+
+if __name__ == "__main__":
+    main()
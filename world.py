@@ -0,0 +1,174 @@
+'''World clock and timers for things that take game time: travel, sleep and resting.
+
+Nothing polls players. Each timed change is a Timer filed under its due time, either in an EventQueue
+(a heap, for one-off events such as arriving somewhere) or in a TimerWheel (for the many small repeating
+timers such as healing while asleep). World.advance pops only the timers that are due and hands each to
+the handler registered for its kind, so a tick costs the same with ten players or a million.
+'''
+import heapq
+import itertools
+import time
+
+class WorldClock:
+    '''Game time in minutes, running timeScale times faster than the real clock.'''
+    def __init__(self, timeScale: float = 1.0, source=time.time) -> None:
+        self.timeScale = timeScale
+        self.source = source
+
+    def now(self) -> float:
+        return self.source() * self.timeScale / 60
+
+    def realSeconds(self, minutes: float) -> float:
+        '''How long minutes of game time take in real seconds.'''
+        return minutes * 60 / self.timeScale
+
+class Timer:
+    __slots__ = ("due", "kind", "name", "amount", "bulk", "cancelled")
+
+    def __init__(self, due: float, kind: str, name: str, amount: int = 0, bulk: bool = False) -> None:
+        self.due = due
+        self.kind = kind
+        self.name = name # The player the timer belongs to
+        self.amount = amount
+        self.bulk = bulk # Kept on the TimerWheel rather than the EventQueue
+        self.cancelled = False
+
+class EventQueue:
+    '''One-off timers in a heap ordered by due time. Cancelled timers are dropped when they reach the top.
+    World.advance pops them itself, merged with the due timers from the TimerWheel.'''
+    def __init__(self) -> None:
+        self.heap = []
+        self.counter = itertools.count() # Timers don't compare, so equal due times keep insertion order
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def add(self, timer: Timer) -> None:
+        heapq.heappush(self.heap, (timer.due, next(self.counter), timer))
+
+class TimerWheel:
+    '''Hashed timer wheel: size slots of resolution minutes each, reused round after round.
+
+    Adding a timer is an append to its slot. Advancing visits only the slots time has moved through
+    (at most one full turn), so the cost follows the timers that come due, not how many are waiting.
+    Timers more than one turn ahead sit in their slot until their round comes up.'''
+    def __init__(self, resolution: float = 1.0, size: int = 1024) -> None:
+        self.resolution = resolution
+        self.size = size
+        self.slots = [[] for _ in range(size)]
+        self.cursor = None # Absolute number of the last slot fully passed
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, timer: Timer) -> None:
+        slotNumber = int(timer.due // self.resolution)
+        if self.cursor is not None and slotNumber <= self.cursor:
+            slotNumber = self.cursor + 1 # Already overdue: visit on the next advance
+        self.slots[slotNumber % self.size].append(timer)
+        self.count += 1
+
+    def popDue(self, now: float) -> list:
+        last = int(now // self.resolution)
+        first = last - self.size + 1 if self.cursor is None else max(self.cursor + 1, last - self.size + 1)
+        due = []
+        for slotNumber in range(first, last + 1):
+            slot = self.slots[slotNumber % self.size]
+            if not slot:
+                continue
+            waiting = []
+            for timer in slot:
+                if timer.cancelled:
+                    self.count -= 1
+                elif timer.due <= now:
+                    due.append(timer)
+                    self.count -= 1
+                else:
+                    waiting.append(timer)
+            slot[:] = waiting
+        # The current slot may still hold timers due later in it, so it is visited again next time
+        self.cursor = last - 1
+        return due # Not sorted; World.advance orders them
+
+class World:
+    '''Clock plus the timers of every player. handlers maps a timer kind to a function taking the Timer.'''
+    def __init__(self, clock: WorldClock, handlers: dict) -> None:
+        self.clock = clock
+        self.handlers = handlers
+        self.events = EventQueue()
+        self.wheel = TimerWheel()
+        self.timers = {} # player name -> set of live Timers
+        self.ready = None # While advancing: heap of timers due by readyUntil, in due order
+        self.readyUntil = None
+
+    def schedule(self, kind: str, name: str, minutes: float, amount: int = 0, bulk: bool = False, start: float = None) -> Timer:
+        '''Run the kind handler for name minutes of game time after start (default now). bulk timers go on the wheel.
+
+        A handler repeating its timer passes start=timer.due, so a player who was away for hours
+        still gets every repeat, in order, on the next advance.'''
+        timer = Timer((self.clock.now() if start is None else start) + minutes, kind, name, amount, bulk)
+        if self.ready is not None and timer.due <= self.readyUntil:
+            heapq.heappush(self.ready, (timer.due, next(self.events.counter), timer))
+        else:
+            (self.wheel if bulk else self.events).add(timer)
+        self.timers.setdefault(name, set()).add(timer)
+        return timer
+
+    def cancel(self, name: str) -> None:
+        '''Cancel every timer of the player called name.'''
+        for timer in self.timers.pop(name, ()):
+            timer.cancelled = True
+
+    def pending(self, name: str, kind: str = None):
+        '''The first live timer of name (of the given kind, if any) to come due, or None.'''
+        timers = [timer for timer in self.timers.get(name, ()) if kind is None or timer.kind == kind]
+        return min(timers, key=lambda timer: timer.due, default=None)
+
+    def advance(self) -> int:
+        '''Run every timer that is due, including ones scheduled by handlers along the way, in due order.
+        Returns how many ran.'''
+        now = self.clock.now()
+        self.ready = [(timer.due, next(self.events.counter), timer) for timer in self.wheel.popDue(now)]
+        heapq.heapify(self.ready)
+        self.readyUntil = now
+        ran = 0
+        try:
+            events = self.events.heap
+            while True:
+                if events and events[0][0] <= now and (not self.ready or events[0][0] <= self.ready[0][0]):
+                    timer = heapq.heappop(events)[2]
+                elif self.ready:
+                    timer = heapq.heappop(self.ready)[2]
+                else:
+                    break
+                if timer.cancelled:
+                    continue
+                timers = self.timers.get(timer.name)
+                if timers is not None:
+                    timers.discard(timer)
+                    if not timers:
+                        del self.timers[timer.name]
+                self.handlers[timer.kind](timer)
+                ran += 1
+        finally:
+            self.ready = None
+        return ran
+
+    def save(self, path: str) -> None:
+        '''Write the live timers as CSV (kind,name,due,amount,bulk) so they survive a restart.'''
+        with open(path, 'w', newline='') as f:
+            f.write("kind,name,due,amount,bulk,\n")
+            for timers in self.timers.values():
+                for timer in timers:
+                    f.write(f"{timer.kind},{timer.name},{timer.due!r},{timer.amount},{'yes' if timer.bulk else 'no'},\n")
+
+    def load(self, path: str) -> None:
+        '''Restore the timers written by save. Timers that came due while the game was down run on the next advance.'''
+        with open(path, 'r') as f:
+            f.readline()
+            for line in f:
+                kind, name, due, amount, bulk = line.rstrip(",\r\n").split(",")
+                timer = Timer(float(due), kind, name, int(amount), bulk == "yes")
+                (self.wheel if timer.bulk else self.events).add(timer)
+                self.timers.setdefault(name, set()).add(timer)